@@ -1,19 +1,20 @@
 from __future__ import annotations
 
-import os
-from typing import List, Dict, Optional
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Deque, List, Dict, Optional, Sequence
 
-try:
-    from dotenv import load_dotenv  # type: ignore
-    load_dotenv()
-except Exception:
-    pass
-
-from openai import OpenAI
+from openai_client import get_client
 
 from query_rewriter import QueryRewriter
-from embedder import get_embedding
-from weaviate_helper import search_near_vector
+from chat_history import remember
+from embed_cache import get_embedding_cached
+from cache_store import cache_path
+from embedder import EMBEDDING_MODEL
+from retrieval_cache import ProximityCache
+from fast_index import FastMemoryIndex, load_warmup_queries
+from weaviate_helper import Vector, search_near_vector
 
 
 SYSTEM_PROMPT = (
@@ -22,43 +23,68 @@ SYSTEM_PROMPT = (
     "Answer clearly, be concise, and when helpful, cite concrete details (figures, clauses, timeframes) directly. "
     "If the context is insufficient, ask a focused clarifying question or state what is missing—without referencing retrieval mechanics."
 )
+SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_PROMPT}
+# Bounded conversation window: pinned system prompt + most recent turns
+HISTORY_MAXLEN = 32
+
+log = logging.getLogger(__name__)
 
 
 class AgreementSpecialistChatbot:
-    def __init__(self, llm_model: str = "gpt-4o") -> None:
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise RuntimeError("OPENAI_API_KEY not set in environment")
-        self._client = OpenAI(api_key=api_key)
+    def __init__(self, llm_model: str = "gpt-4o", warmup_queries: Optional[Sequence[str]] = None) -> None:
+        self._client = get_client()
         self.llm_model = llm_model
-        self.history: List[Dict[str, str]] = [{"role": "system", "content": SYSTEM_PROMPT}]
+        self.history: Deque[Dict[str, str]] = deque([SYSTEM_MESSAGE], maxlen=HISTORY_MAXLEN)
         self.rewriter = QueryRewriter(model=llm_model)
+        self._retrieval_cache = ProximityCache(persist_path=cache_path("faq_hits_3", EMBEDDING_MODEL))
+        self._prefetcher = ThreadPoolExecutor(max_workers=1)
+        # Frequent intents are answered from memory without a Weaviate round-trip
+        self._fast_index = FastMemoryIndex()
+        if warmup_queries:
+            self._fast_index.warmup(warmup_queries, self._search)
+
+    def _search(self, query_vec: Vector) -> List[Dict]:
+        return search_near_vector(query_vec, limit=3)
+
+    def _retrieve(self, query: str) -> List[Dict]:
+        query_vec = get_embedding_cached(query)
+        hits = self._fast_index.lookup(query_vec)
+        if hits is not None:
+            return hits
+        return self._retrieval_cache.get_or_fetch(query_vec, lambda: self._search(query_vec))
 
     def _build_messages(self, user_message: str, top_context: Optional[Dict] = None) -> List[Dict[str, str]]:
-        msgs: List[Dict[str, str]] = list(self.history)
-        if top_context:
-            ctx_q = top_context.get("question") or ""
-            ctx_a = top_context.get("answer") or ""
-            context_block = f"Relevant context from FAQ (top match):\nQ: {ctx_q}\nA: {ctx_a}"
-            msgs.append({"role": "system", "content": context_block})
-        msgs.append({"role": "user", "content": user_message})
-        return msgs
+        user_msg = {"role": "user", "content": user_message}
+        if not top_context:
+            return [*self.history, user_msg]
+        ctx_q = top_context.get("question") or ""
+        ctx_a = top_context.get("answer") or ""
+        context_block = f"Relevant context from FAQ (top match):\nQ: {ctx_q}\nA: {ctx_a}"
+        return [*self.history, {"role": "system", "content": context_block}, user_msg]
 
     def ask(self, user_message: str) -> str:
         # Maintain conversation history
-        self.history.append({"role": "user", "content": user_message})
+        remember(self.history, {"role": "user", "content": user_message})
+
+        # Speculatively retrieve for the raw message while the rewriter runs; a close
+        # rewrite then hits the embedding and retrieval caches
+        prefetch = self._prefetcher.submit(self._retrieve, user_message)
 
         # Rewrite query using the recent conversation window
         rewritten_query = self.rewriter.rewrite(self.history)
         if not rewritten_query:
             rewritten_query = user_message
-        print("rewritten query => ", rewritten_query)
+        log.debug("rewritten query => %s", rewritten_query)
         # Retrieve top-1 context from Weaviate
-        query_vec = get_embedding(rewritten_query)
-        hits = search_near_vector(query_vec, limit=3)
-        print("hits from weaviate => ", hits)
+        if rewritten_query == user_message:
+            hits = prefetch.result()
+        else:
+            # The speculative result is unused; drop it if it has not started yet, never wait on it
+            prefetch.cancel()
+            hits = self._retrieve(rewritten_query)
+        log.debug("hits from weaviate => %s", hits)
         top_hit = hits[0] if hits else None
-        print(top_hit)
+        log.debug("top hit => %s", top_hit)
         # Build LLM messages with contex
         messages = self._build_messages(user_message, top_hit)
 
@@ -69,24 +95,32 @@ class AgreementSpecialistChatbot:
             max_tokens=400,
         )
         answer = (completion.choices[0].message.content or "").strip()
-        self.history.append({"role": "assistant", "content": answer})
+        remember(self.history, {"role": "assistant", "content": answer})
         return answer
 
+    def close(self) -> None:
+        """Stop the prefetch worker without waiting for a pending speculative retrieval."""
+        self._prefetcher.shutdown(wait=False, cancel_futures=True)
+
 
 def _repl() -> None:
-    bot = AgreementSpecialistChatbot()
+    logging.basicConfig(level=logging.INFO)
+    bot = AgreementSpecialistChatbot(warmup_queries=load_warmup_queries())
     print("Agreement Specialist Chatbot. Type 'exit' to quit.\n")
-    while True:
-        try:
-            user_input = input("You: ").strip()
-        except EOFError:
-            break
-        if not user_input:
-            continue
-        if user_input.lower() in {"exit", "quit"}:
-            break
-        response = bot.ask(user_input)
-        print(f"Assistant: {response}\n")
+    try:
+        while True:
+            try:
+                user_input = input("You: ").strip()
+            except EOFError:
+                break
+            if not user_input:
+                continue
+            if user_input.lower() in {"exit", "quit"}:
+                break
+            response = bot.ask(user_input)
+            print(f"Assistant: {response}\n")
+    finally:
+        bot.close()
 
 
 if __name__ == "__main__":
@@ -1,18 +1,14 @@
 from __future__ import annotations
 
-import os
-from typing import List, Dict
+import logging
+from collections import deque
+from typing import Deque, List, Dict
 
-try:
-    from dotenv import load_dotenv  # type: ignore
-    load_dotenv()
-except Exception:
-    pass
-
-from openai import OpenAI
+from openai_client import get_client
 
 from query_rewriter import QueryRewriter
-from embedder import get_embedding
+from chat_history import remember
+from embed_cache import get_embedding_cached
 from weaviate_helper import search_near_vector
 from LLMReranker import LLMReranker
 
@@ -23,16 +19,18 @@ SYSTEM_PROMPT = (
     "Answer clearly, be concise, and when helpful, cite concrete details (figures, clauses, timeframes) directly. "
     "If the context is insufficient, ask a focused clarifying question or state what is missing—without referencing retrieval mechanics."
 )
+SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_PROMPT}
+# Bounded conversation window: pinned system prompt + most recent turns
+HISTORY_MAXLEN = 32
+
+log = logging.getLogger(__name__)
 
 
 class AgreementSpecialistChatbotMultiHitsLLMReranker:
     def __init__(self, llm_model: str = "gpt-4o") -> None:
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise RuntimeError("OPENAI_API_KEY not set in environment")
-        self._client = OpenAI(api_key=api_key)
+        self._client = get_client()
         self.llm_model = llm_model
-        self.history: List[Dict[str, str]] = [{"role": "system", "content": SYSTEM_PROMPT}]
+        self.history: Deque[Dict[str, str]] = deque([SYSTEM_MESSAGE], maxlen=HISTORY_MAXLEN)
         self.rewriter = QueryRewriter(model=llm_model)
         self.reranker = LLMReranker(model="gpt-4o-mini")
 
@@ -47,17 +45,17 @@ class AgreementSpecialistChatbotMultiHitsLLMReranker:
         return "\n".join(lines)
 
     def ask(self, user_message: str) -> str:
-        self.history.append({"role": "user", "content": user_message})
+        remember(self.history, {"role": "user", "content": user_message})
         rewritten_query = self.rewriter.rewrite(self.history) or user_message
-        query_vec = get_embedding(rewritten_query)
+        query_vec = get_embedding_cached(rewritten_query)
         hits = search_near_vector(query_vec, limit=15)
-        print("hits from weaviate", hits)
+        log.debug("hits from weaviate => %s", hits)
         top_hits = self.reranker.rerank(rewritten_query, hits, top_r=3)
-        print("top hits from LLM reranker", top_hits)
-        messages: List[Dict[str, str]] = list(self.history)
+        log.debug("top hits from LLM reranker => %s", top_hits)
         ctx_block = self._context_block(top_hits)
-        if ctx_block:
-            messages.append({"role": "system", "content": ctx_block})
+        messages: List[Dict[str, str]] = (
+            [*self.history, {"role": "system", "content": ctx_block}] if ctx_block else [*self.history]
+        )
 
         completion = self._client.chat.completions.create(
             model=self.llm_model,
@@ -66,11 +64,12 @@ class AgreementSpecialistChatbotMultiHitsLLMReranker:
             max_tokens=400,
         )
         answer = (completion.choices[0].message.content or "").strip()
-        self.history.append({"role": "assistant", "content": answer})
+        remember(self.history, {"role": "assistant", "content": answer})
         return answer
 
 
 def _repl() -> None:
+    logging.basicConfig(level=logging.INFO)
     bot = AgreementSpecialistChatbotMultiHitsLLMReranker()
     print("Agreement Specialist Chatbot (Multi-Hits + LLM Reranker). Type 'exit' to quit.\n")
     while True:
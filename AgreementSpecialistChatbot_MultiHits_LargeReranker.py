@@ -1,25 +1,41 @@
 from __future__ import annotations
 
+import logging
 import os
-from typing import List, Dict, Tuple
+import shutil
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Deque, List, Dict, Optional, Sequence
 
-try:
-    from dotenv import load_dotenv  # type: ignore
-    load_dotenv()
-except Exception:
-    pass
-
-from openai import OpenAI
+import numpy as np
+from openai_client import get_client
 from query_rewriter import QueryRewriter
-from embedder import get_embedding
-from weaviate_helper import search_near_vector
-
-try:
-    from sentence_transformers import CrossEncoder  # type: ignore
-except Exception as exc:
-    raise ImportError(
-        "sentence-transformers is required for reranking. Install with: pip install sentence-transformers"
-    ) from exc
+from chat_history import remember
+from embed_cache import get_embedding_cached
+from cache_store import cache_path
+from embedder import EMBEDDING_MODEL
+from retrieval_cache import ProximityCache
+from fast_index import FastMemoryIndex, load_warmup_queries
+from weaviate_helper import Vector, search_near_vector
+
+
+def _import_cross_encoder():
+    # Deferred: sentence-transformers pulls in torch and transformers, which costs
+    # seconds at import time for callers that never build a chatbot
+    try:
+        import torch  # noqa: F401
+        from sentence_transformers import CrossEncoder  # type: ignore
+    except Exception as exc:
+        raise ImportError(
+            "sentence-transformers is required for reranking. Install with: pip install sentence-transformers"
+        ) from exc
+    return CrossEncoder
+
+
+def _onnx_dir(reranker_model: str, variant: str) -> str:
+    # Fixed per-model location, so the export runs once rather than on every construction
+    base = os.getenv("RAG_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "rag")
+    return os.path.join(base, "onnx", f"{reranker_model.replace('/', '--')}-{variant}")
 
 
 SYSTEM_PROMPT = (
@@ -28,56 +44,172 @@ SYSTEM_PROMPT = (
     "Answer clearly, be concise, and when helpful, cite concrete details (figures, clauses, timeframes) directly. "
     "If the context is insufficient, ask a focused clarifying question or state what is missing—without referencing retrieval mechanics."
 )
+SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_PROMPT}
+# Bounded conversation window: pinned system prompt + most recent turns
+HISTORY_MAXLEN = 32
+
+log = logging.getLogger(__name__)
 
 
 class AgreementSpecialistChatbotMultiHitsLargeReranker:
-    def __init__(self, llm_model: str = "gpt-4o", reranker_model: str = "BAAI/bge-reranker-large") -> None:
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise RuntimeError("OPENAI_API_KEY not set in environment")
-        self._client = OpenAI(api_key=api_key)
+    def __init__(
+        self,
+        llm_model: str = "gpt-4o",
+        reranker_model: str = "BAAI/bge-reranker-large",
+        use_onnx: bool = True,
+        warmup_queries: Optional[Sequence[str]] = None,
+    ) -> None:
+        self._client = get_client()
         self.llm_model = llm_model
-        self.history: List[Dict[str, str]] = [{"role": "system", "content": SYSTEM_PROMPT}]
+        self.history: Deque[Dict[str, str]] = deque([SYSTEM_MESSAGE], maxlen=HISTORY_MAXLEN)
         self.rewriter = QueryRewriter(model=llm_model)
-        # Eagerly load larger reranker
-        self._reranker = CrossEncoder(reranker_model)
+        self._retrieval_cache = ProximityCache(persist_path=cache_path("faq_hits_15", EMBEDDING_MODEL))
+        self._prefetcher = ThreadPoolExecutor(max_workers=1)
+        # Frequent intents are answered from memory without a Weaviate round-trip
+        self._fast_index = FastMemoryIndex()
+        if warmup_queries:
+            self._fast_index.warmup(warmup_queries, self._search)
+        # ONNX Runtime session used instead of the PyTorch model when optimum is installed
+        self._ort_model = self._load_onnx(reranker_model) if use_onnx else None
+        if self._ort_model is not None:
+            # The PyTorch weights are never loaded when ONNX Runtime does the scoring
+            from transformers import AutoTokenizer  # type: ignore
+
+            self._tokenizer = AutoTokenizer.from_pretrained(reranker_model)
+            self._model = self._ort_model
+            max_length = None
+        else:
+            # Eagerly load larger reranker; FP16 on GPU, all cores on CPU
+            reranker = _import_cross_encoder()(reranker_model)
+            import torch
+
+            reranker.model.eval()
+            if torch.cuda.is_available():
+                reranker.model.half()
+                torch.backends.cuda.matmul.allow_tf32 = True
+            else:
+                torch.set_num_threads(os.cpu_count() or 1)
+            self._tokenizer = reranker.tokenizer
+            self._model = reranker.model
+            max_length = reranker.max_length
+        # FAQ passages are static, so their token ids are computed once and reused
+        self._max_length = max_length or 512
+        self._passage_tok_cache: Dict[str, List[int]] = {}
+
+    @staticmethod
+    def _load_onnx(reranker_model: str):
+        try:
+            from optimum.onnxruntime import ORTModelForSequenceClassification, ORTOptimizer  # type: ignore
+            from optimum.onnxruntime.configuration import AutoOptimizationConfig  # type: ignore
+        except Exception:
+            return None
+        import torch
+
+        on_gpu = torch.cuda.is_available()
+        provider = "CUDAExecutionProvider" if on_gpu else "CPUExecutionProvider"
+        # O4 = full graph fusion + FP16, GPU only
+        model_dir = _onnx_dir(reranker_model, "o4" if on_gpu else "fp32")
+        if not os.path.isfile(os.path.join(model_dir, "config.json")):
+            os.makedirs(os.path.dirname(model_dir), exist_ok=True)
+            # Written to a scratch dir and renamed, so a crash never leaves a half export behind
+            tmp_dir = f"{model_dir}.tmp-{os.getpid()}"
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            try:
+                model = ORTModelForSequenceClassification.from_pretrained(reranker_model, export=True, provider=provider)
+                if on_gpu:
+                    ORTOptimizer.from_pretrained(model).optimize(
+                        save_dir=tmp_dir, optimization_config=AutoOptimizationConfig.O4(for_gpu=True)
+                    )
+                else:
+                    model.save_pretrained(tmp_dir)
+                os.replace(tmp_dir, model_dir)
+            except OSError:
+                # Another process finished the same export first
+                if not os.path.isfile(os.path.join(model_dir, "config.json")):
+                    raise
+            finally:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+        return ORTModelForSequenceClassification.from_pretrained(model_dir, provider=provider)
 
     def _context_block(self, hits: List[Dict]) -> str:
         if not hits:
             return ""
-        lines: List[str] = ["Relevant context from FAQ (re-ranked top-3):"]
-        for i, h in enumerate(hits, 1):
-            q = h.get("question") or ""
-            a = h.get("answer") or ""
-            lines.append(f"[{i}] Q: {q}\n    A: {a}")
-        return "\n".join(lines)
+        return "Relevant context from FAQ (re-ranked top-3):\n" + "\n".join(
+            f"[{i}] Q: {h.get('question') or ''}\n    A: {h.get('answer') or ''}" for i, h in enumerate(hits, 1)
+        )
+
+    def _passage_ids(self, passage: str) -> List[int]:
+        ids = self._passage_tok_cache.get(passage)
+        if ids is None:
+            ids = self._tokenizer(
+                passage, add_special_tokens=False, truncation=True, max_length=self._max_length
+            )["input_ids"]
+            self._passage_tok_cache[passage] = ids
+        return ids
+
+    def _score(self, query: str, passages: List[str]) -> np.ndarray:
+        """Cross-encoder logits for (query, passage) pairs, built from cached passage ids."""
+        import torch
+
+        tok = self._tokenizer
+        q_ids = tok(query, add_special_tokens=False, truncation=True, max_length=self._max_length // 2)["input_ids"]
+        budget = self._max_length - len(q_ids) - tok.num_special_tokens_to_add(pair=True)
+        with_type_ids = "token_type_ids" in tok.model_input_names
+        features = []
+        for passage in passages:
+            p_ids = self._passage_ids(passage)[:budget]
+            feature = {"input_ids": tok.build_inputs_with_special_tokens(q_ids, p_ids)}
+            if with_type_ids:
+                feature["token_type_ids"] = tok.create_token_type_ids_from_sequences(q_ids, p_ids)
+            features.append(feature)
+        batch = tok.pad(features, padding=True, return_tensors="pt").to(self._model.device)
+        on_cuda = batch["input_ids"].device.type == "cuda"
+        with torch.inference_mode(), torch.autocast("cuda", dtype=torch.float16, enabled=on_cuda):
+            logits = self._model(**batch).logits
+        return logits.squeeze(-1).float().cpu().numpy()
 
     def _rerank(self, query: str, hits: List[Dict], top_r: int = 3) -> List[Dict]:
         if not hits:
             return []
-        pairs: List[Tuple[str, str]] = []
+        passages: List[str] = []
         for h in hits:
             q = h.get("question") or ""
             a = h.get("answer") or ""
-            passage = f"Q: {q}\nA: {a}"
-            pairs.append((query, passage))
-        scores = self._reranker.predict(pairs)  # higher is better
-        scored = [({**h}, score) for h, score in zip(hits, scores)]
-        scored.sort(key=lambda x: x[1], reverse=True)
-        return [h for h, _ in scored[:top_r]]
+            passages.append(f"Q: {q}\nA: {a}")
+        scores = self._score(query, passages)  # higher is better
+        idx = np.argpartition(-scores, min(top_r, len(scores) - 1))[:top_r]
+        idx = idx[np.argsort(-scores[idx])]
+        return [hits[i] for i in idx]
+
+    def _search(self, query_vec: Vector) -> List[Dict]:
+        return search_near_vector(query_vec, limit=15)
+
+    def _retrieve(self, query: str) -> List[Dict]:
+        query_vec = get_embedding_cached(query)
+        hits = self._fast_index.lookup(query_vec)
+        if hits is not None:
+            return hits
+        return self._retrieval_cache.get_or_fetch(query_vec, lambda: self._search(query_vec))
 
     def ask(self, user_message: str) -> str:
-        self.history.append({"role": "user", "content": user_message})
+        remember(self.history, {"role": "user", "content": user_message})
+        # Speculatively retrieve for the raw message while the rewriter runs; a close
+        # rewrite then hits the embedding and retrieval caches
+        prefetch = self._prefetcher.submit(self._retrieve, user_message)
         rewritten_query = self.rewriter.rewrite(self.history) or user_message
-        query_vec = get_embedding(rewritten_query)
-        hits = search_near_vector(query_vec, limit=15)
-        print("hits from weaviate", hits)
+        if rewritten_query == user_message:
+            hits = prefetch.result()
+        else:
+            # The speculative result is unused; drop it if it has not started yet, never wait on it
+            prefetch.cancel()
+            hits = self._retrieve(rewritten_query)
+        log.debug("hits from weaviate => %s", hits)
         top_hits = self._rerank(rewritten_query, hits, top_r=3)
-        print("top hits from reranker", top_hits)
-        messages: List[Dict[str, str]] = list(self.history)
+        log.debug("top hits from reranker => %s", top_hits)
         ctx_block = self._context_block(top_hits)
-        if ctx_block:
-            messages.append({"role": "system", "content": ctx_block})
+        messages: List[Dict[str, str]] = (
+            [*self.history, {"role": "system", "content": ctx_block}] if ctx_block else [*self.history]
+        )
 
         completion = self._client.chat.completions.create(
             model=self.llm_model,
@@ -86,24 +218,32 @@ class AgreementSpecialistChatbotMultiHitsLargeReranker:
             max_tokens=400,
         )
         answer = (completion.choices[0].message.content or "").strip()
-        self.history.append({"role": "assistant", "content": answer})
+        remember(self.history, {"role": "assistant", "content": answer})
         return answer
 
+    def close(self) -> None:
+        """Stop the prefetch worker without waiting for a pending speculative retrieval."""
+        self._prefetcher.shutdown(wait=False, cancel_futures=True)
+
 
 def _repl() -> None:
-    bot = AgreementSpecialistChatbotMultiHitsLargeReranker()
+    logging.basicConfig(level=logging.INFO)
+    bot = AgreementSpecialistChatbotMultiHitsLargeReranker(warmup_queries=load_warmup_queries())
     print("Agreement Specialist Chatbot (Multi-Hits + Large Reranker). Type 'exit' to quit.\n")
-    while True:
-        try:
-            user_input = input("You: ").strip()
-        except EOFError:
-            break
-        if not user_input:
-            continue
-        if user_input.lower() in {"exit", "quit"}:
-            break
-        response = bot.ask(user_input)
-        print(f"Assistant: {response}\n")
+    try:
+        while True:
+            try:
+                user_input = input("You: ").strip()
+            except EOFError:
+                break
+            if not user_input:
+                continue
+            if user_input.lower() in {"exit", "quit"}:
+                break
+            response = bot.ask(user_input)
+            print(f"Assistant: {response}\n")
+    finally:
+        bot.close()
 
 
 if __name__ == "__main__":
@@ -1,15 +1,11 @@
 from __future__ import annotations
 
-import os
+import json
+import time
 from typing import List, Dict, Tuple
 
-try:
-    from dotenv import load_dotenv  # type: ignore
-    load_dotenv()
-except Exception:
-    pass
-
-from openai import OpenAI
+import numpy as np
+from openai_client import get_client
 
 
 SYSTEM_PROMPT = (
@@ -19,17 +15,39 @@ SYSTEM_PROMPT = (
     "Base scoring strictly on semantic relevance and specificity. Return only a JSON list of integers, in order."
 )
 
+# Tool schema that forces structured output
+SCORE_TOOL = {
+    "type": "function",
+    "function": {
+        "name": "score_passages",
+        "description": "Return relevance scores (0-6) for each passage in order.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "scores": {
+                    "type": "array",
+                    "items": {"type": "integer"},
+                    "description": "Array of integers, length equals number of passages."
+                }
+            },
+            "required": ["scores"],
+            "additionalProperties": False,
+        },
+    },
+}
+SCORE_TOOL_CHOICE = {"type": "function", "function": {"name": "score_passages"}}
+
 
 class LLMReranker:
+    # Static system message, shared by reference across requests (the SDK does not mutate it)
+    _SYS_MSG: Dict[str, str] = {"role": "system", "content": SYSTEM_PROMPT}
+
     def __init__(self, model: str = "gpt-4o-mini") -> None:
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise RuntimeError("OPENAI_API_KEY not set in environment")
-        self._client = OpenAI(api_key=api_key)
+        self._client = get_client()
         self.model = model
 
     def _build_prompt(self, query: str, passages: List[str]) -> List[Dict[str, str]]:
-        numbered = "\n\n".join([f"[{i+1}]\n{p}" for i, p in enumerate(passages)])
+        numbered = "\n\n".join(f"[{i}]\n{p}" for i, p in enumerate(passages, 1))
         user = (
             "Query:\n"
             f"{query}\n\n"
@@ -37,71 +55,113 @@ class LLMReranker:
             f"{numbered}\n\n"
             "Call the provided tool with an array of integers named 'scores', one per passage, strictly in order."
         )
-        return [
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": user},
-        ]
+        return [self._SYS_MSG, {"role": "user", "content": user}]
 
-    def rerank(self, query: str, hits: List[Dict], top_r: int = 3) -> List[Dict]:
-        if not hits:
-            return []
+    def _request_body(self, query: str, hits: List[Dict]) -> Dict:
         passages: List[str] = []
         for h in hits:
             q = h.get("question") or ""
             a = h.get("answer") or ""
             passages.append(f"Q: {q}\nA: {a}")
+        return {
+            "model": self.model,
+            "messages": self._build_prompt(query, passages),
+            "temperature": 0,
+            "tools": [SCORE_TOOL],
+            "tool_choice": SCORE_TOOL_CHOICE,
+        }
 
-        messages = self._build_prompt(query, passages)
-        # Define tool schema to force structured output
-        tools = [
-            {
-                "type": "function",
-                "function": {
-                    "name": "score_passages",
-                    "description": "Return relevance scores (0-6) for each passage in order.",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "scores": {
-                                "type": "array",
-                                "items": {"type": "integer"},
-                                "description": "Array of integers, length equals number of passages."
-                            }
-                        },
-                        "required": ["scores"],
-                        "additionalProperties": False,
-                    },
-                },
-            }
-        ]
-
-        completion = self._client.chat.completions.create(
-            model=self.model,
-            messages=messages,
-            temperature=0,
-            tools=tools,
-            tool_choice={"type": "function", "function": {"name": "score_passages"}},
-        )
+    @staticmethod
+    def _parse_scores(args_text: str) -> List[int]:
+        args = json.loads(args_text)
+        raw_scores = args.get("scores")
+        if not isinstance(raw_scores, list):
+            raise ValueError("scores missing or not a list")
+        return [int(x) for x in raw_scores]
+
+    @staticmethod
+    def _top_r(hits: List[Dict], scores: List[int], top_r: int) -> List[Dict]:
+        # Top-r by score desc, stable by index: fold the index into the key so ties
+        # resolve to the earlier hit and every key is distinct
+        n = len(hits)
+        padded = np.zeros(n, dtype=np.float64)
+        k = min(len(scores), n)
+        padded[:k] = scores[:k]
+        keys = padded * n + np.arange(n - 1, -1, -1)
+        idx = np.argpartition(-keys, min(top_r, n - 1))[:top_r]
+        idx = idx[np.argsort(-keys[idx])]
+        return [hits[i] for i in idx]
+
+    def rerank(self, query: str, hits: List[Dict], top_r: int = 3) -> List[Dict]:
+        if not hits:
+            return []
+        completion = self._client.chat.completions.create(**self._request_body(query, hits))
 
         scores: List[int]
         try:
             tool_calls = completion.choices[0].message.tool_calls or []
             if not tool_calls:
                 raise ValueError("No tool call returned")
-            args_text = tool_calls[0].function.arguments
-            import json
-            args = json.loads(args_text)
-            raw_scores = args.get("scores")
-            if not isinstance(raw_scores, list):
-                raise ValueError("scores missing or not a list")
-            scores = [int(x) for x in raw_scores]
+            scores = self._parse_scores(tool_calls[0].function.arguments)
         except Exception:
-            scores = [0] * len(passages)
+            scores = [0] * len(hits)
 
-        # Zip, sort by score desc, stable by index
-        indexed = list(enumerate(hits))
-        scored = [(*pair, scores[i] if i < len(scores) else 0) for i, pair in enumerate(indexed)]
-        scored.sort(key=lambda t: (t[2], -t[0]), reverse=True)
-        return [h for _, h, _ in scored[:top_r]]
+        return self._top_r(hits, scores, top_r)
 
+    def rerank_batch(
+        self,
+        queries_and_hits: List[Tuple[str, List[Dict]]],
+        top_r: int = 3,
+        poll_interval: float = 30.0,
+    ) -> List[List[Dict]]:
+        """
+        Rerank many (query, hits) pairs through the OpenAI Batch API.
+
+        Intended for offline evaluation and bulk jobs: requests are billed at the batch
+        discount but complete asynchronously, so this blocks until the batch finishes
+        (up to the 24h completion window). Results are returned in input order; a pair
+        whose request failed keeps its original hit order.
+        """
+        lines: List[str] = []
+        for i, (query, hits) in enumerate(queries_and_hits):
+            if not hits:
+                continue
+            lines.append(json.dumps({
+                "custom_id": str(i),
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": self._request_body(query, hits),
+            }, ensure_ascii=False))
+        results: List[List[Dict]] = [hits[:top_r] for _, hits in queries_and_hits]
+        if not lines:
+            return results
+
+        batch_file = self._client.files.create(
+            file=("rerank_batch.jsonl", "\n".join(lines).encode("utf-8")),
+            purpose="batch",
+        )
+        batch = self._client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+        while batch.status not in {"completed", "failed", "expired", "cancelled"}:
+            time.sleep(poll_interval)
+            batch = self._client.batches.retrieve(batch.id)
+        if batch.status != "completed" or not batch.output_file_id:
+            raise RuntimeError(f"Rerank batch {batch.id} ended with status '{batch.status}'")
 
+        output = self._client.files.content(batch.output_file_id).text
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            i = int(record["custom_id"])
+            hits = queries_and_hits[i][1]
+            try:
+                message = record["response"]["body"]["choices"][0]["message"]
+                scores = self._parse_scores(message["tool_calls"][0]["function"]["arguments"])
+            except Exception:
+                scores = [0] * len(hits)
+            results[i] = self._top_r(hits, scores, top_r)
+        return results
@@ -1,18 +1,14 @@
 from __future__ import annotations
 
-import os
-from typing import List, Dict
+import logging
+from collections import deque
+from typing import Deque, List, Dict
 
-try:
-    from dotenv import load_dotenv  # type: ignore
-    load_dotenv()
-except Exception:
-    pass
-
-from openai import OpenAI
+from openai_client import get_client
 
 from query_rewriter import QueryRewriter
-from embedder import get_embedding
+from chat_history import remember
+from embed_cache import get_embedding_cached
 from weaviate_helper import search_hybrid_story
 
 
@@ -22,16 +18,18 @@ SYSTEM_PROMPT = (
     "Answer clearly, be concise, and when helpful, cite specific details, characters, or plot points directly. "
     "If the context is insufficient, ask a focused clarifying question or state what is missing—without referencing retrieval mechanics."
 )
+SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_PROMPT}
+# Bounded conversation window: pinned system prompt + most recent turns
+HISTORY_MAXLEN = 32
+
+log = logging.getLogger(__name__)
 
 
 class StorySpecialistChatbot:
     def __init__(self, llm_model: str = "gpt-4o") -> None:
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise RuntimeError("OPENAI_API_KEY not set in environment")
-        self._client = OpenAI(api_key=api_key)
+        self._client = get_client()
         self.llm_model = llm_model
-        self.history: List[Dict[str, str]] = [{"role": "system", "content": SYSTEM_PROMPT}]
+        self.history: Deque[Dict[str, str]] = deque([SYSTEM_MESSAGE], maxlen=HISTORY_MAXLEN)
         self.rewriter = QueryRewriter(model=llm_model)
 
     def _context_block(self, hits: List[Dict]) -> str:
@@ -45,20 +43,20 @@ class StorySpecialistChatbot:
 
     def ask(self, user_message: str) -> str:
         # Keep history
-        self.history.append({"role": "user", "content": user_message})
+        remember(self.history, {"role": "user", "content": user_message})
 
         # Rewrite query using conversation window
         rewritten_query = self.rewriter.rewrite(self.history) or user_message
 
         # Search story parts using hybrid search (top 3)
-        query_vec = get_embedding(rewritten_query)
+        query_vec = get_embedding_cached(rewritten_query)
         hits = search_hybrid_story(rewritten_query, vector=query_vec, alpha=0.5, limit=7)
-        print("hits from weaviate => ", hits)
+        log.debug("hits from weaviate => %s", hits)
         # Build messages with story context
-        messages: List[Dict[str, str]] = list(self.history)
         ctx_block = self._context_block(hits)
-        if ctx_block:
-            messages.append({"role": "system", "content": ctx_block})
+        messages: List[Dict[str, str]] = (
+            [*self.history, {"role": "system", "content": ctx_block}] if ctx_block else [*self.history]
+        )
 
         completion = self._client.chat.completions.create(
             model=self.llm_model,
@@ -67,11 +65,12 @@ class StorySpecialistChatbot:
             max_tokens=400,
         )
         answer = (completion.choices[0].message.content or "").strip()
-        self.history.append({"role": "assistant", "content": answer})
+        remember(self.history, {"role": "assistant", "content": answer})
         return answer
 
 
 def _repl() -> None:
+    logging.basicConfig(level=logging.INFO)
     bot = StorySpecialistChatbot()
     print("Story Specialist Chatbot. Type 'exit' to quit.\n")
     while True:
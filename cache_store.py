@@ -0,0 +1,88 @@
+"""
+cache_store.py
+
+Append-only on-disk backing for the in-process vector caches, so chatbot
+restarts start warm.
+
+Each store is a pair of files sharing one path prefix:
+- <prefix>.dat  raw float32 rows, read back through numpy.memmap (pageable, not
+  loaded into RAM up front)
+- <prefix>.json one JSON object per line with the metadata of the matching row
+
+Persistence is opt-in: set RAG_CACHE_DIR to a writable directory. Store names include
+the embedding model, so switching models starts from an empty store instead of
+replaying vectors from a different embedding space.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+try:
+    import numpy as np
+except Exception as exc:  # pragma: no cover
+    raise ImportError("The 'numpy' package is required. Install with: pip install numpy") from exc
+
+
+def cache_path(name: str, model: str) -> Optional[str]:
+    """Return the store prefix for name and embedding model under $RAG_CACHE_DIR, or None when persistence is off."""
+    cache_dir = os.getenv("RAG_CACHE_DIR")
+    if not cache_dir:
+        return None
+    os.makedirs(cache_dir, exist_ok=True)
+    return os.path.join(cache_dir, f"{name}.{model}")
+
+
+class VectorStore:
+    """Append-only (vector, metadata) log backed by a memmapped .dat and a JSON-lines index."""
+
+    def __init__(self, prefix: str) -> None:
+        self.dat_path = f"{prefix}.dat"
+        self.meta_path = f"{prefix}.json"
+        self._lock = threading.Lock()
+
+    def append(self, vec: np.ndarray, meta: Dict) -> None:
+        row = np.ascontiguousarray(vec, dtype=np.float32)
+        line = json.dumps(meta, ensure_ascii=False, default=str)
+        with self._lock:
+            with open(self.dat_path, "ab") as f:
+                f.write(row.tobytes())
+            with open(self.meta_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def load(self) -> Iterator[Tuple[np.ndarray, Dict]]:
+        """Yield stored rows oldest first; a torn trailing write is ignored."""
+        if not (os.path.isfile(self.dat_path) and os.path.isfile(self.meta_path)):
+            return
+        metas = []
+        with open(self.meta_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    metas.append(json.loads(line))
+                except json.JSONDecodeError:
+                    break
+        if not metas:
+            return
+        dim = metas[0].get("dim")
+        if not dim:
+            return
+        n = min(len(metas), os.path.getsize(self.dat_path) // (4 * dim))
+        if n == 0:
+            return
+        mat = np.memmap(self.dat_path, dtype=np.float32, mode="r", shape=(n, dim))
+        for i in range(n):
+            yield np.array(mat[i]), metas[i]
+
+    def rewrite(self, entries: Iterable[Tuple[np.ndarray, Dict]]) -> None:
+        """Replace the store with entries, dropping rows that are no longer live."""
+        with self._lock:
+            tmp_dat, tmp_meta = f"{self.dat_path}.tmp", f"{self.meta_path}.tmp"
+            with open(tmp_dat, "wb") as fd, open(tmp_meta, "w", encoding="utf-8") as fm:
+                for vec, meta in entries:
+                    fd.write(np.ascontiguousarray(vec, dtype=np.float32).tobytes())
+                    fm.write(json.dumps(meta, ensure_ascii=False, default=str) + "\n")
+            os.replace(tmp_dat, self.dat_path)
+            os.replace(tmp_meta, self.meta_path)
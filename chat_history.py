@@ -0,0 +1,17 @@
+"""
+chat_history.py
+
+Bounded chat history shared by the chatbots: a deque with maxlen whose first entry
+is the pinned system prompt.
+"""
+
+from __future__ import annotations
+
+from typing import Deque, Dict
+
+
+def remember(history: Deque[Dict[str, str]], message: Dict[str, str]) -> None:
+    """Append message to history, dropping the oldest turn rather than the system prompt when full."""
+    if len(history) == history.maxlen:
+        del history[1]
+    history.append(message)
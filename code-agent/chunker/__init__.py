@@ -4,6 +4,6 @@ Hierarchical chunking for Python codebases
 """
 
 from .code_chunker import CodeChunker
-from .chunk_types import ChunkType
+from .chunk_types import ChunkType, ChunkTable
 
-__all__ = ["CodeChunker", "ChunkType"]
+__all__ = ["CodeChunker", "ChunkType", "ChunkTable"]
@@ -2,9 +2,10 @@
 Chunk type definitions and metadata schemas
 """
 
+import sys
 from enum import Enum
 from typing import Dict, List, Optional, Any
-from dataclasses import dataclass
+from dataclasses import dataclass, field, fields
 
 
 class ChunkType(Enum):
@@ -18,138 +19,128 @@ class ChunkType(Enum):
     MAIN_BLOCK = "main_block"
 
 
-@dataclass
+# Enum.value goes through a descriptor; create_chunk and ChunkTable use this map instead
+_TYPE_STR: Dict[ChunkType, str] = {m: m.value for m in ChunkType}
+
+
+@dataclass(slots=True)
 class ChunkMetadata:
     """Base metadata for all chunks"""
     file_path: str
     chunk_type: ChunkType
     name: str
     purpose: str
-    dependencies: List[str] = None
+    dependencies: List[str] = field(default_factory=list)
     access_level: str = "public"
-    
-    def __post_init__(self):
-        if self.dependencies is None:
-            self.dependencies = []
 
 
-@dataclass
+@dataclass(slots=True)
 class PackageMetadata(ChunkMetadata):
     """Metadata for package chunks"""
     file_count: int = 0
-    files: List[str] = None
-    subpackages: List[str] = None
-    api_routes: List[str] = None
-    database_tables: List[str] = None
-    features: List[str] = None
-    
-    def __post_init__(self):
-        super().__post_init__()
-        if self.files is None:
-            self.files = []
-        if self.subpackages is None:
-            self.subpackages = []
-        if self.api_routes is None:
-            self.api_routes = []
-        if self.database_tables is None:
-            self.database_tables = []
-        if self.features is None:
-            self.features = []
-
-
-@dataclass
+    files: List[str] = field(default_factory=list)
+    subpackages: List[str] = field(default_factory=list)
+    api_routes: List[str] = field(default_factory=list)
+    database_tables: List[str] = field(default_factory=list)
+    features: List[str] = field(default_factory=list)
+
+
+@dataclass(slots=True)
 class ClassMetadata(ChunkMetadata):
     """Metadata for class chunks"""
     class_name: str = ""
-    methods: List[str] = None
-    attributes: List[str] = None
-    base_classes: List[str] = None
-    decorators: List[str] = None
-    
-    def __post_init__(self):
-        super().__post_init__()
-        if self.methods is None:
-            self.methods = []
-        if self.attributes is None:
-            self.attributes = []
-        if self.base_classes is None:
-            self.base_classes = []
-        if self.decorators is None:
-            self.decorators = []
-
-
-@dataclass
+    methods: List[str] = field(default_factory=list)
+    attributes: List[str] = field(default_factory=list)
+    base_classes: List[str] = field(default_factory=list)
+    decorators: List[str] = field(default_factory=list)
+
+
+@dataclass(slots=True)
 class MethodMetadata(ChunkMetadata):
     """Metadata for method chunks"""
     class_name: str = ""
     method_name: str = ""
-    parameters: List[str] = None
+    parameters: List[str] = field(default_factory=list)
     return_type: str = ""
     access: str = "public"
-    decorators: List[str] = None
+    decorators: List[str] = field(default_factory=list)
     is_async: bool = False
     is_static: bool = False
     is_classmethod: bool = False
-    
-    def __post_init__(self):
-        super().__post_init__()
-        if self.parameters is None:
-            self.parameters = []
-        if self.decorators is None:
-            self.decorators = []
 
 
-@dataclass
+@dataclass(slots=True)
 class FunctionMetadata(ChunkMetadata):
     """Metadata for function chunks"""
     function_name: str = ""
-    parameters: List[str] = None
+    parameters: List[str] = field(default_factory=list)
     return_type: str = ""
-    decorators: List[str] = None
+    decorators: List[str] = field(default_factory=list)
     is_async: bool = False
-    
-    def __post_init__(self):
-        super().__post_init__()
-        if self.parameters is None:
-            self.parameters = []
-        if self.decorators is None:
-            self.decorators = []
 
 
-@dataclass
+@dataclass(slots=True)
 class ImportsMetadata(ChunkMetadata):
     """Metadata for imports chunks"""
-    imports: List[Dict[str, str]] = None  # [{"module": "fastapi", "type": "third_party", "items": ["FastAPI"]}]
-    
-    def __post_init__(self):
-        super().__post_init__()
-        if self.imports is None:
-            self.imports = []
+    imports: List[Dict[str, str]] = field(default_factory=list)  # [{"module": "fastapi", "type": "third_party", "items": ["FastAPI"]}]
 
 
-@dataclass
+@dataclass(slots=True)
 class ConstantsMetadata(ChunkMetadata):
     """Metadata for constants chunks"""
     constant_name: str = ""
     constant_type: str = ""
     usage: str = ""
-    constants: List[Dict[str, str]] = None
-    
-    def __post_init__(self):
-        super().__post_init__()
-        if self.constants is None:
-            self.constants = []
+    constants: List[Dict[str, str]] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class MainBlockMetadata(ChunkMetadata):
     """Metadata for main block chunks"""
-    calls: List[str] = None
+    calls: List[str] = field(default_factory=list)
+
+
+_METADATA_FOR: Dict[ChunkType, type] = {
+    ChunkType.PACKAGE: PackageMetadata,
+    ChunkType.CLASS: ClassMetadata,
+    ChunkType.METHOD: MethodMetadata,
+    ChunkType.FUNCTION: FunctionMetadata,
+    ChunkType.IMPORTS: ImportsMetadata,
+    ChunkType.CONSTANTS: ConstantsMetadata,
+    ChunkType.MAIN_BLOCK: MainBlockMetadata,
+}
+
+_FIELD_NAMES: Dict[type, tuple] = {}
+
+
+def _as_dict(metadata: ChunkMetadata) -> Dict[str, Any]:
+    """Shallow field dict for a slotted metadata instance (no deep copy, unlike asdict)"""
+    cls = type(metadata)
+    names = _FIELD_NAMES.get(cls)
+    if names is None:
+        names = _FIELD_NAMES[cls] = tuple(f.name for f in fields(cls))
+    return {n: getattr(metadata, n) for n in names}
+
+
+@dataclass(slots=True)
+class Chunk:
+    """A single chunk; serialized as a plain dict only at the I/O boundary (to_dict)"""
+    type: str
+    name: str
+    content: str
+    metadata: ChunkMetadata
+    description: Optional[str] = None
     
-    def __post_init__(self):
-        super().__post_init__()
-        if self.calls is None:
-            self.calls = []
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            "type": self.type,
+            "name": self.name,
+            "content": self.content,
+            "metadata": _as_dict(self.metadata)
+        }
+        if self.description is not None:
+            data["description"] = self.description
+        return data
 
 
 def create_chunk(
@@ -159,78 +150,74 @@ def create_chunk(
     file_path: str,
     purpose: str,
     **kwargs
-) -> Dict[str, Any]:
-    """Create a chunk dictionary with proper metadata"""
+) -> Chunk:
+    """Create a chunk with proper metadata"""
+    
+    # One shared string per distinct path / access level across the whole run
+    file_path = sys.intern(file_path)
+    if "access_level" in kwargs:
+        kwargs["access_level"] = sys.intern(kwargs["access_level"])
     
     # Create appropriate metadata based on chunk type
-    if chunk_type == ChunkType.PACKAGE:
-        metadata = PackageMetadata(
-            file_path=file_path,
-            chunk_type=chunk_type,
-            name=name,
-            purpose=purpose,
-            **kwargs
-        )
-    elif chunk_type == ChunkType.CLASS:
-        metadata = ClassMetadata(
-            file_path=file_path,
-            chunk_type=chunk_type,
-            name=name,
-            purpose=purpose,
-            **kwargs
-        )
-    elif chunk_type == ChunkType.METHOD:
-        metadata = MethodMetadata(
-            file_path=file_path,
-            chunk_type=chunk_type,
-            name=name,
-            purpose=purpose,
-            **kwargs
-        )
-    elif chunk_type == ChunkType.FUNCTION:
-        metadata = FunctionMetadata(
-            file_path=file_path,
-            chunk_type=chunk_type,
-            name=name,
-            purpose=purpose,
-            **kwargs
-        )
-    elif chunk_type == ChunkType.IMPORTS:
-        metadata = ImportsMetadata(
-            file_path=file_path,
-            chunk_type=chunk_type,
-            name=name,
-            purpose=purpose,
-            **kwargs
-        )
-    elif chunk_type == ChunkType.CONSTANTS:
-        metadata = ConstantsMetadata(
-            file_path=file_path,
-            chunk_type=chunk_type,
-            name=name,
-            purpose=purpose,
-            **kwargs
-        )
-    elif chunk_type == ChunkType.MAIN_BLOCK:
-        metadata = MainBlockMetadata(
-            file_path=file_path,
-            chunk_type=chunk_type,
-            name=name,
-            purpose=purpose,
-            **kwargs
-        )
-    else:
-        metadata = ChunkMetadata(
-            file_path=file_path,
-            chunk_type=chunk_type,
-            name=name,
-            purpose=purpose,
-            **kwargs
-        )
+    metadata_cls = _METADATA_FOR.get(chunk_type, ChunkMetadata)
+    metadata = metadata_cls(
+        file_path=file_path,
+        chunk_type=chunk_type,
+        name=name,
+        purpose=purpose,
+        **kwargs
+    )
+    
+    return Chunk(_TYPE_STR[chunk_type], name, content, metadata)
+
+
+class ChunkTable:
+    """Columnar (struct-of-arrays) view of many chunks
+    
+    Keeps parallel lists instead of one object per chunk, so scans over a single
+    column (e.g. all chunks of one type) touch only that list.
+    """
+    
+    __slots__ = ("types", "names", "file_paths", "contents", "metadata", "descriptions")
+    
+    def __init__(self):
+        self.types: List[ChunkType] = []
+        self.names: List[str] = []
+        self.file_paths: List[str] = []
+        self.contents: List[str] = []
+        self.metadata: List[ChunkMetadata] = []
+        self.descriptions: List[Optional[str]] = []
     
-    return {
-        "type": chunk_type.value,
-        "name": name,
-        "content": content,
-        "metadata": metadata.__dict__
-    }
+    def __len__(self) -> int:
+        return len(self.names)
+    
+    @classmethod
+    def from_chunks(cls, chunks: List[Chunk]) -> "ChunkTable":
+        table = cls()
+        for chunk in chunks:
+            table.append(chunk)
+        return table
+    
+    def append(self, chunk: Chunk):
+        """Append a chunk as produced by create_chunk"""
+        metadata = chunk.metadata
+        self.types.append(metadata.chunk_type)
+        self.names.append(chunk.name)
+        self.file_paths.append(metadata.file_path)
+        self.contents.append(chunk.content)
+        self.metadata.append(metadata)
+        self.descriptions.append(chunk.description)
+    
+    def indices_of(self, chunk_type: ChunkType) -> List[int]:
+        """Row indices of all chunks of the given type"""
+        return [i for i, t in enumerate(self.types) if t is chunk_type]
+    
+    def row(self, i: int) -> Chunk:
+        """Rebuild the chunk for row i"""
+        return Chunk(
+            _TYPE_STR[self.types[i]],
+            self.names[i],
+            self.contents[i],
+            self.metadata[i],
+            self.descriptions[i]
+        )
@@ -6,48 +6,242 @@ Chunks Python codebases into structured, searchable components with LLM descript
 import os
 import ast
 import re
+import sys
+import hashlib
+import math
+import functools
+import json
+import pickle
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import asdict
 
 try:
-    from .chunk_types import ChunkType, create_chunk
-    from .llm_descriptor import LLMDescriptor
+    import orjson  # optional, much faster save_chunks
 except ImportError:
-    from chunk_types import ChunkType, create_chunk
-    from llm_descriptor import LLMDescriptor
+    orjson = None
+
+try:
+    from .chunk_types import Chunk, ChunkType, create_chunk
+except ImportError:
+    from chunk_types import Chunk, ChunkType, create_chunk
+
+
+def _json_default(obj: Any) -> Any:
+    """JSON fallback for Chunk objects, ChunkType enums and other non-native values"""
+    if isinstance(obj, Chunk):
+        return obj.to_dict()
+    if hasattr(obj, 'value'):
+        return obj.value
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _unparse(node: ast.AST) -> str:
+    """Source text for an annotation/base/decorator node; bare names skip ast.unparse"""
+    if isinstance(node, ast.Name):
+        return node.id
+    return ast.unparse(node)
+
+
+# Literal types whose repr() is exactly what ast.unparse would print
+_REPR_LITERALS = (str, bytes, bool, int, type(None))
+
+
+def _constant_repr(node: ast.AST) -> str:
+    """Source text for a constant's value; plain literals skip the full unparser"""
+    if isinstance(node, ast.Constant):
+        value = node.value
+        if isinstance(value, _REPR_LITERALS) or (isinstance(value, float) and math.isfinite(value)):
+            return repr(value)
+    return _unparse(node)
+
+
+def _parse(source: bytes, file_path: Path) -> ast.Module:
+    """Parse source to an AST without type-comment scanning or inherited __future__ flags"""
+    # PyCF_OPTIMIZED_AST (3.13+) is deliberately not used: it constant-folds
+    # expressions, which would change the values recorded for module constants
+    return compile(source, str(file_path), 'exec', flags=ast.PyCF_ONLY_AST, dont_inherit=True)
+
+
+# Below this many files the process pool costs more to start than it saves
+PARALLEL_MIN_FILES = 16
+
+
+# Directories never descended into while collecting source files
+_SKIP_DIRS = frozenset({"__pycache__", ".git", ".pytest_cache", "venv", "env", ".env"})
+# Any path containing one of these substrings is skipped
+_SKIP_RE = re.compile("|".join(map(re.escape, sorted(_SKIP_DIRS))))
+
+
+def _iter_py_files(root: Path):
+    """Yield *.py files under root (each directory's files, then its subdirectories),
+    pruning skipped directories instead of walking into them"""
+    files = []
+    subdirs = []
+    try:
+        with os.scandir(root) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in _SKIP_DIRS:
+                        subdirs.append(entry.path)
+                elif entry.name.endswith(".py"):
+                    files.append(entry.path)
+    except OSError:
+        return
+    for path in files:
+        yield Path(path)
+    for path in subdirs:
+        yield from _iter_py_files(Path(path))
+
+
+# Bodies of these are not part of the enclosing block's control flow
+_NESTED_SCOPES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda, ast.ClassDef)
+
+
+def _is_main_guard(node: ast.AST) -> bool:
+    """Check for `if __name__ == "__main__":`"""
+    return (isinstance(node, ast.If) and
+            isinstance(node.test, ast.Compare) and
+            isinstance(node.test.left, ast.Name) and
+            node.test.left.id == "__name__" and
+            len(node.test.comparators) == 1 and
+            isinstance(node.test.comparators[0], ast.Constant) and
+            node.test.comparators[0].value == "__main__")
+
+
+def _collect_imports(node: ast.AST, imports: List[ast.AST]) -> None:
+    """Append every import statement nested in node's statements, in source order"""
+    for child in ast.iter_child_nodes(node):
+        if isinstance(child, (ast.Import, ast.ImportFrom)):
+            imports.append(child)
+        elif isinstance(child, (ast.stmt, ast.excepthandler)):
+            _collect_imports(child, imports)
+
+
+class ChunkingVisitor(ast.NodeVisitor):
+    """Collects the module-scope nodes each chunk type is built from, in source order.
+    
+    Only statements are descended into (module-level if/try/with blocks etc.);
+    class and function bodies and the main guard are only scanned for imports,
+    and expressions are never entered.
+    """
+    
+    # Node type -> visitor method, resolved once per type instead of a getattr per node
+    _dispatch: Dict[type, Any] = {}
+    
+    def __init__(self):
+        self.imports: List[ast.AST] = []
+        self.assigns: List[ast.Assign] = []
+        self.classes: List[ast.ClassDef] = []
+        self.functions: List[ast.FunctionDef] = []
+        self.main: Optional[ast.If] = None
+    
+    def visit(self, node: ast.AST):
+        node_type = type(node)
+        method = self._dispatch.get(node_type)
+        if method is None:
+            method = getattr(ChunkingVisitor, 'visit_' + node_type.__name__, ChunkingVisitor.generic_visit)
+            self._dispatch[node_type] = method
+        method(self, node)
+    
+    def generic_visit(self, node: ast.AST):
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.stmt, ast.excepthandler)):
+                self.visit(child)
+    
+    def visit_Import(self, node: ast.Import):
+        self.imports.append(node)
+    
+    def visit_ImportFrom(self, node: ast.ImportFrom):
+        self.imports.append(node)
+    
+    def visit_Assign(self, node: ast.Assign):
+        self.assigns.append(node)
+    
+    def visit_ClassDef(self, node: ast.ClassDef):
+        self.classes.append(node)
+        # Function-local and class-body imports belong in the file's imports chunk too
+        _collect_imports(node, self.imports)
+    
+    def visit_FunctionDef(self, node: ast.FunctionDef):
+        # Module scope only, so this is never a method
+        self.functions.append(node)
+        _collect_imports(node, self.imports)
+    
+    def visit_AsyncFunctionDef(self, node: ast.AsyncFunctionDef):
+        _collect_imports(node, self.imports)
+    
+    def visit_If(self, node: ast.If):
+        if _is_main_guard(node):
+            if self.main is None:
+                self.main = node
+            _collect_imports(node, self.imports)
+        else:
+            self.generic_visit(node)
+
+
+def _chunk_file_static(file_path: Path, codebase_path: str, cache_dir: Optional[str]) -> Tuple[List[Chunk], List[Dict[str, Any]]]:
+    """Chunk one file in a worker process (module-level so it pickles)"""
+    chunker = CodeChunker(codebase_path, generate_descriptions=False, cache_dir=cache_dir)
+    try:
+        return chunker._chunk_file(file_path)
+    except Exception as e:
+        print(f"Error processing {file_path}: {e}")
+        return [], []
 
 
 class CodeChunker:
     """Hierarchical code chunker for Python codebases with LLM descriptions"""
     
-    def __init__(self, codebase_path: str, generate_descriptions: bool = False):
+    def __init__(self, codebase_path: str, generate_descriptions: bool = False,
+                 cache_dir: Optional[str] = None, offline_descriptions: bool = False):
         self.codebase_path = Path(codebase_path)
-        self.chunks: List[Dict[str, Any]] = []
+        # Opt-in cache of parsed ASTs keyed by source hash. The files are unpickled, which can
+        # run arbitrary code, so only point this at a directory no one else can write to
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.chunks: List[Chunk] = []
         self.relationships: List[Dict[str, Any]] = []
         self.generate_descriptions = generate_descriptions
-        self.llm_descriptor = LLMDescriptor() if generate_descriptions else None
+        # Describe chunks through the OpenAI Batch API (cheaper, up to 24h) instead of live calls
+        self.offline_descriptions = offline_descriptions
+        self.llm_descriptor = None
+        if generate_descriptions:
+            # Imported here so plain chunking never loads the LLM client stack
+            try:
+                from .llm_descriptor import LLMDescriptor
+            except ImportError:
+                from llm_descriptor import LLMDescriptor
+            self.llm_descriptor = LLMDescriptor()
     
-    def chunk_codebase(self) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    def chunk_codebase(self) -> Tuple[List[Chunk], List[Dict[str, Any]]]:
         """Chunk entire codebase and return chunks with relationships"""
         self.chunks = []
         self.relationships = []
         
         # Find all Python files
-        python_files = list(self.codebase_path.rglob("*.py"))
-        
-        # Process each file
-        for file_path in python_files:
-            if self._should_skip_file(file_path):
-                continue
-            
-            try:
-                file_chunks, file_relationships = self._chunk_file(file_path)
-                self.chunks.extend(file_chunks)
-                self.relationships.extend(file_relationships)
-            except Exception as e:
-                print(f"Error processing {file_path}: {e}")
-                continue
+        python_files = [f for f in _iter_py_files(self.codebase_path) if not self._should_skip_file(f)]
+        
+        # Process each file; files are independent, so large trees are chunked in parallel
+        if len(python_files) > PARALLEL_MIN_FILES:
+            n = len(python_files)
+            cache_dir = str(self.cache_dir) if self.cache_dir else None
+            with ProcessPoolExecutor(max_workers=os.cpu_count()) as pool:
+                for file_chunks, file_relationships in pool.map(
+                    _chunk_file_static, python_files, [str(self.codebase_path)] * n, [cache_dir] * n
+                ):
+                    self.chunks.extend(file_chunks)
+                    self.relationships.extend(file_relationships)
+        else:
+            for file_path in python_files:
+                try:
+                    file_chunks, file_relationships = self._chunk_file(file_path)
+                    self.chunks.extend(file_chunks)
+                    self.relationships.extend(file_relationships)
+                except Exception as e:
+                    print(f"Error processing {file_path}: {e}")
+                    continue
         
         # Generate package chunks
         self._generate_package_chunks()
@@ -55,66 +249,74 @@ class CodeChunker:
         # Generate LLM descriptions if enabled
         if self.generate_descriptions and self.llm_descriptor:
             print("🤖 Generating LLM descriptions for chunks...")
-            self.chunks = self.llm_descriptor.batch_generate_descriptions(self.chunks)
+            if self.offline_descriptions:
+                self.chunks = self.llm_descriptor.batch_generate_descriptions_offline(self.chunks)
+            else:
+                self.chunks = self.llm_descriptor.batch_generate_descriptions(self.chunks)
         
         return self.chunks, self.relationships
     
     def _should_skip_file(self, file_path: Path) -> bool:
         """Check if file should be skipped"""
-        skip_patterns = [
-            "__pycache__",
-            ".git",
-            ".pytest_cache",
-            "venv",
-            "env",
-            ".env"
-        ]
-        
-        return any(pattern in str(file_path) for pattern in skip_patterns)
+        return _SKIP_RE.search(str(file_path)) is not None
     
-    def _chunk_file(self, file_path: Path) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    def _chunk_file(self, file_path: Path) -> Tuple[List[Chunk], List[Dict[str, Any]]]:
         """Chunk a single Python file"""
         chunks = []
         relationships = []
         
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            # Read raw bytes once: they are hashed and parsed as-is, and decoded only for line slicing
+            with open(file_path, 'rb') as f:
+                source = f.read()
+            content = source.decode('utf-8')
             
-            tree = ast.parse(content)
+            tree = self._load_or_parse(source, file_path)
+            # Split once; every extracted node slices its source from this
+            lines = content.split('\n')
             
             # Get relative path for metadata
-            rel_path = str(file_path.relative_to(self.codebase_path))
+            rel_path = sys.intern(str(file_path.relative_to(self.codebase_path)))
+            
+            # Single pass over module scope, bucketing the nodes each chunk type needs
+            visitor = ChunkingVisitor()
+            visitor.visit(tree)
+            import_nodes = visitor.imports
+            assign_nodes = visitor.assigns
+            class_nodes = visitor.classes
+            function_nodes = visitor.functions
+            main_node = visitor.main
             
             # Extract imports
-            imports_chunk = self._extract_imports(tree, rel_path, content)
+            imports_chunk = self._extract_imports(import_nodes, rel_path, content)
             if imports_chunk:
                 chunks.append(imports_chunk)
             
             # Extract constants
-            constants_chunk = self._extract_constants(tree, rel_path, content)
+            constants_chunk = self._extract_constants(assign_nodes, rel_path, content)
             if constants_chunk:
                 chunks.append(constants_chunk)
             
-            # Extract classes and their methods
-            for node in ast.walk(tree):
-                if isinstance(node, ast.ClassDef):
-                    class_chunk, class_relationships = self._extract_class(node, rel_path, content)
-                    if class_chunk:
-                        chunks.append(class_chunk)
-                        relationships.extend(class_relationships)
+            # Extract classes and their methods (nested classes follow their enclosing ones)
+            i = 0
+            while i < len(class_nodes):
+                node = class_nodes[i]
+                class_nodes.extend(item for item in node.body if isinstance(item, ast.ClassDef))
+                class_chunk, class_relationships = self._extract_class(node, rel_path, lines)
+                if class_chunk:
+                    chunks.append(class_chunk)
+                    relationships.extend(class_relationships)
+                i += 1
             
             # Extract standalone functions
-            for node in ast.walk(tree):
-                if isinstance(node, ast.FunctionDef) and not self._is_method(node):
-                    function_chunk = self._extract_function(node, rel_path, content)
-                    if function_chunk:
-                        chunks.append(function_chunk)
+            for node in function_nodes:
+                function_chunk = self._extract_function(node, rel_path, lines)
+                if function_chunk:
+                    chunks.append(function_chunk)
             
             # Extract main block
-            main_chunk = self._extract_main_block(tree, rel_path, content)
-            if main_chunk:
-                chunks.append(main_chunk)
+            if main_node is not None:
+                chunks.append(self._extract_main_block(main_node, rel_path, lines))
             
         except SyntaxError as e:
             print(f"Syntax error in {file_path}: {e}")
@@ -123,32 +325,60 @@ class CodeChunker:
         
         return chunks, relationships
     
-    def _extract_imports(self, tree: ast.AST, file_path: str, content: str) -> Optional[Dict[str, Any]]:
+    def _load_or_parse(self, source: bytes, file_path: Path) -> ast.Module:
+        """Parse source, reusing a pickled AST from the local cache when the source is unchanged"""
+        if self.cache_dir is None:
+            return _parse(source, file_path)
+        
+        # AST node classes differ between interpreter versions, so the version is part of the key
+        digest = hashlib.sha256(source).hexdigest()
+        cache_file = self.cache_dir / f"{digest}-py{sys.version_info[0]}{sys.version_info[1]}.pkl"
+        
+        # Nothing proves this chunker wrote the file; on POSIX, at least skip files owned by another user
+        if cache_file.is_file() and (not hasattr(os, "getuid") or cache_file.stat().st_uid == os.getuid()):
+            try:
+                with open(cache_file, 'rb') as f:
+                    return pickle.load(f)
+            except Exception:
+                pass
+        
+        tree = _parse(source, file_path)
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_file, 'wb') as f:
+                pickle.dump(tree, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, cache_file)
+        except Exception:
+            pass
+        return tree
+    
+    def _extract_imports(self, nodes: List[ast.AST], file_path: str, content: str) -> Optional[Chunk]:
         """Extract import statements"""
         imports = []
         
-        for node in ast.walk(tree):
-            if isinstance(node, (ast.Import, ast.ImportFrom)):
-                import_info = self._parse_import_node(node)
-                if import_info:
-                    imports.append(import_info)
+        for node in nodes:
+            import_info = self._parse_import_node(node)
+            if import_info:
+                imports.append(import_info)
         
         if not imports:
             return None
         
         # Create imports content
-        imports_content = "Module Dependencies:\n\n"
+        parts = ["Module Dependencies:\n\n"]
         for imp in imports:
             if imp["type"] == "standard":
-                imports_content += f"Standard Library: {imp['module']}\n"
+                parts.append(f"Standard Library: {imp['module']}\n")
             elif imp["type"] == "third_party":
-                imports_content += f"Third Party: {imp['module']}\n"
+                parts.append(f"Third Party: {imp['module']}\n")
             elif imp["type"] == "local":
-                imports_content += f"Local: {imp['module']}\n"
+                parts.append(f"Local: {imp['module']}\n")
             
             if imp.get("items"):
-                imports_content += f"  - {', '.join(imp['items'])}\n"
-            imports_content += "\n"
+                parts.append(f"  - {', '.join(imp['items'])}\n")
+            parts.append("\n")
+        imports_content = "".join(parts)
         
         return create_chunk(
             chunk_type=ChunkType.IMPORTS,
@@ -184,48 +414,40 @@ class CodeChunker:
         
         return None
     
-    def _classify_import(self, module_name: str) -> str:
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _classify_import(module_name: str) -> str:
         """Classify import as standard, third_party, or local"""
         if not module_name:
             return "local"
         
-        # Standard library modules (simplified list)
-        stdlib_modules = {
-            'os', 'sys', 'json', 'datetime', 'typing', 'pathlib', 're',
-            'collections', 'functools', 'itertools', 'math', 'random',
-            'string', 'io', 'urllib', 'http', 'email', 'html', 'xml',
-            'sqlite3', 'csv', 'configparser', 'logging', 'unittest',
-            'asyncio', 'threading', 'multiprocessing', 'subprocess'
-        }
-        
-        if module_name in stdlib_modules:
+        if module_name.partition('.')[0] in sys.stdlib_module_names:
             return "standard"
         elif module_name.startswith('app.') or module_name.startswith('.'):
             return "local"
         else:
             return "third_party"
     
-    def _extract_constants(self, tree: ast.AST, file_path: str, content: str) -> Optional[Dict[str, Any]]:
+    def _extract_constants(self, nodes: List[ast.Assign], file_path: str, content: str) -> Optional[Chunk]:
         """Extract module-level constants"""
         constants = []
         
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Assign):
-                # Check if it's a module-level constant (all caps)
-                for target in node.targets:
-                    if isinstance(target, ast.Name) and target.id.isupper():
-                        constants.append({
-                            "name": target.id,
-                            "value": ast.unparse(node.value) if hasattr(ast, 'unparse') else str(node.value)
-                        })
+        for node in nodes:
+            # Check if it's a module-level constant (all caps)
+            for target in node.targets:
+                if isinstance(target, ast.Name) and target.id.isupper():
+                    constants.append({
+                        "name": target.id,
+                        "value": _constant_repr(node.value)
+                    })
         
         if not constants:
             return None
         
         # Create constants content
-        constants_content = "Module Constants:\n\n"
-        for const in constants:
-            constants_content += f"{const['name']} = {const['value']}\n"
+        constants_content = "Module Constants:\n\n" + "".join(
+            f"{const['name']} = {const['value']}\n" for const in constants
+        )
         
         return create_chunk(
             chunk_type=ChunkType.CONSTANTS,
@@ -236,7 +458,7 @@ class CodeChunker:
             constants=constants
         )
     
-    def _extract_class(self, node: ast.ClassDef, file_path: str, content: str) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+    def _extract_class(self, node: ast.ClassDef, file_path: str, lines: List[str]) -> Tuple[Optional[Chunk], List[Dict[str, Any]]]:
         """Extract class and its methods"""
         relationships = []
         
@@ -249,7 +471,7 @@ class CodeChunker:
                 methods.append(item.name)
                 
                 # Create method chunk
-                method_chunk = self._extract_method(item, file_path, content, node.name)
+                method_chunk = self._extract_method(item, file_path, lines, node.name)
                 if method_chunk:
                     method_chunks.append(method_chunk)
                     relationships.append({
@@ -259,17 +481,19 @@ class CodeChunker:
                         "metadata": {"purpose": "class_method"}
                     })
         
+        base_classes = [_unparse(base) for base in node.bases]
+        docstring = self._extract_docstring(node)
+        
         # Create class content (signatures only)
-        class_content = f"class {node.name}:\n"
-        if node.bases:
-            base_classes = [ast.unparse(base) if hasattr(ast, 'unparse') else str(base) for base in node.bases]
-            class_content += f"    # Inherits from: {', '.join(base_classes)}\n"
+        parts = [f"class {node.name}:\n"]
+        if base_classes:
+            parts.append(f"    # Inherits from: {', '.join(base_classes)}\n")
         
-        class_content += f"    # Purpose: {self._extract_docstring(node) or 'No description available'}\n\n"
+        parts.append(f"    # Purpose: {docstring or 'No description available'}\n\n")
         
         for method in methods:
-            class_content += f"    def {method}(self, ...):\n"
-            class_content += f"        # Method implementation\n\n"
+            parts.append(f"    def {method}(self, ...):\n        # Method implementation\n\n")
+        class_content = "".join(parts)
         
         # Create class chunk
         class_chunk = create_chunk(
@@ -277,112 +501,78 @@ class CodeChunker:
             name=node.name,
             content=class_content.strip(),
             file_path=file_path,
-            purpose=self._extract_docstring(node) or f"Class {node.name}",
+            purpose=docstring or f"Class {node.name}",
             class_name=node.name,
             methods=methods,
-            base_classes=[ast.unparse(base) if hasattr(ast, 'unparse') else str(base) for base in node.bases],
-            decorators=[ast.unparse(dec) if hasattr(ast, 'unparse') else str(dec) for dec in node.decorator_list]
+            base_classes=base_classes,
+            decorators=[sys.intern(_unparse(dec)) for dec in node.decorator_list]
         )
         
         return class_chunk, relationships + method_chunks
     
-    def _extract_method(self, node: ast.FunctionDef, file_path: str, content: str, class_name: str) -> Optional[Dict[str, Any]]:
+    def _extract_callable_metadata(self, node: ast.FunctionDef) -> Tuple[List[str], str, List[str], bool, Optional[str]]:
+        """Parameters, return type, decorators, async flag and docstring of a function or method"""
+        # These strings repeat heavily across a codebase ("self", "db: Session", "staticmethod"),
+        # so they are interned to share one object each (AST identifiers already are)
+        parameters = [
+            sys.intern(f"{arg.arg}: {_unparse(arg.annotation)}") if arg.annotation else arg.arg
+            for arg in node.args.args
+        ]
+        return_type = sys.intern(_unparse(node.returns)) if node.returns else ""
+        decorators = [sys.intern(_unparse(dec)) for dec in node.decorator_list]
+        return parameters, return_type, decorators, isinstance(node, ast.AsyncFunctionDef), self._extract_docstring(node)
+    
+    def _extract_method(self, node: ast.FunctionDef, file_path: str, lines: List[str], class_name: str) -> Optional[Chunk]:
         """Extract method implementation"""
-        # Get method source code
-        method_content = self._extract_source_code(node, content)
-        
-        # Parse parameters
-        parameters = []
-        for arg in node.args.args:
-            param = arg.arg
-            if arg.annotation:
-                param += f": {ast.unparse(arg.annotation) if hasattr(ast, 'unparse') else str(arg.annotation)}"
-            parameters.append(param)
-        
-        # Get return type
-        return_type = ""
-        if node.returns:
-            return_type = ast.unparse(node.returns) if hasattr(ast, 'unparse') else str(node.returns)
-        
-        # Determine access level
-        access = "private" if node.name.startswith('_') else "public"
-        
+        parameters, return_type, decorators, is_async, docstring = self._extract_callable_metadata(node)
         return create_chunk(
             chunk_type=ChunkType.METHOD,
             name=f"{class_name}.{node.name}",
-            content=method_content,
+            content=self._extract_source_code(node, lines),
             file_path=file_path,
-            purpose=self._extract_docstring(node) or f"Method {node.name}",
+            purpose=docstring or f"Method {node.name}",
             class_name=class_name,
             method_name=node.name,
             parameters=parameters,
             return_type=return_type,
-            access=access,
-            decorators=[ast.unparse(dec) if hasattr(ast, 'unparse') else str(dec) for dec in node.decorator_list],
-            is_async=isinstance(node, ast.AsyncFunctionDef)
+            access="private" if node.name.startswith('_') else "public",
+            decorators=decorators,
+            is_async=is_async
         )
     
-    def _extract_function(self, node: ast.FunctionDef, file_path: str, content: str) -> Optional[Dict[str, Any]]:
+    def _extract_function(self, node: ast.FunctionDef, file_path: str, lines: List[str]) -> Optional[Chunk]:
         """Extract standalone function"""
-        # Get function source code
-        function_content = self._extract_source_code(node, content)
-        
-        # Parse parameters
-        parameters = []
-        for arg in node.args.args:
-            param = arg.arg
-            if arg.annotation:
-                param += f": {ast.unparse(arg.annotation) if hasattr(ast, 'unparse') else str(arg.annotation)}"
-            parameters.append(param)
-        
-        # Get return type
-        return_type = ""
-        if node.returns:
-            return_type = ast.unparse(node.returns) if hasattr(ast, 'unparse') else str(node.returns)
-        
+        parameters, return_type, decorators, is_async, docstring = self._extract_callable_metadata(node)
         return create_chunk(
             chunk_type=ChunkType.FUNCTION,
             name=node.name,
-            content=function_content,
+            content=self._extract_source_code(node, lines),
             file_path=file_path,
-            purpose=self._extract_docstring(node) or f"Function {node.name}",
+            purpose=docstring or f"Function {node.name}",
             function_name=node.name,
             parameters=parameters,
             return_type=return_type,
-            decorators=[ast.unparse(dec) if hasattr(ast, 'unparse') else str(dec) for dec in node.decorator_list],
-            is_async=isinstance(node, ast.AsyncFunctionDef)
+            decorators=decorators,
+            is_async=is_async
         )
     
-    def _extract_main_block(self, tree: ast.AST, file_path: str, content: str) -> Optional[Dict[str, Any]]:
+    def _extract_main_block(self, node: ast.If, file_path: str, lines: List[str]) -> Chunk:
         """Extract main block (if __name__ == "__main__")"""
-        for node in ast.walk(tree):
-            if isinstance(node, ast.If):
-                if (isinstance(node.test, ast.Compare) and
-                    isinstance(node.test.left, ast.Name) and
-                    node.test.left.id == "__name__" and
-                    len(node.test.comparators) == 1 and
-                    isinstance(node.test.comparators[0], ast.Constant) and
-                    node.test.comparators[0].value == "__main__"):
-                    
-                    main_content = self._extract_source_code(node, content)
-                    calls = self._extract_function_calls(node)
-                    
-                    return create_chunk(
-                        chunk_type=ChunkType.MAIN_BLOCK,
-                        name="__main__",
-                        content=main_content,
-                        file_path=file_path,
-                        purpose="Entry point when run as script",
-                        calls=calls
-                    )
+        main_content = self._extract_source_code(node, lines)
+        calls = self._extract_function_calls(node)
         
-        return None
+        return create_chunk(
+            chunk_type=ChunkType.MAIN_BLOCK,
+            name="__main__",
+            content=main_content,
+            file_path=file_path,
+            purpose="Entry point when run as script",
+            calls=calls
+        )
     
-    def _extract_source_code(self, node: ast.AST, content: str) -> str:
-        """Extract source code for a node"""
+    def _extract_source_code(self, node: ast.AST, lines: List[str]) -> str:
+        """Extract source code for a node from the file's pre-split lines"""
         try:
-            # This is a simplified approach - in practice, you'd want more robust source extraction
-            lines = content.split('\n')
             start_line = node.lineno - 1
             end_line = node.end_lineno if hasattr(node, 'end_lineno') else start_line + 1
             
@@ -392,60 +582,53 @@ class CodeChunker:
     
     def _extract_docstring(self, node: ast.AST) -> Optional[str]:
         """Extract docstring from a node"""
-        if (isinstance(node, (ast.FunctionDef, ast.ClassDef, ast.AsyncFunctionDef)) and
-            node.body and
-            isinstance(node.body[0], ast.Expr) and
-            isinstance(node.body[0].value, ast.Constant) and
-            isinstance(node.body[0].value.value, str)):
-            return node.body[0].value.value.strip()
-        return None
-    
-    def _is_method(self, node: ast.FunctionDef) -> bool:
-        """Check if function is a method (inside a class)"""
-        for parent in ast.walk(node):
-            if isinstance(parent, ast.ClassDef):
-                for item in parent.body:
-                    if item == node:
-                        return True
-        return False
+        if not isinstance(node, (ast.FunctionDef, ast.ClassDef, ast.AsyncFunctionDef)):
+            return None
+        docstring = ast.get_docstring(node, clean=False)
+        return docstring.strip() if docstring is not None else None
     
     def _extract_function_calls(self, node: ast.AST) -> List[str]:
-        """Extract function calls from a node"""
-        calls = []
-        for child in ast.walk(node):
+        """Extract distinct function calls from a node, not counting calls inside nested defs/lambdas"""
+        calls: Dict[str, None] = {}  # insertion-ordered set
+        queue = deque([node])
+        while queue:
+            child = queue.popleft()
             if isinstance(child, ast.Call):
                 if isinstance(child.func, ast.Name):
-                    calls.append(child.func.id)
+                    calls.setdefault(child.func.id)
                 elif isinstance(child.func, ast.Attribute):
-                    calls.append(child.func.attr)
-        return calls
+                    calls.setdefault(child.func.attr)
+            elif child is not node and isinstance(child, _NESTED_SCOPES):
+                continue
+            queue.extend(ast.iter_child_nodes(child))
+        return list(calls)
     
     def _generate_package_chunks(self):
         """Generate package-level chunks for directories"""
         # Get all unique package paths
-        package_paths = set()
-        for chunk in self.chunks:
-            file_path = chunk['metadata']['file_path']
-            package_path = str(Path(file_path).parent)
-            if package_path != '.':
-                package_paths.add(package_path)
+        package_dirs = [os.path.dirname(chunk.metadata.file_path) or '.' for chunk in self.chunks]
+        members: Dict[str, List[Chunk]] = {path: [] for path in package_dirs if path != '.'}
+        
+        # Bucket every chunk under its directory and each enclosing package in one pass
+        ancestors_of: Dict[str, List[str]] = {}
+        for chunk, chunk_dir in zip(self.chunks, package_dirs):
+            targets = ancestors_of.get(chunk_dir)
+            if targets is None:
+                targets = ancestors_of[chunk_dir] = [
+                    path for path in (chunk_dir, *map(str, Path(chunk_dir).parents)) if path in members
+                ]
+            for path in targets:
+                members[path].append(chunk)
         
         # Create package chunks
-        for package_path in sorted(package_paths):
-            package_chunk = self._create_package_chunk(package_path)
+        for package_path in sorted(members):
+            package_chunk = self._create_package_chunk(package_path, members[package_path])
             if package_chunk:
                 self.chunks.append(package_chunk)
     
-    def _create_package_chunk(self, package_path: str) -> Optional[Dict[str, Any]]:
-        """Create a package chunk for a directory"""
-        # Find all files in this package
-        package_files = []
-        package_chunks = []
-        
-        for chunk in self.chunks:
-            if chunk['metadata']['file_path'].startswith(package_path):
-                package_files.append(chunk['metadata']['file_path'])
-                package_chunks.append(chunk)
+    def _create_package_chunk(self, package_path: str, package_chunks: List[Chunk]) -> Optional[Chunk]:
+        """Create a package chunk for a directory from the chunks it contains"""
+        package_files = [chunk.metadata.file_path for chunk in package_chunks]
         
         if not package_files:
             return None
@@ -456,18 +639,20 @@ class CodeChunker:
         features = self._extract_package_features(package_chunks)
         
         # Create package content
-        content = f"Package: {package_name}\n"
-        content += f"Purpose: {purpose}\n\n"
-        content += f"Contains {len(package_files)} files:\n"
+        parts = [
+            f"Package: {package_name}\n",
+            f"Purpose: {purpose}\n\n",
+            f"Contains {len(package_files)} files:\n",
+        ]
         
         for file_path in sorted(package_files):
-            filename = Path(file_path).name
-            content += f"- {filename}\n"
+            parts.append(f"- {os.path.basename(file_path)}\n")
         
         if features:
-            content += f"\nFeatures:\n"
+            parts.append("\nFeatures:\n")
             for feature in features:
-                content += f"- {feature}\n"
+                parts.append(f"- {feature}\n")
+        content = "".join(parts)
         
         return create_chunk(
             chunk_type=ChunkType.PACKAGE,
@@ -480,7 +665,7 @@ class CodeChunker:
             features=features
         )
     
-    def _determine_package_purpose(self, chunks: List[Dict[str, Any]]) -> str:
+    def _determine_package_purpose(self, chunks: List[Chunk]) -> str:
         """Determine package purpose from its chunks"""
         purposes = {
             'api': 'API endpoints and HTTP handling',
@@ -493,56 +678,44 @@ class CodeChunker:
         }
         
         for chunk in chunks:
-            file_path = chunk['metadata']['file_path']
+            file_path = chunk.metadata.file_path
             for key, purpose in purposes.items():
                 if key in file_path.lower():
                     return purpose
         
         return "Package functionality"
     
-    def _extract_package_features(self, chunks: List[Dict[str, Any]]) -> List[str]:
+    def _extract_package_features(self, chunks: List[Chunk]) -> List[str]:
         """Extract features from package chunks"""
         features = set()
         
         for chunk in chunks:
-            chunk_type = chunk['type']
+            chunk_type = chunk.type
             if chunk_type == 'class':
-                features.add(f"Classes: {chunk['name']}")
+                features.add(f"Classes: {chunk.name}")
             elif chunk_type == 'function':
-                features.add(f"Functions: {chunk['name']}")
+                features.add(f"Functions: {chunk.name}")
             elif chunk_type == 'method':
-                features.add(f"Methods: {chunk['name']}")
+                features.add(f"Methods: {chunk.name}")
         
         return list(features)
     
     def save_chunks(self, output_path: str):
         """Save chunks to JSON file"""
-        import json
-        
-        # Convert ChunkType enums to strings for JSON serialization
-        def convert_chunk_types(obj):
-            if isinstance(obj, dict):
-                return {k: convert_chunk_types(v) for k, v in obj.items()}
-            elif isinstance(obj, list):
-                return [convert_chunk_types(item) for item in obj]
-            elif hasattr(obj, 'value'):  # ChunkType enum
-                return obj.value
-            else:
-                return obj
-        
-        # Convert chunks and relationships
-        converted_chunks = convert_chunk_types(self.chunks)
-        converted_relationships = convert_chunk_types(self.relationships)
-        
         output_data = {
-            "chunks": converted_chunks,
-            "relationships": converted_relationships,
+            "chunks": self.chunks,
+            "relationships": self.relationships,
             "total_chunks": len(self.chunks),
             "total_relationships": len(self.relationships)
         }
         
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(output_data, f, indent=2, ensure_ascii=False)
+        # Chunks and ChunkType enums are serialized through the default hook, so no converted copy of the tree is built
+        if orjson is not None:
+            with open(output_path, 'wb') as f:
+                f.write(orjson.dumps(output_data, default=_json_default, option=orjson.OPT_INDENT_2 | orjson.OPT_PASSTHROUGH_DATACLASS))
+        else:
+            with open(output_path, 'w', encoding='utf-8') as f:
+                json.dump(output_data, f, indent=2, ensure_ascii=False, default=_json_default)
         
         print(f"Saved {len(self.chunks)} chunks and {len(self.relationships)} relationships to {output_path}")
     
@@ -555,7 +728,7 @@ class CodeChunker:
         # Count by type
         type_counts = {}
         for chunk in self.chunks:
-            chunk_type = chunk['type']
+            chunk_type = chunk.type
             type_counts[chunk_type] = type_counts.get(chunk_type, 0) + 1
         
         print(f"\nChunks by type:")
@@ -565,4 +738,4 @@ class CodeChunker:
         # Show some examples
         print(f"\nExample chunks:")
         for i, chunk in enumerate(self.chunks[:5]):
-            print(f"  {i+1}. {chunk['type']}: {chunk['name']} ({chunk['metadata']['file_path']})")
+            print(f"  {i+1}. {chunk.type}: {chunk.name} ({chunk.metadata.file_path})")
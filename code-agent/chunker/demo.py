@@ -15,9 +15,10 @@ from code_chunker import CodeChunker
 def main():
     """Demo the enhanced code chunker with LLM descriptions"""
     
-    # Initialize chunker with LLM descriptions enabled
+    # Initialize chunker with LLM descriptions enabled (--batch: via the OpenAI Batch API)
     codebase_path = "../code-base"
-    chunker = CodeChunker(codebase_path, generate_descriptions=True)
+    chunker = CodeChunker(codebase_path, generate_descriptions=True,
+                          offline_descriptions="--batch" in sys.argv[1:])
     
     print("🔍 Starting enhanced code chunking with LLM descriptions...")
     print(f"Codebase path: {codebase_path}")
@@ -48,53 +49,53 @@ def main():
     print(f"\n=== Enhanced Examples with LLM Descriptions ===")
     
     # Show package chunks with descriptions
-    package_chunks = [c for c in chunks if c['type'] == 'package']
+    package_chunks = [c for c in chunks if c.type == 'package']
     if package_chunks:
         print(f"\n📁 Package Chunks with Descriptions ({len(package_chunks)}):")
         for chunk in package_chunks[:2]:
-            print(f"\n{chunk['name']}:")
-            print(f"  Purpose: {chunk['metadata']['purpose']}")
-            print(f"  Files: {chunk['metadata']['file_count']}")
-            print(f"  Description: {chunk.get('description', 'No description')[:150]}...")
+            print(f"\n{chunk.name}:")
+            print(f"  Purpose: {chunk.metadata.purpose}")
+            print(f"  Files: {chunk.metadata.file_count}")
+            print(f"  Description: {(chunk.description or 'No description')[:150]}...")
     
     # Show class chunks with descriptions
-    class_chunks = [c for c in chunks if c['type'] == 'class']
+    class_chunks = [c for c in chunks if c.type == 'class']
     if class_chunks:
         print(f"\n🏗️  Class Chunks with Descriptions ({len(class_chunks)}):")
         for chunk in class_chunks[:3]:
-            print(f"\n{chunk['name']}:")
-            print(f"  Purpose: {chunk['metadata']['purpose']}")
-            print(f"  Methods: {len(chunk['metadata']['methods'])}")
-            print(f"  Description: {chunk.get('description', 'No description')[:150]}...")
+            print(f"\n{chunk.name}:")
+            print(f"  Purpose: {chunk.metadata.purpose}")
+            print(f"  Methods: {len(chunk.metadata.methods)}")
+            print(f"  Description: {(chunk.description or 'No description')[:150]}...")
     
     # Show method chunks with descriptions
-    method_chunks = [c for c in chunks if c['type'] == 'method']
+    method_chunks = [c for c in chunks if c.type == 'method']
     if method_chunks:
         print(f"\n⚙️  Method Chunks with Descriptions ({len(method_chunks)}):")
         for chunk in method_chunks[:3]:
-            print(f"\n{chunk['name']}:")
-            print(f"  Purpose: {chunk['metadata']['purpose']}")
-            print(f"  Parameters: {len(chunk['metadata']['parameters'])}")
-            print(f"  Description: {chunk.get('description', 'No description')[:150]}...")
+            print(f"\n{chunk.name}:")
+            print(f"  Purpose: {chunk.metadata.purpose}")
+            print(f"  Parameters: {len(chunk.metadata.parameters)}")
+            print(f"  Description: {(chunk.description or 'No description')[:150]}...")
     
     # Show function chunks with descriptions
-    function_chunks = [c for c in chunks if c['type'] == 'function']
+    function_chunks = [c for c in chunks if c.type == 'function']
     if function_chunks:
         print(f"\n🔧 Function Chunks with Descriptions ({len(function_chunks)}):")
         for chunk in function_chunks[:3]:
-            print(f"\n{chunk['name']}:")
-            print(f"  Purpose: {chunk['metadata']['purpose']}")
-            print(f"  Description: {chunk.get('description', 'No description')[:150]}...")
+            print(f"\n{chunk.name}:")
+            print(f"  Purpose: {chunk.metadata.purpose}")
+            print(f"  Description: {(chunk.description or 'No description')[:150]}...")
     
     # Show chunk structure with description
     print(f"\n=== Enhanced Chunk Structure Example ===")
     if chunks:
         example_chunk = chunks[0]
-        print(f"Chunk type: {example_chunk['type']}")
-        print(f"Name: {example_chunk['name']}")
-        print(f"Description: {example_chunk.get('description', 'No description')}")
-        print(f"Content preview: {example_chunk['content'][:100]}...")
-        print(f"Metadata keys: {list(example_chunk['metadata'].keys())}")
+        print(f"Chunk type: {example_chunk.type}")
+        print(f"Name: {example_chunk.name}")
+        print(f"Description: {example_chunk.description or 'No description'}")
+        print(f"Content preview: {example_chunk.content[:100]}...")
+        print(f"Metadata keys: {list(example_chunk.to_dict()['metadata'].keys())}")
     
     # Query examples
     print(f"\n=== Enhanced Query Examples ===")
@@ -0,0 +1,128 @@
+"""
+Persistent cache of LLM chunk descriptions
+Keyed by a SHA-256 of the model and the chunk, so unchanged chunks are never re-described.
+With datasketch installed, a MinHash LSH index also matches chunks whose content only
+changed trivially (whitespace, a renamed local, a typo) to an existing description.
+"""
+
+import hashlib
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+try:
+    from datasketch import LeanMinHash, MinHash, MinHashLSH  # optional, enables near-duplicate lookups
+except ImportError:
+    MinHash = None
+
+try:
+    from .chunk_types import Chunk
+except ImportError:
+    from chunk_types import Chunk
+
+
+# MinHash permutations and the Jaccard similarity above which a description is reused
+NUM_PERM = 128
+FUZZY_THRESHOLD = 0.95
+
+
+def description_key(model: str, chunk: Chunk) -> str:
+    """SHA-256 over everything that determines a chunk's description"""
+    return hashlib.sha256(f"{model}|{chunk.type}|{chunk.name}|{chunk.content}".encode('utf-8')).hexdigest()
+
+
+def _scope_key(model: str, chunk: Chunk) -> str:
+    """Fuzzy matches are only allowed between chunks of the same model, type and name"""
+    return hashlib.sha256(f"{model}|{chunk.type}|{chunk.name}".encode('utf-8')).hexdigest()
+
+
+def _minhash(content: str) -> "LeanMinHash":
+    m = MinHash(num_perm=NUM_PERM)
+    m.update_batch([token.encode('utf-8') for token in set(content.split())])
+    return LeanMinHash(m)
+
+
+class DescriptionCache:
+    """SQLite-backed description store with an in-process dict in front of it"""
+
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS descriptions ("
+            "hash TEXT PRIMARY KEY, description TEXT NOT NULL, model TEXT NOT NULL, created_at INTEGER NOT NULL, "
+            "scope TEXT, minhash BLOB)"
+        )
+        # Databases written before the fuzzy layer lack its columns
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(descriptions)")}
+        for column, sql_type in (("scope", "TEXT"), ("minhash", "BLOB")):
+            if column not in columns:
+                self.conn.execute(f"ALTER TABLE descriptions ADD COLUMN {column} {sql_type}")
+        self.conn.commit()
+        self._memory: Dict[str, str] = {}
+        self._signatures: Dict[str, Tuple[str, "LeanMinHash"]] = {}
+        self._lsh = MinHashLSH(threshold=FUZZY_THRESHOLD, num_perm=NUM_PERM) if MinHash is not None else None
+        if self._lsh is not None:
+            self._load_signatures()
+
+    def _load_signatures(self) -> None:
+        rows = self.conn.execute("SELECT hash, scope, minhash FROM descriptions WHERE minhash IS NOT NULL")
+        for key, scope, blob in rows:
+            try:
+                signature = LeanMinHash.deserialize(blob)
+            except Exception:
+                continue
+            self._signatures[key] = (scope, signature)
+            self._lsh.insert(key, signature)
+
+    def get(self, key: str) -> Optional[str]:
+        description = self._memory.get(key)
+        if description is None:
+            row = self.conn.execute("SELECT description FROM descriptions WHERE hash = ?", (key,)).fetchone()
+            if row is not None:
+                description = self._memory[key] = row[0]
+        return description
+
+    def get_similar(self, model: str, chunk: Chunk) -> Optional[str]:
+        """Description of the most similar cached chunk with the same scope, if it is above the threshold"""
+        if self._lsh is None or not self._signatures:
+            return None
+        scope = _scope_key(model, chunk)
+        signature = _minhash(chunk.content)
+        best_key, best_score = None, FUZZY_THRESHOLD
+        # LSH candidates are approximate, so each one is verified against the threshold
+        for key in self._lsh.query(signature):
+            candidate_scope, candidate = self._signatures[key]
+            if candidate_scope != scope:
+                continue
+            score = signature.jaccard(candidate)
+            if score >= best_score:
+                best_key, best_score = key, score
+        return self.get(best_key) if best_key is not None else None
+
+    def put(self, key: str, description: str, model: str, chunk: Optional[Chunk] = None) -> None:
+        self._memory[key] = description
+        scope = blob = None
+        if self._lsh is not None and chunk is not None:
+            entry = self._signatures.get(key)
+            if entry is None:
+                entry = self._signatures[key] = (_scope_key(model, chunk), _minhash(chunk.content))
+                self._lsh.insert(key, entry[1])
+            scope, signature = entry
+            buf = bytearray(signature.bytesize())
+            signature.serialize(buf)
+            blob = bytes(buf)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO descriptions (hash, description, model, created_at, scope, minhash) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (key, description, model, int(time.time()), scope, blob)
+        )
+
+    def commit(self) -> None:
+        """Flush pending puts to disk; callers commit once per batch rather than per row"""
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.commit()
+        self.conn.close()
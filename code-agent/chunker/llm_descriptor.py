@@ -3,55 +3,57 @@ LLM Description Generator for Code Chunks
 Generates rich, searchable descriptions for better vector search
 """
 
+import httpx
 import openai
 import os
+import json
+import random
+import asyncio
 from typing import Dict, Any, Optional
 from dotenv import load_dotenv
 
+try:
+    from .chunk_types import Chunk
+    from .description_cache import DescriptionCache, description_key
+    from .rate_limiter import RateLimiter, TokenCounter
+except ImportError:
+    from chunk_types import Chunk
+    from description_cache import DescriptionCache, description_key
+    from rate_limiter import RateLimiter, TokenCounter
+
 # Load environment variables
 load_dotenv()
 
+# Transient API failures worth retrying (APITimeoutError is an APIConnectionError)
+_RETRYABLE_ERRORS = (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)
+
+
+class _RetryBudget:
+    """Retries shared by related requests, so a packed call and its per-chunk fallback cannot multiply them"""
+    
+    def __init__(self, retries: int):
+        self.retries = retries
+    
+    def take(self) -> bool:
+        if self.retries <= 0:
+            return False
+        self.retries -= 1
+        return True
+
 class LLMDescriptor:
     """Generates LLM descriptions for code chunks"""
     
-    def __init__(self, api_key: Optional[str] = None):
-        self.client = openai.OpenAI(
-            api_key=api_key or os.getenv("OPENAI_API_KEY")
-        )
-        self.model = "gpt-4o-mini"  # Cost-effective model for descriptions
+    # Identical for every request, so built once
+    _SYSTEM_MESSAGE = {"role": "system", "content": "You are an expert code analyst. Write clear, concise descriptions of code that are optimized for semantic search and vector retrieval."}
     
-    def generate_chunk_description(self, chunk: Dict[str, Any]) -> str:
-        """Generate LLM description for a code chunk"""
-        try:
-            prompt = self._build_prompt(chunk)
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an expert code analyst. Write clear, concise descriptions of code that are optimized for semantic search and vector retrieval."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=200,
-                temperature=0.3
-            )
-            return response.choices[0].message.content.strip()
-        except Exception as e:
-            print(f"Error generating description for {chunk['name']}: {e}")
-            return self._fallback_description(chunk)
-    
-    def _build_prompt(self, chunk: Dict[str, Any]) -> str:
-        """Build prompt for LLM based on chunk type"""
-        chunk_type = chunk['type']
-        name = chunk['name']
-        content = chunk['content'][:800]  # Limit content length
-        metadata = chunk.get('metadata', {})
-        
-        if chunk_type == 'package':
-            return f"""
+    # Per-type prompt templates, formatted by _build_prompt
+    _TEMPLATES = {
+        "package": """
             Analyze this Python package and write a searchable description:
             
             Package: {name}
-            Purpose: {metadata.get('purpose', 'Unknown')}
-            Files: {metadata.get('file_count', 0)} files
+            Purpose: {purpose}
+            Files: {file_count} files
             Content: {content}
             
             Write a description that explains:
@@ -61,15 +63,13 @@ class LLMDescriptor:
             - How it fits into the overall architecture
             
             Keep it concise but informative for vector search.
-            """
-        
-        elif chunk_type == 'class':
-            return f"""
+            """,
+        "class": """
             Analyze this Python class and write a searchable description:
             
             Class: {name}
-            Purpose: {metadata.get('purpose', 'Unknown')}
-            Methods: {len(metadata.get('methods', []))} methods
+            Purpose: {purpose}
+            Methods: {method_count} methods
             Content: {content}
             
             Write a description that explains:
@@ -79,16 +79,14 @@ class LLMDescriptor:
             - How it fits into the system
             
             Keep it concise but informative for vector search.
-            """
-        
-        elif chunk_type == 'method':
-            return f"""
+            """,
+        "method": """
             Analyze this Python method and write a searchable description:
             
             Method: {name}
-            Class: {metadata.get('class_name', 'Unknown')}
-            Purpose: {metadata.get('purpose', 'Unknown')}
-            Parameters: {metadata.get('parameters', [])}
+            Class: {class_name}
+            Purpose: {purpose}
+            Parameters: {parameters}
             Content: {content}
             
             Write a description that explains:
@@ -99,15 +97,13 @@ class LLMDescriptor:
             - What problems it solves
             
             Keep it concise but informative for vector search.
-            """
-        
-        elif chunk_type == 'function':
-            return f"""
+            """,
+        "function": """
             Analyze this Python function and write a searchable description:
             
             Function: {name}
-            Purpose: {metadata.get('purpose', 'Unknown')}
-            Parameters: {metadata.get('parameters', [])}
+            Purpose: {purpose}
+            Parameters: {parameters}
             Content: {content}
             
             Write a description that explains:
@@ -118,14 +114,12 @@ class LLMDescriptor:
             - What problems it solves
             
             Keep it concise but informative for vector search.
-            """
-        
-        elif chunk_type == 'imports':
-            return f"""
+            """,
+        "imports": """
             Analyze these Python imports and write a searchable description:
             
             Module: {name}
-            Purpose: {metadata.get('purpose', 'Unknown')}
+            Purpose: {purpose}
             Content: {content}
             
             Write a description that explains:
@@ -135,26 +129,150 @@ class LLMDescriptor:
             - What external libraries it uses
             
             Keep it concise but informative for vector search.
-            """
-        
-        else:
-            return f"""
+            """,
+    }
+    _DEFAULT_TEMPLATE = """
             Analyze this code chunk and write a searchable description:
             
             Type: {chunk_type}
             Name: {name}
-            Purpose: {metadata.get('purpose', 'Unknown')}
+            Purpose: {purpose}
             Content: {content}
             
             Write a description that explains what this code does and when it would be used.
             Keep it concise but informative for vector search.
             """
     
-    def _fallback_description(self, chunk: Dict[str, Any]) -> str:
+    def __init__(self, api_key: Optional[str] = None,
+                 cache_path: Optional[str] = ".chunk_cache/descriptions.sqlite",
+                 requests_per_minute: float = 500, tokens_per_minute: float = 200_000,
+                 max_connections: int = 100):
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.model = "gpt-4o-mini"  # Cost-effective model for descriptions
+        # Live requests are paced to the account's limits up front rather than retried after a 429
+        self.limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        self.token_counter = TokenCounter(self.model)
+        self.max_connections = max_connections
+        # Descriptions of unchanged chunks are reused across runs; None disables the cache
+        self.cache = DescriptionCache(cache_path) if cache_path else None
+        self._client: Optional[openai.AsyncOpenAI] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    @property
+    def client(self) -> openai.AsyncOpenAI:
+        """Async client shared by every request on the running event loop"""
+        # Its connection pool is bound to one loop, so each asyncio.run() gets a fresh client;
+        # the synchronous wrappers close it with aclose() before their loop ends
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            # Retries are done (and rate limited) by _create_completion instead of the SDK
+            # Keep-alive connections are reused across requests, capped at max_connections
+            limits = httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections)
+            self._client = openai.AsyncOpenAI(
+                api_key=self.api_key,
+                max_retries=0,
+                http_client=openai.DefaultAsyncHttpxClient(limits=limits)
+            )
+            self._client_loop = loop
+        return self._client
+    
+    async def aclose(self) -> None:
+        """Close the async client and its connection pool; the next request opens a new one"""
+        client, self._client, self._client_loop = self._client, None, None
+        if client is not None:
+            await client.close()
+    
+    async def __aenter__(self) -> "LLMDescriptor":
+        return self
+    
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+    
+    def _cached_description(self, chunk: Chunk) -> Optional[str]:
+        """Cached description for chunk, exact or near-duplicate; None on a miss or with no cache"""
+        if self.cache is None:
+            return None
+        key = description_key(self.model, chunk)
+        cached = self.cache.get(key)
+        if cached is None:
+            # A trivially edited chunk (whitespace, comments, a typo) keeps its old description
+            cached = self.cache.get_similar(self.model, chunk)
+            if cached is not None:
+                self.cache.put(key, cached, self.model, chunk)
+        return cached
+    
+    def _store_description(self, chunk: Chunk, description: str) -> None:
+        if self.cache is not None:
+            self.cache.put(description_key(self.model, chunk), description, self.model, chunk)
+    
+    def _request_body(self, chunk: Chunk) -> Dict[str, Any]:
+        """Chat-completion parameters for describing chunk, shared by live and Batch API requests"""
+        return {
+            "model": self.model,
+            "messages": [
+                self._SYSTEM_MESSAGE,
+                {"role": "user", "content": self._build_prompt(chunk)}
+            ],
+            "max_tokens": 200,
+            "temperature": 0.3
+        }
+    
+    async def _create_completion(self, body: Dict[str, Any], max_attempts: int = 4,
+                                 budget: Optional[_RetryBudget] = None, **kwargs: Any) -> Any:
+        """chat.completions.create, after waiting for the request's share of the RPM/TPM budget
+        
+        Rate limits, connection errors, timeouts and 5xx responses are retried up to
+        max_attempts times with jittered exponential backoff (1-30s), or while a shared
+        budget has retries left when one is given.
+        """
+        tokens = sum(self.token_counter.count(m["content"]) for m in body["messages"]) + body["max_tokens"]
+        budget = budget or _RetryBudget(max_attempts - 1)
+        attempt = 1
+        while True:
+            await self.limiter.acquire(tokens)
+            try:
+                return await self.client.chat.completions.create(**body, timeout=30, **kwargs)
+            except _RETRYABLE_ERRORS:
+                if not budget.take():
+                    raise
+                await asyncio.sleep(random.uniform(1, min(30, 2 ** attempt)))
+                attempt += 1
+    
+    async def generate_chunk_description(self, chunk: Chunk, budget: Optional[_RetryBudget] = None) -> str:
+        """Generate LLM description for a code chunk, reusing a cached one when the chunk is unchanged"""
+        cached = self._cached_description(chunk)
+        if cached is not None:
+            return cached
+        try:
+            response = await self._create_completion(self._request_body(chunk), budget=budget)
+            description = response.choices[0].message.content.strip()
+        except Exception as e:
+            print(f"Error generating description for {chunk.name}: {e}")
+            # Fallbacks are not cached so the next run retries the LLM
+            return self._fallback_description(chunk)
+        self._store_description(chunk, description)
+        return description
+    
+    def _build_prompt(self, chunk: Chunk) -> str:
+        """Build prompt for LLM based on chunk type"""
+        metadata = chunk.metadata
+        template = self._TEMPLATES.get(chunk.type, self._DEFAULT_TEMPLATE)
+        return template.format(
+            chunk_type=chunk.type,
+            name=chunk.name,
+            content=chunk.content[:800],  # Limit content length
+            purpose=metadata.purpose or 'Unknown',
+            file_count=getattr(metadata, 'file_count', 0),
+            method_count=len(getattr(metadata, 'methods', [])),
+            class_name=getattr(metadata, 'class_name', 'Unknown'),
+            parameters=getattr(metadata, 'parameters', []),
+        )
+    
+    def _fallback_description(self, chunk: Chunk) -> str:
         """Generate fallback description when LLM fails"""
-        chunk_type = chunk['type']
-        name = chunk['name']
-        purpose = chunk.get('metadata', {}).get('purpose', 'Unknown')
+        chunk_type = chunk.type
+        name = chunk.name
+        purpose = chunk.metadata.purpose or 'Unknown'
         
         if chunk_type == 'package':
             return f"Package {name}: {purpose}"
@@ -169,17 +287,145 @@ class LLMDescriptor:
         else:
             return f"{chunk_type.title()} {name}: {purpose}"
     
-    def batch_generate_descriptions(self, chunks: list[Dict[str, Any]], batch_size: int = 10) -> list[Dict[str, Any]]:
-        """Generate descriptions for multiple chunks in batches"""
-        enhanced_chunks = []
+    def batch_generate_descriptions(self, chunks: list[Chunk], batch_size: int = 10,
+                                    max_concurrency: int = 32, pack_size: int = 5) -> list[Chunk]:
+        """Synchronous wrapper around abatch_generate_descriptions"""
+        async def run() -> list[Chunk]:
+            # The client is closed before asyncio.run() tears down its loop
+            async with self:
+                return await self.abatch_generate_descriptions(chunks, batch_size, max_concurrency, pack_size)
+        return asyncio.run(run())
+    
+    async def abatch_generate_descriptions(self, chunks: list[Chunk], batch_size: int = 10,
+                                           max_concurrency: int = 32, pack_size: int = 5) -> list[Chunk]:
+        """Generate descriptions for multiple chunks, with up to max_concurrency requests in flight
         
-        for i in range(0, len(chunks), batch_size):
-            batch = chunks[i:i + batch_size]
-            print(f"Processing batch {i//batch_size + 1}/{(len(chunks) + batch_size - 1)//batch_size}")
-            
-            for chunk in batch:
-                description = self.generate_chunk_description(chunk)
-                chunk['description'] = description
-                enhanced_chunks.append(chunk)
+        Uncached chunks are described pack_size at a time in a single request, so a run
+        limited by requests per minute makes pack_size times fewer requests.
+        """
+        # Submit same-type chunks back to back so consecutive prompts share their template prefix
+        order = sorted(range(len(chunks)), key=lambda i: chunks[i].type)
+        total_batches = (len(chunks) + batch_size - 1) // batch_size
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        misses = []
+        for i in order:
+            cached = self._cached_description(chunks[i])
+            if cached is not None:
+                chunks[i].description = cached
+            else:
+                misses.append(chunks[i])
+        # Near-duplicate hits were stored under their own key above; commit them now, since
+        # describe() only commits when there are misses
+        if self.cache is not None:
+            self.cache.commit()
+        done = len(chunks) - len(misses)
+        
+        async def describe(group: list[Chunk]) -> None:
+            nonlocal done
+            # One retry budget per group, whether it is described packed, per chunk, or both
+            budget = _RetryBudget(3)
+            async with semaphore:
+                descriptions = await self._generate_batch_in_one_call(group, budget) if len(group) > 1 else None
+            if descriptions is None:
+                # Single chunk, or the packed reply was unusable: one request per chunk
+                descriptions = await asyncio.gather(*(self._describe_limited(c, semaphore, budget) for c in group))
+            for chunk, description in zip(group, descriptions):
+                chunk.description = description
+            before, done = done, done + len(group)
+            if done // batch_size > before // batch_size or done == len(chunks):
+                print(f"Processing batch {(done + batch_size - 1)//batch_size}/{total_batches}")
+                if self.cache is not None:
+                    self.cache.commit()
+        
+        pack_size = max(1, pack_size)
+        await asyncio.gather(*(describe(misses[k:k + pack_size]) for k in range(0, len(misses), pack_size)))
+        return list(chunks)
+    
+    async def _describe_limited(self, chunk: Chunk, semaphore: asyncio.Semaphore, budget: _RetryBudget) -> str:
+        async with semaphore:
+            return await self.generate_chunk_description(chunk, budget)
+    
+    async def _generate_batch_in_one_call(self, chunks: list[Chunk], budget: Optional[_RetryBudget] = None) -> Optional[list[str]]:
+        """Describe several chunks with one chat completion; None if the reply cannot be mapped back"""
+        sections = "\n\n".join(f"[{n}]\n{self._build_prompt(chunk)}" for n, chunk in enumerate(chunks, 1))
+        prompt = (
+            f"Write a searchable description for each of the following {len(chunks)} code chunks.\n"
+            f'Return a JSON object {{"descriptions": [...]}} holding exactly {len(chunks)} strings, '
+            f"the description of chunk [n] at position n.\n\n{sections}"
+        )
+        body = self._request_body(chunks[0])
+        body["messages"][1]["content"] = prompt
+        body["max_tokens"] *= len(chunks)
+        try:
+            response = await self._create_completion(body, budget=budget, response_format={"type": "json_object"})
+            descriptions = json.loads(response.choices[0].message.content)["descriptions"]
+        except Exception as e:
+            print(f"Error generating packed descriptions for {len(chunks)} chunks: {e}")
+            return None
+        if not isinstance(descriptions, list) or len(descriptions) != len(chunks) \
+                or not all(isinstance(d, str) and d.strip() for d in descriptions):
+            return None
+        descriptions = [d.strip() for d in descriptions]
+        for chunk, description in zip(chunks, descriptions):
+            self._store_description(chunk, description)
+        return descriptions
+    
+    def batch_generate_descriptions_offline(self, chunks: list[Chunk], poll_interval: float = 60.0) -> list[Chunk]:
+        """Synchronous wrapper around abatch_generate_descriptions_offline"""
+        async def run() -> list[Chunk]:
+            async with self:
+                return await self.abatch_generate_descriptions_offline(chunks, poll_interval)
+        return asyncio.run(run())
+    
+    async def abatch_generate_descriptions_offline(self, chunks: list[Chunk], poll_interval: float = 60.0) -> list[Chunk]:
+        """Describe chunks through the OpenAI Batch API: half the price of live calls, results within 24h"""
+        # Only chunks without a cached description are submitted; custom_id is the chunk's index
+        pending: Dict[str, Chunk] = {}
+        for i, chunk in enumerate(chunks):
+            cached = self._cached_description(chunk)
+            if cached is not None:
+                chunk.description = cached
+            else:
+                pending[str(i)] = chunk
+        if not pending:
+            return list(chunks)
+        
+        requests = "".join(
+            json.dumps({"custom_id": custom_id, "method": "POST", "url": "/v1/chat/completions",
+                        "body": self._request_body(chunk)}) + "\n"
+            for custom_id, chunk in pending.items()
+        )
+        try:
+            input_file = await self.client.files.create(
+                file=("chunk_descriptions.jsonl", requests.encode('utf-8')), purpose="batch"
+            )
+            batch = await self.client.batches.create(
+                input_file_id=input_file.id, endpoint="/v1/chat/completions", completion_window="24h"
+            )
+            print(f"Submitted batch {batch.id} with {len(pending)} chunks")
+            while batch.status not in ("completed", "failed", "expired", "cancelled"):
+                await asyncio.sleep(poll_interval)
+                batch = await self.client.batches.retrieve(batch.id)
+                print(f"Batch {batch.id}: {batch.status}")
+            
+            if batch.output_file_id:
+                output = await self.client.files.content(batch.output_file_id)
+                for line in output.text.splitlines():
+                    result = json.loads(line)
+                    response = result.get("response") or {}
+                    chunk = pending.get(result["custom_id"])
+                    if chunk is None or response.get("status_code") != 200:
+                        continue
+                    chunk.description = response["body"]["choices"][0]["message"]["content"].strip()
+                    self._store_description(chunk, chunk.description)
+                    del pending[result["custom_id"]]
+        except Exception as e:
+            print(f"Error running description batch: {e}")
         
-        return enhanced_chunks
+        # Chunks the batch failed or never returned fall back like failed live calls
+        for chunk in pending.values():
+            chunk.description = self._fallback_description(chunk)
+        if self.cache is not None:
+            self.cache.commit()
+        return list(chunks)
@@ -0,0 +1,72 @@
+"""
+Client-side request/token rate limiting for the OpenAI API
+Requests wait here until they fit the configured RPM and TPM budgets, instead of being
+sent early and retried after a 429.
+"""
+
+import asyncio
+import time
+from typing import Optional
+
+try:
+    import tiktoken  # optional, exact token counts
+except ImportError:
+    tiktoken = None
+
+
+class TokenCounter:
+    """Counts prompt tokens with tiktoken, or estimates ~4 characters per token without it"""
+
+    def __init__(self, model: str):
+        self.encoding = None
+        if tiktoken is not None:
+            try:
+                self.encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                self.encoding = tiktoken.get_encoding("o200k_base")
+
+    def count(self, text: str) -> int:
+        if self.encoding is None:
+            return len(text) // 4 + 1
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+
+class RateLimiter:
+    """Two token buckets (requests and tokens) refilled continuously at rpm/60 and tpm/60 per second"""
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests = float(requests_per_minute)
+        self._tokens = float(tokens_per_minute)
+        self._updated = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed, self._updated = now - self._updated, now
+        self._requests = min(self.requests_per_minute, self._requests + elapsed * self.requests_per_minute / 60)
+        self._tokens = min(self.tokens_per_minute, self._tokens + elapsed * self.tokens_per_minute / 60)
+
+    async def acquire(self, tokens: int) -> None:
+        """Wait until one request of the given token cost fits both budgets, then spend it"""
+        # asyncio.Lock is bound to one event loop, so a new asyncio.run() gets a new lock
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock, self._lock_loop = asyncio.Lock(), loop
+        # A request larger than the whole bucket would otherwise wait forever
+        tokens = min(tokens, self.tokens_per_minute)
+        # Held while sleeping, so requests are admitted in arrival order
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._requests >= 1 and self._tokens >= tokens:
+                    self._requests -= 1
+                    self._tokens -= tokens
+                    return
+                wait = max(
+                    (1 - self._requests) * 60 / self.requests_per_minute,
+                    (tokens - self._tokens) * 60 / self.tokens_per_minute,
+                )
+                await asyncio.sleep(max(wait, 0.01))
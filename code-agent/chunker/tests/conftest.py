@@ -0,0 +1,8 @@
+"""
+Shared setup for the chunker tests
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
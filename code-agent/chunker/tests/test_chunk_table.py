@@ -0,0 +1,40 @@
+"""
+ChunkTable tests
+"""
+
+from chunk_types import ChunkTable, ChunkType, create_chunk
+
+
+def make_chunks():
+    return [
+        create_chunk(ChunkType.CLASS, "User", "class User: ...", "app/models/user.py", "User model", class_name="User"),
+        create_chunk(ChunkType.FUNCTION, "get_db", "def get_db(): ...", "app/core/database.py", "DB session", function_name="get_db"),
+        create_chunk(ChunkType.CLASS, "Order", "class Order: ...", "app/models/order.py", "Order model", class_name="Order"),
+    ]
+
+
+def test_from_chunks_columns():
+    """Test each chunk becomes one row across the parallel columns"""
+    table = ChunkTable.from_chunks(make_chunks())
+
+    assert len(table) == 3
+    assert table.names == ["User", "get_db", "Order"]
+    assert table.file_paths[1] == "app/core/database.py"
+
+
+def test_indices_of():
+    """Test rows are selected by chunk type"""
+    table = ChunkTable.from_chunks(make_chunks())
+
+    assert table.indices_of(ChunkType.CLASS) == [0, 2]
+    assert table.indices_of(ChunkType.METHOD) == []
+
+
+def test_row_round_trip():
+    """Test a row rebuilds the original chunk"""
+    chunks = make_chunks()
+    chunks[1].description = "Yields a database session"
+    table = ChunkTable.from_chunks(chunks)
+
+    for i, chunk in enumerate(chunks):
+        assert table.row(i).to_dict() == chunk.to_dict()
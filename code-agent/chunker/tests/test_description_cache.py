@@ -0,0 +1,68 @@
+"""
+Description cache tests
+"""
+
+import pytest
+
+import description_cache
+from chunk_types import ChunkType, create_chunk
+from description_cache import DescriptionCache, description_key
+
+
+MODEL = "gpt-4o-mini"
+
+
+def make_chunk(content="def get_db():\n    db = SessionLocal()\n    try:\n        yield db\n    finally:\n        db.close()"):
+    return create_chunk(ChunkType.FUNCTION, "get_db", content, "app/core/database.py", "DB session")
+
+
+def test_key_depends_on_model_and_content():
+    """Test the key changes with the model or the chunk content"""
+    chunk = make_chunk()
+
+    assert description_key(MODEL, chunk) == description_key(MODEL, make_chunk())
+    assert description_key(MODEL, chunk) != description_key("gpt-4o", chunk)
+    assert description_key(MODEL, chunk) != description_key(MODEL, make_chunk("def get_db(): pass"))
+
+
+def test_put_and_get(tmp_path):
+    """Test a stored description is returned for its key"""
+    cache = DescriptionCache(str(tmp_path / "descriptions.db"))
+    key = description_key(MODEL, make_chunk())
+    cache.put(key, "Yields a database session", MODEL, make_chunk())
+
+    assert cache.get(key) == "Yields a database session"
+    assert cache.get("missing") is None
+    cache.close()
+
+
+def test_persisted_across_instances(tmp_path):
+    """Test committed descriptions survive reopening the database"""
+    path = str(tmp_path / "descriptions.db")
+    key = description_key(MODEL, make_chunk())
+    cache = DescriptionCache(path)
+    cache.put(key, "Yields a database session", MODEL, make_chunk())
+    cache.close()
+
+    assert DescriptionCache(path).get(key) == "Yields a database session"
+
+
+def test_similar_without_datasketch(tmp_path, monkeypatch):
+    """Test fuzzy lookups are disabled when datasketch is missing"""
+    monkeypatch.setattr(description_cache, "MinHash", None)
+    cache = DescriptionCache(str(tmp_path / "descriptions.db"))
+    cache.put(description_key(MODEL, make_chunk()), "Yields a database session", MODEL, make_chunk())
+
+    assert cache.get_similar(MODEL, make_chunk()) is None
+
+
+@pytest.mark.skipif(description_cache.MinHash is None, reason="datasketch not installed")
+def test_similar_matches_trivial_change(tmp_path):
+    """Test a whitespace-only change reuses the description, a new name does not"""
+    cache = DescriptionCache(str(tmp_path / "descriptions.db"))
+    cache.put(description_key(MODEL, make_chunk()), "Yields a database session", MODEL, make_chunk())
+    reformatted = make_chunk("def get_db():\n  db = SessionLocal()\n  try:\n    yield db\n  finally:\n    db.close()\n")
+    renamed = create_chunk(ChunkType.FUNCTION, "get_session", reformatted.content, "app/core/database.py", "DB session")
+
+    assert cache.get_similar(MODEL, reformatted) == "Yields a database session"
+    assert cache.get_similar(MODEL, renamed) is None
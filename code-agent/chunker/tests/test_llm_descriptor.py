@@ -0,0 +1,92 @@
+"""
+LLM descriptor tests
+"""
+
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+import description_cache
+import llm_descriptor
+from chunk_types import ChunkType, create_chunk
+from description_cache import DescriptionCache, description_key
+from llm_descriptor import LLMDescriptor
+
+
+class FakeAsyncOpenAI:
+    """Stands in for openai.AsyncOpenAI; every completion fails with a connection error"""
+    
+    instances = []
+    
+    def __init__(self, http_client=None, **kwargs):
+        self.http_client = http_client
+        self.calls = 0
+        self.closed = False
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+        FakeAsyncOpenAI.instances.append(self)
+    
+    async def create(self, **kwargs):
+        self.calls += 1
+        raise llm_descriptor.openai.APIConnectionError(request=httpx.Request("POST", "https://api.openai.com/v1"))
+    
+    async def close(self):
+        self.closed = True
+        if self.http_client is not None:
+            await self.http_client.aclose()
+
+
+@pytest.fixture
+def descriptor(monkeypatch):
+    FakeAsyncOpenAI.instances = []
+    monkeypatch.setattr(llm_descriptor.openai, "AsyncOpenAI", FakeAsyncOpenAI)
+    # No backoff between retries
+    monkeypatch.setattr(llm_descriptor.random, "uniform", lambda a, b: 0)
+    return LLMDescriptor(api_key="test", cache_path=None)
+
+
+def make_chunks(n):
+    return [
+        create_chunk(ChunkType.FUNCTION, f"func_{i}", f"def func_{i}(): pass", "app/utils.py", "Helper")
+        for i in range(n)
+    ]
+
+
+def test_failed_pack_shares_retry_budget(descriptor):
+    """Test a failing packed request and its per-chunk fallback share one retry budget"""
+    chunks = descriptor.batch_generate_descriptions(make_chunks(5), pack_size=5)
+
+    # 1 packed attempt + 3 retries, then one attempt per chunk with no retries left
+    assert FakeAsyncOpenAI.instances[0].calls == 4 + 5
+    assert all(chunk.description == f"Function {chunk.name}: Helper" for chunk in chunks)
+
+
+def test_sync_wrapper_closes_client(descriptor):
+    """Test each synchronous run closes the client it opened"""
+    descriptor.batch_generate_descriptions(make_chunks(1))
+    descriptor.batch_generate_descriptions(make_chunks(1))
+
+    assert len(FakeAsyncOpenAI.instances) == 2
+    assert all(client.closed for client in FakeAsyncOpenAI.instances)
+    assert descriptor._client is None
+
+
+@pytest.mark.skipif(description_cache.MinHash is None, reason="datasketch not installed")
+def test_near_duplicate_hits_committed_without_misses(monkeypatch, tmp_path):
+    """Test near-duplicate hits are persisted even when no chunk needs the API"""
+    FakeAsyncOpenAI.instances = []
+    monkeypatch.setattr(llm_descriptor.openai, "AsyncOpenAI", FakeAsyncOpenAI)
+    path = str(tmp_path / "descriptions.db")
+    content = "def get_db():\n    db = SessionLocal()\n    try:\n        yield db\n    finally:\n        db.close()"
+    original = create_chunk(ChunkType.FUNCTION, "get_db", content, "app/core/database.py", "DB session")
+    edited = create_chunk(ChunkType.FUNCTION, "get_db", content + "\n", "app/core/database.py", "DB session")
+    descriptor = LLMDescriptor(api_key="test", cache_path=path)
+    descriptor.cache.put(description_key(descriptor.model, original), "Yields a database session", descriptor.model, original)
+    descriptor.cache.commit()
+
+    descriptor.batch_generate_descriptions([edited])
+
+    assert edited.description == "Yields a database session"
+    assert not FakeAsyncOpenAI.instances or FakeAsyncOpenAI.instances[0].calls == 0
+    reopened = DescriptionCache(path)
+    assert reopened.get(description_key(descriptor.model, edited)) == "Yields a database session"
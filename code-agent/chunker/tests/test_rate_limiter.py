@@ -0,0 +1,70 @@
+"""
+Rate limiter tests
+"""
+
+import asyncio
+import time
+
+import rate_limiter
+from rate_limiter import RateLimiter, TokenCounter
+
+
+def test_token_counter_estimate_without_tiktoken(monkeypatch):
+    """Test the ~4 characters per token estimate is used without tiktoken"""
+    monkeypatch.setattr(rate_limiter, "tiktoken", None)
+
+    assert TokenCounter("gpt-4o-mini").count("x" * 40) == 11
+
+
+def test_acquire_within_budget_does_not_wait():
+    """Test requests that fit both buckets are admitted immediately"""
+    limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=60000)
+
+    async def run():
+        for _ in range(5):
+            await limiter.acquire(100)
+
+    start = time.monotonic()
+    asyncio.run(run())
+    assert time.monotonic() - start < 0.1
+
+
+def test_acquire_waits_for_token_budget():
+    """Test a request waits until the token bucket refills"""
+    limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=600)
+
+    async def run():
+        await limiter.acquire(600)
+        await limiter.acquire(3)
+
+    start = time.monotonic()
+    asyncio.run(run())
+    assert time.monotonic() - start >= 0.25
+
+
+def test_acquire_waits_for_request_budget():
+    """Test a request waits until the request bucket refills"""
+    limiter = RateLimiter(requests_per_minute=120, tokens_per_minute=60000)
+
+    async def run():
+        for _ in range(121):
+            await limiter.acquire(1)
+
+    start = time.monotonic()
+    asyncio.run(run())
+    assert time.monotonic() - start >= 0.4
+
+
+def test_oversized_request_is_admitted():
+    """Test a request larger than the whole token bucket does not wait forever"""
+    limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=100)
+
+    asyncio.run(asyncio.wait_for(limiter.acquire(10000), timeout=1))
+
+
+def test_reused_across_event_loops():
+    """Test one limiter works across separate asyncio.run calls"""
+    limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=60000)
+
+    asyncio.run(limiter.acquire(1))
+    asyncio.run(limiter.acquire(1))
@@ -2,63 +2,73 @@
 Category management endpoints
 """
 
-from typing import List
+from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload, undefer
+from fastapi_cache.decorator import cache
 
+from app.core.cache import CATEGORIES_NAMESPACE, invalidate_cache
 from app.core.database import get_db
-from app.core.security import require_auth
+from app.core.security import require_admin
 from app.models.category import Category
-from app.models.user import User
 from app.schemas.category import CategoryCreate, CategoryUpdate, CategoryResponse
 
 router = APIRouter()
 
 
+async def _load_category(db: AsyncSession, category_id: int) -> Optional[Category]:
+    """Load a category with the product count its response includes"""
+    return await db.scalar(
+        select(Category)
+        .options(undefer(Category.product_count))
+        .where(Category.id == category_id)
+        .execution_options(populate_existing=True)
+    )
+
+
 @router.get("/", response_model=List[CategoryResponse])
+@cache(namespace=CATEGORIES_NAMESPACE)
 async def get_categories(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get list of categories"""
-    categories = db.query(Category).filter(
-        Category.is_active == True
-    ).offset(skip).limit(limit).all()
+    categories = (await db.scalars(
+        select(Category).options(undefer(Category.product_count), raiseload("*")).where(
+            Category.is_active == True
+        ).offset(skip).limit(limit)
+    )).all()
     
-    return categories
+    # Validated here so the cache stores plain response data rather than ORM objects
+    return [CategoryResponse.model_validate(category) for category in categories]
 
 
 @router.get("/{category_id}", response_model=CategoryResponse)
-async def get_category(category_id: int, db: Session = Depends(get_db)):
+@cache(namespace=CATEGORIES_NAMESPACE)
+async def get_category(category_id: int, db: AsyncSession = Depends(get_db)):
     """Get category by ID"""
-    category = db.query(Category).filter(Category.id == category_id).first()
+    category = await _load_category(db, category_id)
     if not category:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Category not found"
         )
     
-    return category
+    return CategoryResponse.model_validate(category)
 
 
 @router.post("/", response_model=CategoryResponse, status_code=status.HTTP_201_CREATED)
 async def create_category(
     category_data: CategoryCreate,
-    db: Session = Depends(get_db),
-    current_user_id: int = Depends(require_auth)
+    db: AsyncSession = Depends(get_db),
+    current_user_id: int = Depends(require_admin)
 ):
     """Create new category (admin only)"""
-    # Check if user is admin
-    current_user = db.query(User).filter(User.id == current_user_id).first()
-    if not current_user.is_admin:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not enough permissions"
-        )
-    
     # Check if slug already exists
-    existing_category = db.query(Category).filter(Category.slug == category_data.slug).first()
+    existing_category = await db.scalar(select(Category.id).where(Category.slug == category_data.slug))
     if existing_category:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -68,62 +78,48 @@ async def create_category(
     # Create category
     db_category = Category(**category_data.dict())
     db.add(db_category)
-    db.commit()
-    db.refresh(db_category)
+    await db.commit()
+    await invalidate_cache(CATEGORIES_NAMESPACE)
     
-    return db_category
+    return await _load_category(db, db_category.id)
 
 
 @router.put("/{category_id}", response_model=CategoryResponse)
 async def update_category(
     category_id: int,
     category_update: CategoryUpdate,
-    db: Session = Depends(get_db),
-    current_user_id: int = Depends(require_auth)
+    db: AsyncSession = Depends(get_db),
+    current_user_id: int = Depends(require_admin)
 ):
     """Update category (admin only)"""
-    # Check if user is admin
-    current_user = db.query(User).filter(User.id == current_user_id).first()
-    if not current_user.is_admin:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not enough permissions"
+    # One UPDATE statement instead of loading the row and flushing its dirty attributes
+    values = category_update.model_dump(exclude_unset=True)
+    if values:
+        result = await db.execute(
+            update(Category).where(Category.id == category_id).values(**values)
         )
+        await db.commit()
+        if result.rowcount:
+            await invalidate_cache(CATEGORIES_NAMESPACE)
     
-    category = db.query(Category).filter(Category.id == category_id).first()
+    category = await _load_category(db, category_id)
     if not category:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Category not found"
         )
     
-    # Update category fields
-    update_data = category_update.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(category, field, value)
-    
-    db.commit()
-    db.refresh(category)
-    
     return category
 
 
 @router.delete("/{category_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_category(
     category_id: int,
-    db: Session = Depends(get_db),
-    current_user_id: int = Depends(require_auth)
+    db: AsyncSession = Depends(get_db),
+    current_user_id: int = Depends(require_admin)
 ):
     """Delete category (admin only)"""
-    # Check if user is admin
-    current_user = db.query(User).filter(User.id == current_user_id).first()
-    if not current_user.is_admin:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not enough permissions"
-        )
-    
-    category = db.query(Category).filter(Category.id == category_id).first()
+    category = await _load_category(db, category_id)
     if not category:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -131,13 +127,15 @@ async def delete_category(
         )
     
     # Check if category has products
-    if category.products:
+    if category.product_count:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Cannot delete category with products"
         )
     
-    db.delete(category)
-    db.commit()
+    # A statement rather than db.delete(), which would first load the (empty) products collection
+    await db.execute(delete(Category).where(Category.id == category_id))
+    await db.commit()
+    await invalidate_cache(CATEGORIES_NAMESPACE)
     
     return None
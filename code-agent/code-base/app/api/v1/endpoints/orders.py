@@ -2,68 +2,90 @@
 Order management endpoints
 """
 
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query
+from sqlalchemy import desc, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload, selectinload, undefer
 
+from app.core.cache import PRODUCTS_NAMESPACE, invalidate_cache
 from app.core.database import get_db
-from app.core.security import require_auth
+from app.core.security import require_auth, require_admin
 from app.models.order import Order, OrderItem, OrderStatus
 from app.models.product import Product
-from app.models.user import User
 from app.schemas.order import OrderCreate, OrderUpdate, OrderResponse, OrderListResponse
 
 router = APIRouter()
 
 
+async def _load_order(db: AsyncSession, *criteria) -> Optional[Order]:
+    """Load one order with the items its response includes (relationships cannot lazy-load under asyncio)"""
+    return await db.scalar(
+        select(Order)
+        .options(selectinload(Order.items), undefer(Order.item_count))
+        .where(*criteria)
+        .execution_options(populate_existing=True)
+    )
+
+
 @router.get("/", response_model=OrderListResponse)
 async def get_orders(
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
     status: Optional[OrderStatus] = Query(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user_id: int = Depends(require_auth)
 ):
     """Get user's orders"""
-    query = db.query(Order).filter(Order.user_id == current_user_id)
+    # Items are serialized with each order, so load them for the whole page in one query;
+    # any other relationship access raises instead of silently issuing a query per order
+    query = select(Order).where(Order.user_id == current_user_id)
     
     # Apply status filter
     if status:
-        query = query.filter(Order.status == status)
+        query = query.where(Order.status == status)
     
     # Order by creation date (newest first)
     query = query.order_by(desc(Order.created_at))
     
-    # Get total count
-    total = query.count()
+    # Apply pagination; the window count returns the total with the page in a single query
+    rows = (await db.execute(
+        query.add_columns(func.count().over().label("total"))
+        .options(selectinload(Order.items), undefer(Order.item_count), raiseload("*"))
+        .offset(skip)
+        .limit(limit)
+    )).all()
+    orders = [row[0] for row in rows]
     
-    # Apply pagination
-    orders = query.offset(skip).limit(limit).all()
+    # An empty page past the end carries no window count, so only then count separately
+    if rows:
+        total = rows[0].total
+    else:
+        total = await db.scalar(select(func.count()).select_from(query.subquery())) if skip else 0
     
     # Calculate total pages
     total_pages = (total + limit - 1) // limit
     
-    return OrderListResponse(
+    result = OrderListResponse(
         orders=orders,
         total=total,
         page=skip // limit + 1,
         page_size=limit,
         total_pages=total_pages
     )
+    # Already validated from the rows above; returning a model would make FastAPI dump it
+    # to a dict and validate it against response_model again before serializing
+    return Response(content=result.model_dump_json(), media_type="application/json")
 
 
 @router.get("/{order_id}", response_model=OrderResponse)
 async def get_order(
     order_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user_id: int = Depends(require_auth)
 ):
     """Get order by ID"""
-    order = db.query(Order).filter(
-        Order.id == order_id,
-        Order.user_id == current_user_id
-    ).first()
+    order = await _load_order(db, Order.id == order_id, Order.user_id == current_user_id)
     
     if not order:
         raise HTTPException(
@@ -77,39 +99,57 @@ async def get_order(
 @router.post("/", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
 async def create_order(
     order_data: OrderCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user_id: int = Depends(require_auth)
 ):
     """Create new order"""
-    # Validate products and calculate totals
-    total_amount = 0
+    # Load name and authoritative price of every ordered product in one query
+    product_ids = {item_data.product_id for item_data in order_data.items}
+    products = {
+        product.id: product
+        for product in await db.execute(
+            select(Product.id, Product.name, Product.price).where(Product.id.in_(product_ids))
+        )
+    }
+    
+    # Validate products and calculate the subtotal
+    subtotal = 0
     order_items = []
     
     for item_data in order_data.items:
         # Get product
-        product = db.query(Product).filter(Product.id == item_data.product_id).first()
+        product = products.get(item_data.product_id)
         if not product:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Product with ID {item_data.product_id} not found"
             )
         
-        # Check stock
-        if product.stock_quantity < item_data.quantity:
+        # Reserve stock: the guard in the WHERE clause makes check-and-decrement one atomic
+        # statement, so concurrent orders cannot both take the last units
+        result = await db.execute(
+            update(Product)
+            .where(Product.id == item_data.product_id, Product.stock_quantity >= item_data.quantity)
+            .values(stock_quantity=Product.stock_quantity - item_data.quantity)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            # Releases the stock already reserved for earlier items
+            await db.rollback()
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Insufficient stock for product {product.name}"
             )
         
-        # Calculate item total
-        item_total = item_data.quantity * item_data.unit_price
-        total_amount += item_total
+        # Calculate item total from the stored price, never a client-supplied one
+        item_total = item_data.quantity * product.price
+        subtotal += item_total
         
         # Create order item
         order_item = OrderItem(
             product_id=item_data.product_id,
             quantity=item_data.quantity,
-            unit_price=item_data.unit_price,
+            unit_price=product.price,
             total_price=item_total
         )
         order_items.append(order_item)
@@ -125,93 +165,93 @@ async def create_order(
         shipping_address=order_data.shipping_address,
         billing_address=order_data.billing_address,
         notes=order_data.notes,
-        subtotal=total_amount,
+        subtotal=subtotal,
         tax_amount=0,  # TODO: Calculate tax
         shipping_amount=0,  # TODO: Calculate shipping
-        total_amount=total_amount,
         items=order_items
     )
     
+    # The stock updates and the order insert commit as one transaction
     db.add(db_order)
+    await db.commit()
+    # Cached product responses include stock levels
+    await invalidate_cache(PRODUCTS_NAMESPACE)
     
-    # Update product stock
-    for item in order_items:
-        product = db.query(Product).filter(Product.id == item.product_id).first()
-        product.stock_quantity -= item.quantity
-    
-    db.commit()
-    db.refresh(db_order)
-    
-    return db_order
+    return await _load_order(db, Order.id == db_order.id)
 
 
 @router.put("/{order_id}", response_model=OrderResponse)
 async def update_order(
     order_id: int,
     order_update: OrderUpdate,
-    db: Session = Depends(get_db),
-    current_user_id: int = Depends(require_auth)
+    db: AsyncSession = Depends(get_db),
+    current_user_id: int = Depends(require_admin)
 ):
     """Update order (admin only)"""
-    # Check if user is admin
-    current_user = db.query(User).filter(User.id == current_user_id).first()
-    if not current_user.is_admin:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not enough permissions"
+    values = order_update.model_dump(exclude_unset=True)
+    if values:
+        await db.execute(
+            update(Order).where(Order.id == order_id).values(**values)
         )
+        await db.commit()
     
-    order = db.query(Order).filter(Order.id == order_id).first()
+    order = await _load_order(db, Order.id == order_id)
     if not order:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Order not found"
         )
     
-    # Update order fields
-    update_data = order_update.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(order, field, value)
-    
-    db.commit()
-    db.refresh(order)
-    
     return order
 
 
 @router.delete("/{order_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def cancel_order(
     order_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user_id: int = Depends(require_auth)
 ):
     """Cancel order"""
-    order = db.query(Order).filter(
-        Order.id == order_id,
-        Order.user_id == current_user_id
-    ).first()
-    
-    if not order:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Order not found"
+    # Only pending orders can be cancelled; the status guard in the WHERE clause makes
+    # check-and-cancel one atomic statement, so concurrent cancels cannot both restore stock
+    result = await db.execute(
+        update(Order)
+        .where(
+            Order.id == order_id,
+            Order.user_id == current_user_id,
+            Order.status == OrderStatus.PENDING
         )
-    
-    # Only allow cancellation of pending orders
-    if order.status != OrderStatus.PENDING:
+        .values(status=OrderStatus.CANCELLED)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        await db.rollback()
+        exists = await db.scalar(
+            select(Order.id).where(Order.id == order_id, Order.user_id == current_user_id)
+        )
+        if exists is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Order not found"
+            )
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Only pending orders can be cancelled"
         )
     
-    # Update order status
-    order.status = OrderStatus.CANCELLED
-    
     # Restore product stock
-    for item in order.items:
-        product = db.query(Product).filter(Product.id == item.product_id).first()
-        product.stock_quantity += item.quantity
+    items = await db.execute(
+        select(OrderItem.product_id, OrderItem.quantity).where(OrderItem.order_id == order_id)
+    )
+    for item in items:
+        await db.execute(
+            update(Product)
+            .where(Product.id == item.product_id)
+            .values(stock_quantity=Product.stock_quantity + item.quantity)
+            .execution_options(synchronize_session=False)
+        )
     
-    db.commit()
+    await db.commit()
+    await invalidate_cache(PRODUCTS_NAMESPACE)
     
     return None
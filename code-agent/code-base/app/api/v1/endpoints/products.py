@@ -4,19 +4,33 @@ Product management endpoints
 
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload, selectinload
+from fastapi_cache.decorator import cache
 
+from app.core.cache import CATEGORIES_NAMESPACE, PRODUCTS_NAMESPACE, invalidate_cache
 from app.core.database import get_db
-from app.core.security import require_auth
+from app.core.security import require_admin
 from app.models.product import Product, ProductImage
-from app.models.user import User
 from app.schemas.product import ProductCreate, ProductUpdate, ProductResponse, ProductListResponse
 
 router = APIRouter()
 
 
+async def _load_product(db: AsyncSession, product_id: int) -> Optional[Product]:
+    """Load a product with the images its response includes (relationships cannot lazy-load under asyncio)"""
+    return await db.scalar(
+        select(Product)
+        .options(selectinload(Product.images))
+        .where(Product.id == product_id)
+        .execution_options(populate_existing=True)
+    )
+
+
 @router.get("/", response_model=ProductListResponse)
+@cache(namespace=PRODUCTS_NAMESPACE)
 async def get_products(
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
@@ -25,14 +39,21 @@ async def get_products(
     min_price: Optional[float] = Query(None, ge=0),
     max_price: Optional[float] = Query(None, ge=0),
     in_stock_only: bool = Query(False),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get list of products with filtering"""
-    query = db.query(Product).filter(Product.is_active == True)
+    query = select(Product).where(Product.is_active == True)
     
     # Apply filters
-    if search:
-        query = query.filter(
+    if search and db.bind.dialect.name == "postgresql":
+        # Full-text match on the GIN-indexed search_tsv column, best matches first
+        ts_query = func.plainto_tsquery("english", search)
+        query = query.where(Product.search_tsv.op("@@")(ts_query)).order_by(
+            func.ts_rank(Product.search_tsv, ts_query).desc()
+        )
+    elif search:
+        # search_tsv only exists on Postgres; elsewhere (the SQLite test database) scan instead
+        query = query.where(
             or_(
                 Product.name.ilike(f"%{search}%"),
                 Product.description.ilike(f"%{search}%")
@@ -40,22 +61,33 @@ async def get_products(
         )
     
     if category_id:
-        query = query.filter(Product.category_id == category_id)
+        query = query.where(Product.category_id == category_id)
     
     if min_price is not None:
-        query = query.filter(Product.price >= min_price)
+        query = query.where(Product.price >= min_price)
     
     if max_price is not None:
-        query = query.filter(Product.price <= max_price)
+        query = query.where(Product.price <= max_price)
     
     if in_stock_only:
-        query = query.filter(Product.stock_quantity > 0)
-    
-    # Get total count
-    total = query.count()
-    
-    # Apply pagination
-    products = query.offset(skip).limit(limit).all()
+        query = query.where(Product.stock_quantity > 0)
+    
+    # Apply pagination; the window count returns the total with the page in a single query,
+    # and images are serialized with each product, so they are loaded for the page in one more;
+    # any other relationship access raises instead of silently issuing a query per product
+    rows = (await db.execute(
+        query.add_columns(func.count().over().label("total"))
+        .options(selectinload(Product.images), raiseload("*"))
+        .offset(skip)
+        .limit(limit)
+    )).all()
+    products = [row[0] for row in rows]
+    
+    # An empty page past the end carries no window count, so only then count separately
+    if rows:
+        total = rows[0].total
+    else:
+        total = await db.scalar(select(func.count()).select_from(query.subquery())) if skip else 0
     
     # Calculate total pages
     total_pages = (total + limit - 1) // limit
@@ -69,36 +101,50 @@ async def get_products(
     )
 
 
+@router.get("/export")
+async def export_products(
+    db: AsyncSession = Depends(get_db),
+    current_user_id: int = Depends(require_admin)
+):
+    """Export all products as NDJSON, one product per line (admin only)"""
+    async def generate_lines():
+        # Server-side cursor: rows arrive 500 at a time, so memory stays flat however large the catalog
+        result = await db.stream_scalars(
+            select(Product)
+            .options(selectinload(Product.images))
+            .order_by(Product.id)
+            .execution_options(yield_per=500)
+        )
+        async for product in result:
+            yield ProductResponse.model_validate(product).model_dump_json() + "\n"
+    
+    return StreamingResponse(generate_lines(), media_type="application/x-ndjson")
+
+
 @router.get("/{product_id}", response_model=ProductResponse)
-async def get_product(product_id: int, db: Session = Depends(get_db)):
+@cache(namespace=PRODUCTS_NAMESPACE)
+async def get_product(product_id: int, db: AsyncSession = Depends(get_db)):
     """Get product by ID"""
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = await _load_product(db, product_id)
     if not product:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Product not found"
         )
     
-    return product
+    # Validated here so the cache stores plain response data rather than ORM objects
+    return ProductResponse.model_validate(product)
 
 
 @router.post("/", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
 async def create_product(
     product_data: ProductCreate,
-    db: Session = Depends(get_db),
-    current_user_id: int = Depends(require_auth)
+    db: AsyncSession = Depends(get_db),
+    current_user_id: int = Depends(require_admin)
 ):
     """Create new product (admin only)"""
-    # Check if user is admin
-    current_user = db.query(User).filter(User.id == current_user_id).first()
-    if not current_user.is_admin:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not enough permissions"
-        )
-    
     # Check if SKU already exists
-    existing_product = db.query(Product).filter(Product.sku == product_data.sku).first()
+    existing_product = await db.scalar(select(Product.id).where(Product.sku == product_data.sku))
     if existing_product:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -108,69 +154,56 @@ async def create_product(
     # Create product
     db_product = Product(**product_data.dict())
     db.add(db_product)
-    db.commit()
-    db.refresh(db_product)
+    await db.commit()
+    # Category responses carry product counts, so they are invalidated too
+    await invalidate_cache(PRODUCTS_NAMESPACE, CATEGORIES_NAMESPACE)
     
-    return db_product
+    return await _load_product(db, db_product.id)
 
 
 @router.put("/{product_id}", response_model=ProductResponse)
 async def update_product(
     product_id: int,
     product_update: ProductUpdate,
-    db: Session = Depends(get_db),
-    current_user_id: int = Depends(require_auth)
+    db: AsyncSession = Depends(get_db),
+    current_user_id: int = Depends(require_admin)
 ):
     """Update product (admin only)"""
-    # Check if user is admin
-    current_user = db.query(User).filter(User.id == current_user_id).first()
-    if not current_user.is_admin:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not enough permissions"
+    values = product_update.model_dump(exclude_unset=True)
+    if values:
+        result = await db.execute(
+            update(Product).where(Product.id == product_id).values(**values)
         )
+        await db.commit()
+        if result.rowcount:
+            await invalidate_cache(PRODUCTS_NAMESPACE, CATEGORIES_NAMESPACE)
     
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = await _load_product(db, product_id)
     if not product:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Product not found"
         )
     
-    # Update product fields
-    update_data = product_update.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(product, field, value)
-    
-    db.commit()
-    db.refresh(product)
-    
     return product
 
 
 @router.delete("/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_product(
     product_id: int,
-    db: Session = Depends(get_db),
-    current_user_id: int = Depends(require_auth)
+    db: AsyncSession = Depends(get_db),
+    current_user_id: int = Depends(require_admin)
 ):
     """Delete product (admin only)"""
-    # Check if user is admin
-    current_user = db.query(User).filter(User.id == current_user_id).first()
-    if not current_user.is_admin:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not enough permissions"
-        )
-    
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = await db.get(Product, product_id)
     if not product:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Product not found"
         )
     
-    db.delete(product)
-    db.commit()
+    await db.delete(product)
+    await db.commit()
+    await invalidate_cache(PRODUCTS_NAMESPACE, CATEGORIES_NAMESPACE)
     
     return None
@@ -3,54 +3,51 @@ User management endpoints
 """
 
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query
+from pydantic import TypeAdapter
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
-from app.core.security import require_auth
+from app.core.security import require_auth, require_admin, is_admin_user, invalidate_admin_cache
 from app.models.user import User
 from app.schemas.user import UserResponse, UserUpdate
 
 router = APIRouter()
 
+# Validates and serializes a whole page of users in one pydantic-core call
+_USER_LIST_ADAPTER = TypeAdapter(List[UserResponse])
+
 
 @router.get("/", response_model=List[UserResponse])
 async def get_users(
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db),
-    current_user_id: int = Depends(require_auth)
+    db: AsyncSession = Depends(get_db),
+    current_user_id: int = Depends(require_admin)
 ):
     """Get list of users (admin only)"""
-    # Check if current user is admin
-    current_user = db.query(User).filter(User.id == current_user_id).first()
-    if not current_user.is_admin:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not enough permissions"
-        )
-    
-    users = db.query(User).offset(skip).limit(limit).all()
-    return users
+    users = (await db.scalars(select(User).offset(skip).limit(limit))).all()
+    page = _USER_LIST_ADAPTER.validate_python(users, from_attributes=True)
+    return Response(content=_USER_LIST_ADAPTER.dump_json(page), media_type="application/json")
 
 
 @router.get("/{user_id}", response_model=UserResponse)
 async def get_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user_id: int = Depends(require_auth)
 ):
     """Get user by ID"""
     # Users can only access their own data unless they're admin
     if user_id != current_user_id:
-        current_user = db.query(User).filter(User.id == current_user_id).first()
-        if not current_user.is_admin:
+        if not await is_admin_user(db, current_user_id):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Not enough permissions"
             )
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -64,60 +61,52 @@ async def get_user(
 async def update_user(
     user_id: int,
     user_update: UserUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user_id: int = Depends(require_auth)
 ):
     """Update user information"""
     # Users can only update their own data unless they're admin
     if user_id != current_user_id:
-        current_user = db.query(User).filter(User.id == current_user_id).first()
-        if not current_user.is_admin:
+        if not await is_admin_user(db, current_user_id):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Not enough permissions"
             )
     
-    user = db.query(User).filter(User.id == user_id).first()
+    # Unset fields are left out of the UPDATE; a missing user surfaces as None below
+    values = user_update.model_dump(exclude_unset=True)
+    if values:
+        await db.execute(
+            update(User).where(User.id == user_id).values(**values)
+        )
+        await db.commit()
+    
+    user = await db.get(User, user_id, populate_existing=True)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    # Update user fields
-    update_data = user_update.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(user, field, value)
-    
-    db.commit()
-    db.refresh(user)
-    
     return user
 
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_user(
     user_id: int,
-    db: Session = Depends(get_db),
-    current_user_id: int = Depends(require_auth)
+    db: AsyncSession = Depends(get_db),
+    current_user_id: int = Depends(require_admin)
 ):
     """Delete user (admin only)"""
-    # Only admins can delete users
-    current_user = db.query(User).filter(User.id == current_user_id).first()
-    if not current_user.is_admin:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not enough permissions"
-        )
-    
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    db.delete(user)
-    db.commit()
+    await db.delete(user)
+    await db.commit()
+    invalidate_admin_cache(user_id)
     
     return None
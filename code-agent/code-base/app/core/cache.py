@@ -0,0 +1,60 @@
+"""
+Response caching for read-heavy endpoints
+"""
+
+import logging
+from typing import Any, Callable, Optional
+
+from fastapi import Request, Response
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.redis import RedisBackend
+from redis import asyncio as aioredis
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Cached responses expire after this many seconds even without an invalidation
+CACHE_EXPIRE_SECONDS = 60
+
+# Cache namespaces, cleared by the endpoints that modify their data
+CATEGORIES_NAMESPACE = "categories"
+PRODUCTS_NAMESPACE = "products"
+
+
+def request_key_builder(
+    func: Callable[..., Any],
+    namespace: str = "",
+    *,
+    request: Optional[Request] = None,
+    response: Optional[Response] = None,
+    args: tuple = (),
+    kwargs: Optional[dict] = None,
+) -> str:
+    """Cache key from the request path and sorted query parameters"""
+    # The default builder hashes every argument, including the per-request DB session,
+    # so it would never produce the same key twice
+    query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    return f"{FastAPICache.get_prefix()}:{namespace}:{func.__module__}.{func.__name__}:{request.url.path}?{query}"
+
+
+def init_cache() -> None:
+    """Initialize the Redis cache backend"""
+    redis = aioredis.from_url(settings.REDIS_URL)
+    FastAPICache.init(
+        RedisBackend(redis),
+        prefix="api",
+        expire=CACHE_EXPIRE_SECONDS,
+        key_builder=request_key_builder
+    )
+
+
+async def invalidate_cache(*namespaces: str) -> None:
+    """Drop every cached response in the given namespaces"""
+    # Called after the write is committed, so a cache outage must not turn it into a 500;
+    # stale entries still expire after CACHE_EXPIRE_SECONDS
+    for namespace in namespaces:
+        try:
+            await FastAPICache.clear(namespace=namespace)
+        except Exception:
+            logger.exception("Failed to invalidate cache namespace %r", namespace)
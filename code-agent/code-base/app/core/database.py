@@ -2,24 +2,51 @@
 Database configuration and session management
 """
 
-from sqlalchemy import create_engine, MetaData
+from typing import AsyncIterator
+
+from sqlalchemy import MetaData, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import StaticPool
 
 from app.core.config import settings
 
+
+def _async_database_url(url: str) -> str:
+    """Point a plain postgresql:// or sqlite:// URL at its asyncio driver (asyncpg, aiosqlite)"""
+    if url.startswith("postgresql://"):
+        return "postgresql+asyncpg://" + url[len("postgresql://"):]
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    return url
+
+
+def _engine_options(url: str) -> dict:
+    """Connection pool settings for the configured database"""
+    if url.startswith("sqlite"):
+        # Tests run on in-memory SQLite, which only exists on a single shared connection
+        return {"poolclass": StaticPool, "connect_args": {"check_same_thread": False}}
+    # pool_size + max_overflow is the most connections one worker opens; summed over all
+    # workers it must stay below Postgres max_connections (100 by default)
+    return {
+        "pool_size": settings.DATABASE_POOL_SIZE,
+        "max_overflow": settings.DATABASE_MAX_OVERFLOW,
+        "pool_recycle": settings.DATABASE_POOL_RECYCLE,
+        "pool_pre_ping": True,
+        # Reuse the most recently returned connection so idle ones can be recycled
+        "pool_use_lifo": True,
+    }
+
+
 # Create database engine
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_size=settings.DATABASE_POOL_SIZE,
-    max_overflow=settings.DATABASE_MAX_OVERFLOW,
-    pool_pre_ping=True,
-    echo=False
+engine = create_async_engine(
+    _async_database_url(settings.DATABASE_URL),
+    echo=False,
+    **_engine_options(settings.DATABASE_URL)
 )
 
-# Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Create session factory; objects stay loaded after commit so responses can be built from them
+SessionLocal = async_sessionmaker(engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 
 # Create declarative base
 Base = declarative_base()
@@ -28,13 +55,10 @@ Base = declarative_base()
 metadata = MetaData()
 
 
-def get_db() -> Session:
+async def get_db() -> AsyncIterator[AsyncSession]:
     """Get database session"""
-    db = SessionLocal()
-    try:
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
 async def init_db():
@@ -43,9 +67,13 @@ async def init_db():
     from app.models import user, product, order, category  # noqa
     
     # Create all tables
-    Base.metadata.create_all(bind=engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        if conn.dialect.name == "postgresql":
+            for statement in product.SCHEMA_UPGRADES:
+                await conn.execute(text(statement))
 
 
-def get_db_session() -> Session:
+def get_db_session() -> AsyncSession:
     """Get database session for direct use"""
     return SessionLocal()
@@ -2,26 +2,68 @@
 Security utilities for authentication and authorization
 """
 
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
 from datetime import datetime, timedelta
-from typing import Optional, Union
-from jose import JWTError, jwt
-from passlib.context import CryptContext
-from fastapi import HTTPException, status
+from typing import Dict, Optional, Tuple, Union
+from jose import JWTError, jwk, jwt
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
+from app.core.database import get_db
+from app.models.user import User
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Passwords are hashed with the bcrypt extension directly; passlib only added dispatch overhead
+BCRYPT_ROUNDS = settings.BCRYPT_ROUNDS
+# bcrypt only uses the first 72 bytes; passlib truncated silently, newer bcrypt releases raise instead
+BCRYPT_MAX_PASSWORD_BYTES = 72
+# bcrypt releases the GIL while hashing, so one thread per core hashes in parallel
+_BCRYPT_POOL = ThreadPoolExecutor(max_workers=os.cpu_count(), thread_name_prefix="bcrypt")
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    return bcrypt.checkpw(
+        plain_password.encode("utf-8")[:BCRYPT_MAX_PASSWORD_BYTES],
+        hashed_password.encode("utf-8")
+    )
 
 
 def get_password_hash(password: str) -> str:
     """Hash a password"""
-    return pwd_context.hash(password)
+    hashed = bcrypt.hashpw(
+        password.encode("utf-8")[:BCRYPT_MAX_PASSWORD_BYTES],
+        bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
+    )
+    return hashed.decode("utf-8")
+
+
+async def averify_password(plain_password: str, hashed_password: str) -> bool:
+    """verify_password on the bcrypt thread pool, keeping the event loop free while it hashes"""
+    return await asyncio.get_running_loop().run_in_executor(
+        _BCRYPT_POOL, verify_password, plain_password, hashed_password
+    )
+
+
+async def aget_password_hash(password: str) -> str:
+    """get_password_hash on the bcrypt thread pool, keeping the event loop free while it hashes"""
+    return await asyncio.get_running_loop().run_in_executor(_BCRYPT_POOL, get_password_hash, password)
+
+
+# JWT keys are constructed once; jose only parses str/bytes keys, a Key object is used as-is
+JWT_ALGORITHM = settings.ALGORITHM
+_JWT_ALGORITHMS = [JWT_ALGORITHM]
+_SIGNING_KEY = jwk.construct(settings.SECRET_KEY, JWT_ALGORITHM)
+# HMAC signs and verifies with one key; RSA/EC tokens are verified with the public half
+_VERIFYING_KEY = _SIGNING_KEY if JWT_ALGORITHM.startswith("HS") else _SIGNING_KEY.public_key()
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -33,17 +75,40 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, _SIGNING_KEY, algorithm=JWT_ALGORITHM)
     return encoded_jwt
 
 
+# Verified payloads keyed by a token digest, so repeat requests skip decoding and signature checks
+TOKEN_CACHE_MAX_SIZE = 4096
+_token_cache: "OrderedDict[bytes, dict]" = OrderedDict()
+# require_auth is a sync dependency, so FastAPI calls it from many threadpool threads at once
+_token_cache_lock = threading.Lock()
+
+
 def verify_token(token: str) -> Optional[dict]:
     """Verify and decode JWT token"""
+    key = hashlib.blake2b(token.encode("utf-8"), digest_size=16).digest()
+    with _token_cache_lock:
+        payload = _token_cache.get(key)
+        if payload is not None:
+            if payload["exp"] >= time.time():
+                _token_cache.move_to_end(key)
+                return payload
+            del _token_cache[key]
+    
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
+        payload = jwt.decode(token, _VERIFYING_KEY, algorithms=_JWT_ALGORITHMS)
     except JWTError:
         return None
+    
+    # Only tokens that expire are cached, and each one only until its exp claim
+    if isinstance(payload.get("exp"), (int, float)):
+        with _token_cache_lock:
+            _token_cache[key] = payload
+            if len(_token_cache) > TOKEN_CACHE_MAX_SIZE:
+                _token_cache.popitem(last=False)
+    return payload
 
 
 def get_current_user_id(token: str) -> Optional[int]:
@@ -51,16 +116,61 @@ def get_current_user_id(token: str) -> Optional[int]:
     payload = verify_token(token)
     if payload is None:
         return None
-    return payload.get("sub")
+    # sub is the stringified user ID; asyncpg will not compare or bind it against integer columns
+    try:
+        return int(payload["sub"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+# Raised for every rejected token, so failed requests do not build a new exception each time
+_CREDENTIALS_EXCEPTION = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
 
 
 def require_auth(token: str) -> int:
     """Require valid authentication and return user ID"""
     user_id = get_current_user_id(token)
     if user_id is None:
+        # Reset the traceback, which would otherwise grow with every re-raise of the shared instance
+        raise _CREDENTIALS_EXCEPTION.with_traceback(None)
+    return user_id
+
+
+# Admin flags are cached per user ID so hot admin endpoints skip the users lookup
+ADMIN_CACHE_TTL_SECONDS = 30
+ADMIN_CACHE_MAX_SIZE = 1024
+_admin_cache: Dict[str, Tuple[bool, float]] = {}
+
+
+async def is_admin_user(db: AsyncSession, user_id: Union[int, str]) -> bool:
+    """Check if a user is an admin, reading only the is_admin column"""
+    key = str(user_id)
+    now = time.monotonic()
+    cached = _admin_cache.get(key)
+    if cached is not None and cached[1] > now:
+        return cached[0]
+    
+    is_admin = bool(await db.scalar(select(User.is_admin).where(User.id == user_id)))
+    if len(_admin_cache) >= ADMIN_CACHE_MAX_SIZE:
+        _admin_cache.clear()
+    _admin_cache[key] = (is_admin, now + ADMIN_CACHE_TTL_SECONDS)
+    return is_admin
+
+
+def invalidate_admin_cache(user_id: Union[int, str]) -> None:
+    """Drop a user's cached admin flag"""
+    _admin_cache.pop(str(user_id), None)
+
+
+async def require_admin(user_id: int = Depends(require_auth), db: AsyncSession = Depends(get_db)) -> int:
+    """Require valid authentication as an admin and return user ID"""
+    if not await is_admin_user(db, user_id):
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
         )
     return user_id
@@ -2,49 +2,43 @@
 Category model and related schemas
 """
 
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import Integer, String, Text, Boolean, DateTime, select, text, true
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import Mapped, column_property, mapped_column, relationship
 
 from app.core.database import Base
+from app.models.product import Product
 
 
 class Category(Base):
     """Category model"""
     __tablename__ = "categories"
     
-    id = Column(Integer, primary_key=True, index=True)
-    name = Column(String(100), nullable=False, index=True)
-    slug = Column(String(100), unique=True, index=True, nullable=False)
-    description = Column(Text, nullable=True)
-    parent_id = Column(Integer, nullable=True)  # For hierarchical categories
-    is_active = Column(Boolean, default=True)
-    sort_order = Column(Integer, default=0)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    name: Mapped[str] = mapped_column(String(100), nullable=False, index=True)
+    slug: Mapped[str] = mapped_column(String(100), unique=True, index=True, nullable=False)
+    description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    parent_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)  # For hierarchical categories
+    is_active: Mapped[bool] = mapped_column(Boolean, server_default=true(), nullable=False)
+    sort_order: Mapped[int] = mapped_column(Integer, server_default=text("0"), nullable=False)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), onupdate=func.now())
+    
+    # Number of products in this category, counted in SQL instead of loading them;
+    # deferred, so only queries that undefer it pay for the subquery
+    product_count: Mapped[int] = column_property(
+        select(func.count(Product.id))
+        .where(Product.category_id == id)
+        .correlate_except(Product)
+        .scalar_subquery(),
+        deferred=True
+    )
     
     # Relationships
-    products = relationship("Product", back_populates="category")
+    products: Mapped[List["Product"]] = relationship("Product", back_populates="category")
     
     def __repr__(self):
         return f"<Category(id={self.id}, name='{self.name}', slug='{self.slug}')>"
-    
-    @property
-    def product_count(self) -> int:
-        """Get number of products in this category"""
-        return len(self.products)
-    
-    def to_dict(self) -> dict:
-        """Convert category to dictionary"""
-        return {
-            "id": self.id,
-            "name": self.name,
-            "slug": self.slug,
-            "description": self.description,
-            "parent_id": self.parent_id,
-            "is_active": self.is_active,
-            "sort_order": self.sort_order,
-            "product_count": self.product_count,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None
-        }
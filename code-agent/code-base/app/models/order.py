@@ -2,14 +2,24 @@
 Order model and related schemas
 """
 
-from sqlalchemy import Column, Integer, String, Text, Numeric, DateTime, ForeignKey, Enum
+from datetime import datetime
+from decimal import Decimal
+from typing import List, Optional
+
+from sqlalchemy import Integer, String, Text, Numeric, DateTime, ForeignKey, Enum, Index, select, text
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import Mapped, column_property, mapped_column, relationship
 import enum
 
 from app.core.database import Base
 
 
+def _stored_total(context) -> Decimal:
+    """Insert-time value of orders.total_amount, from the same row's components"""
+    params = context.get_current_parameters()
+    return params["subtotal"] + (params.get("tax_amount") or 0) + (params.get("shipping_amount") or 0)
+
+
 class OrderStatus(enum.Enum):
     """Order status enumeration"""
     PENDING = "pending"
@@ -24,80 +34,70 @@ class OrderStatus(enum.Enum):
 class Order(Base):
     """Order model"""
     __tablename__ = "orders"
+    __table_args__ = (
+        # Order history: a user's orders, newest first
+        Index("idx_orders_user_created", "user_id", text("created_at DESC")),
+        # Order history filtered by status, same ordering
+        Index("idx_orders_user_status_created", "user_id", "status", text("created_at DESC")),
+        # Pending orders are the small, frequently scanned working set (enum stored by name)
+        Index("idx_orders_status_pending", "status", postgresql_where=text("status = 'PENDING'")),
+    )
     
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    order_number = Column(String(50), unique=True, index=True, nullable=False)
-    status = Column(Enum(OrderStatus), default=OrderStatus.PENDING, nullable=False)
-    subtotal = Column(Numeric(10, 2), nullable=False)
-    tax_amount = Column(Numeric(10, 2), default=0)
-    shipping_amount = Column(Numeric(10, 2), default=0)
-    total_amount = Column(Numeric(10, 2), nullable=False)
-    shipping_address = Column(Text, nullable=False)
-    billing_address = Column(Text, nullable=True)
-    notes = Column(Text, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False)
+    order_number: Mapped[str] = mapped_column(String(50), unique=True, index=True, nullable=False)
+    status: Mapped[OrderStatus] = mapped_column(Enum(OrderStatus), default=OrderStatus.PENDING, nullable=False)
+    subtotal: Mapped[Decimal] = mapped_column(Numeric(10, 2), nullable=False)
+    tax_amount: Mapped[Decimal] = mapped_column(Numeric(10, 2), server_default=text("0"), nullable=False)
+    shipping_amount: Mapped[Decimal] = mapped_column(Numeric(10, 2), server_default=text("0"), nullable=False)
+    # Existing databases keep the NOT NULL orders.total_amount column, so it is still written
+    # on insert; reads go through the total_amount expression below instead
+    _total_amount: Mapped[Decimal] = mapped_column("total_amount", Numeric(10, 2), default=_stored_total, nullable=False)
+    # Computed in SQL from its components whenever an order is loaded, so it cannot disagree with them
+    total_amount: Mapped[Decimal] = column_property(subtotal + tax_amount + shipping_amount)
+    shipping_address: Mapped[str] = mapped_column(Text, nullable=False)
+    billing_address: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    notes: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), onupdate=func.now())
     
     # Relationships
-    user = relationship("User", back_populates="orders")
-    items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
+    user: Mapped["User"] = relationship("User", back_populates="orders")
+    # Always serialized with the order, and lazy loads are unavailable under asyncio
+    items: Mapped[List["OrderItem"]] = relationship(
+        "OrderItem", back_populates="order", cascade="all, delete-orphan", lazy="selectin"
+    )
     
     def __repr__(self):
         return f"<Order(id={self.id}, order_number='{self.order_number}', status='{self.status.value}')>"
-    
-    @property
-    def item_count(self) -> int:
-        """Get total number of items in order"""
-        return sum(item.quantity for item in self.items)
-    
-    def to_dict(self) -> dict:
-        """Convert order to dictionary"""
-        return {
-            "id": self.id,
-            "user_id": self.user_id,
-            "order_number": self.order_number,
-            "status": self.status.value,
-            "subtotal": float(self.subtotal) if self.subtotal else None,
-            "tax_amount": float(self.tax_amount) if self.tax_amount else None,
-            "shipping_amount": float(self.shipping_amount) if self.shipping_amount else None,
-            "total_amount": float(self.total_amount) if self.total_amount else None,
-            "shipping_address": self.shipping_address,
-            "billing_address": self.billing_address,
-            "notes": self.notes,
-            "item_count": self.item_count,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None
-        }
 
 
 class OrderItem(Base):
     """Order item model"""
     __tablename__ = "order_items"
     
-    id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
-    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
-    quantity = Column(Integer, nullable=False)
-    unit_price = Column(Numeric(10, 2), nullable=False)
-    total_price = Column(Numeric(10, 2), nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    order_id: Mapped[int] = mapped_column(Integer, ForeignKey("orders.id"), nullable=False, index=True)
+    product_id: Mapped[int] = mapped_column(Integer, ForeignKey("products.id"), nullable=False)
+    quantity: Mapped[int] = mapped_column(Integer, nullable=False)
+    unit_price: Mapped[Decimal] = mapped_column(Numeric(10, 2), nullable=False)
+    total_price: Mapped[Decimal] = mapped_column(Numeric(10, 2), nullable=False)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
-    order = relationship("Order", back_populates="items")
-    product = relationship("Product", back_populates="order_items")
+    order: Mapped["Order"] = relationship("Order", back_populates="items")
+    product: Mapped["Product"] = relationship("Product", back_populates="order_items")
     
     def __repr__(self):
         return f"<OrderItem(id={self.id}, order_id={self.order_id}, product_id={self.product_id}, quantity={self.quantity})>"
-    
-    def to_dict(self) -> dict:
-        """Convert order item to dictionary"""
-        return {
-            "id": self.id,
-            "order_id": self.order_id,
-            "product_id": self.product_id,
-            "quantity": self.quantity,
-            "unit_price": float(self.unit_price) if self.unit_price else None,
-            "total_price": float(self.total_price) if self.total_price else None,
-            "created_at": self.created_at.isoformat() if self.created_at else None
-        }
+
+
+# Total quantity across the order's items, summed in SQL; declared here because it needs
+# OrderItem, and deferred so only queries that undefer it pay for the subquery
+Order.item_count = column_property(
+    select(func.coalesce(func.sum(OrderItem.quantity), 0))
+    .where(OrderItem.order_id == Order.id)
+    .correlate_except(OrderItem)
+    .scalar_subquery(),
+    deferred=True
+)
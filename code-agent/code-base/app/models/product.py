@@ -2,34 +2,75 @@
 Product model and related schemas
 """
 
-from sqlalchemy import Column, Integer, String, Text, Numeric, Boolean, DateTime, ForeignKey
+from datetime import datetime
+from decimal import Decimal
+from typing import List, Optional
+
+from sqlalchemy import Column, Computed, Integer, String, Text, Numeric, Boolean, DateTime, ForeignKey, Index, false, text, true
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.schema import CreateColumn
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
 
 
+# Full-text search document for a product, kept by Postgres in products.search_tsv
+_SEARCH_TSV_SQL = "to_tsvector('english', coalesce(name, '') || ' ' || coalesce(description, ''))"
+
+# create_all never alters an existing table, so init_db runs these on Postgres to bring
+# products tables created before search_tsv up to date; both are no-ops once applied
+SCHEMA_UPGRADES = (
+    f"ALTER TABLE products ADD COLUMN IF NOT EXISTS search_tsv tsvector GENERATED ALWAYS AS ({_SEARCH_TSV_SQL}) STORED",
+    "CREATE INDEX IF NOT EXISTS idx_products_search ON products USING gin (search_tsv)",
+)
+
+
+@compiles(CreateColumn)
+def _create_column(element, compiler, **kw):
+    """Leave Postgres-only columns out of CREATE TABLE on other databases (e.g. the SQLite test engine)"""
+    if element.element.info.get("postgresql_only") and compiler.dialect.name != "postgresql":
+        return None
+    return compiler.visit_create_column(element, **kw)
+
+
 class Product(Base):
     """Product model"""
     __tablename__ = "products"
+    __table_args__ = (
+        # Product listing: active products filtered by category and price range
+        Index("idx_products_active_category", "category_id", "price", postgresql_where=text("is_active")),
+        # Product search: full-text match on name and description
+        Index("idx_products_search", "search_tsv", postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
+    # search_tsv is a table column but not an ORM attribute, so it is never selected or
+    # fetched back after an insert; queries use it through Product.search_tsv directly
+    __mapper_args__ = {"exclude_properties": ["search_tsv"]}
     
-    id = Column(Integer, primary_key=True, index=True)
-    name = Column(String(255), nullable=False, index=True)
-    description = Column(Text, nullable=True)
-    price = Column(Numeric(10, 2), nullable=False)
-    sku = Column(String(100), unique=True, index=True, nullable=False)
-    stock_quantity = Column(Integer, default=0)
-    is_active = Column(Boolean, default=True)
-    weight = Column(Numeric(8, 2), nullable=True)
-    dimensions = Column(String(100), nullable=True)  # "LxWxH"
-    category_id = Column(Integer, ForeignKey("categories.id"), nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    name: Mapped[str] = mapped_column(String(255), nullable=False)  # searched through search_tsv, not a b-tree
+    description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    price: Mapped[Decimal] = mapped_column(Numeric(10, 2), nullable=False)
+    sku: Mapped[str] = mapped_column(String(100), unique=True, index=True, nullable=False)
+    # Defaults are filled in by the database, so inserts do not bind them per row
+    stock_quantity: Mapped[int] = mapped_column(Integer, server_default=text("0"), nullable=False)
+    is_active: Mapped[bool] = mapped_column(Boolean, server_default=true(), nullable=False)
+    weight: Mapped[Optional[Decimal]] = mapped_column(Numeric(8, 2), nullable=True)
+    dimensions: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)  # "LxWxH"
+    category_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey("categories.id"), nullable=True)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), onupdate=func.now())
+    # Maintained by Postgres from name and description; not created on other databases
+    search_tsv = Column(TSVECTOR, Computed(_SEARCH_TSV_SQL, persisted=True), info={"postgresql_only": True})
     
     # Relationships
-    category = relationship("Category", back_populates="products")
-    images = relationship("ProductImage", back_populates="product", cascade="all, delete-orphan")
-    order_items = relationship("OrderItem", back_populates="product")
+    category: Mapped[Optional["Category"]] = relationship("Category", back_populates="products")
+    # Always serialized with the product, and lazy loads are unavailable under asyncio
+    images: Mapped[List["ProductImage"]] = relationship(
+        "ProductImage", back_populates="product", cascade="all, delete-orphan", lazy="selectin"
+    )
+    order_items: Mapped[List["OrderItem"]] = relationship("OrderItem", back_populates="product")
     
     def __repr__(self):
         return f"<Product(id={self.id}, name='{self.name}', sku='{self.sku}')>"
@@ -38,52 +79,22 @@ class Product(Base):
     def is_in_stock(self) -> bool:
         """Check if product is in stock"""
         return self.stock_quantity > 0
-    
-    def to_dict(self) -> dict:
-        """Convert product to dictionary"""
-        return {
-            "id": self.id,
-            "name": self.name,
-            "description": self.description,
-            "price": float(self.price) if self.price else None,
-            "sku": self.sku,
-            "stock_quantity": self.stock_quantity,
-            "is_active": self.is_active,
-            "is_in_stock": self.is_in_stock,
-            "weight": float(self.weight) if self.weight else None,
-            "dimensions": self.dimensions,
-            "category_id": self.category_id,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None
-        }
 
 
 class ProductImage(Base):
     """Product image model"""
     __tablename__ = "product_images"
     
-    id = Column(Integer, primary_key=True, index=True)
-    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
-    image_url = Column(String(500), nullable=False)
-    alt_text = Column(String(255), nullable=True)
-    is_primary = Column(Boolean, default=False)
-    sort_order = Column(Integer, default=0)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    product_id: Mapped[int] = mapped_column(Integer, ForeignKey("products.id"), nullable=False)
+    image_url: Mapped[str] = mapped_column(String(500), nullable=False)
+    alt_text: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    is_primary: Mapped[bool] = mapped_column(Boolean, server_default=false(), nullable=False)
+    sort_order: Mapped[int] = mapped_column(Integer, server_default=text("0"), nullable=False)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
-    product = relationship("Product", back_populates="images")
+    product: Mapped["Product"] = relationship("Product", back_populates="images")
     
     def __repr__(self):
         return f"<ProductImage(id={self.id}, product_id={self.product_id}, url='{self.image_url}')>"
-    
-    def to_dict(self) -> dict:
-        """Convert product image to dictionary"""
-        return {
-            "id": self.id,
-            "product_id": self.product_id,
-            "image_url": self.image_url,
-            "alt_text": self.alt_text,
-            "is_primary": self.is_primary,
-            "sort_order": self.sort_order,
-            "created_at": self.created_at.isoformat() if self.created_at else None
-        }
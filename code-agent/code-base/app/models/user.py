@@ -2,7 +2,7 @@
 User model and related schemas
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, false, true
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
@@ -19,8 +19,8 @@ class User(Base):
     hashed_password = Column(String(255), nullable=False)
     first_name = Column(String(100), nullable=True)
     last_name = Column(String(100), nullable=True)
-    is_active = Column(Boolean, default=True)
-    is_admin = Column(Boolean, default=False)
+    is_active = Column(Boolean, server_default=true(), nullable=False)
+    is_admin = Column(Boolean, server_default=false(), nullable=False)
     phone = Column(String(20), nullable=True)
     address = Column(Text, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
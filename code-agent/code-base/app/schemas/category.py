@@ -2,8 +2,13 @@
 Category Pydantic schemas
 """
 
+import re
 from typing import Optional
-from pydantic import BaseModel, validator
+from pydantic import BaseModel, ConfigDict, validator
+
+# Letters, digits, hyphens and underscores, with at least one letter or digit
+# ([^\W_] is \w without the underscore, so Unicode letters are still accepted)
+_SLUG_RE = re.compile(r'[\w-]*[^\W_][\w-]*')
 
 
 class CategoryBase(BaseModel):
@@ -26,7 +31,7 @@ class CategoryCreate(CategoryBase):
     
     @validator('slug')
     def validate_slug(cls, v):
-        if not v.replace('-', '').replace('_', '').isalnum():
+        if not _SLUG_RE.fullmatch(v):
             raise ValueError('Slug must contain only alphanumeric characters, hyphens, and underscores')
         return v
 
@@ -49,5 +54,4 @@ class CategoryResponse(CategoryBase):
     created_at: str
     updated_at: Optional[str] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True, defer_build=True)
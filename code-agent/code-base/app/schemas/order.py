@@ -4,7 +4,7 @@ Order Pydantic schemas
 
 from typing import Optional, List
 from decimal import Decimal
-from pydantic import BaseModel, validator
+from pydantic import BaseModel, ConfigDict, validator
 from app.models.order import OrderStatus
 
 
@@ -12,7 +12,6 @@ class OrderItemBase(BaseModel):
     """Base order item schema"""
     product_id: int
     quantity: int
-    unit_price: Decimal
 
 
 class OrderItemCreate(OrderItemBase):
@@ -29,11 +28,11 @@ class OrderItemResponse(OrderItemBase):
     """Order item response schema"""
     id: int
     order_id: int
+    unit_price: Decimal
     total_price: Decimal
     created_at: str
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True, defer_build=True)
 
 
 class OrderBase(BaseModel):
@@ -77,8 +76,7 @@ class OrderResponse(OrderBase):
     updated_at: Optional[str] = None
     items: List[OrderItemResponse] = []
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True, defer_build=True)
 
 
 class OrderListResponse(BaseModel):
@@ -4,7 +4,7 @@ Product Pydantic schemas
 
 from typing import Optional, List
 from decimal import Decimal
-from pydantic import BaseModel, validator
+from pydantic import BaseModel, ConfigDict, validator
 
 
 class ProductImageBase(BaseModel):
@@ -26,8 +26,7 @@ class ProductImageResponse(ProductImageBase):
     product_id: int
     created_at: str
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True, defer_build=True)
 
 
 class ProductBase(BaseModel):
@@ -79,8 +78,7 @@ class ProductResponse(ProductBase):
     updated_at: Optional[str] = None
     images: List[ProductImageResponse] = []
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True, defer_build=True)
 
 
 class ProductListResponse(BaseModel):
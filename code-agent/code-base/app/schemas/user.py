@@ -3,7 +3,7 @@ User Pydantic schemas
 """
 
 from typing import Optional
-from pydantic import BaseModel, EmailStr, validator
+from pydantic import BaseModel, ConfigDict, EmailStr, validator
 
 
 class UserBase(BaseModel):
@@ -50,8 +50,7 @@ class UserResponse(UserBase):
     created_at: str
     updated_at: Optional[str] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True, defer_build=True)
 
 
 class UserLogin(BaseModel):
@@ -3,11 +3,72 @@ Email service for notifications
 """
 
 import smtplib
+import threading
+import time
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import Optional, List
+from typing import Optional, List, Union
 from app.core.config import settings
 
+# A connection idle for longer than this is checked with NOOP before it is reused
+SMTP_IDLE_CHECK_SECONDS = 30
+
+
+# Email bodies are formatted from these module-level templates rather than rebuilt per call
+_ORDER_CONFIRMATION_TEXT = """
+        Thank you for your order!
+        
+        Order Number: {order_number}
+        
+        We have received your order and will process it shortly.
+        
+        Best regards,
+        E-commerce Team
+        """
+
+_ORDER_CONFIRMATION_HTML = """
+        <html>
+        <body>
+            <h2>Order Confirmation</h2>
+            <p>Thank you for your order!</p>
+            <p><strong>Order Number:</strong> {order_number}</p>
+            <p>We have received your order and will process it shortly.</p>
+            <p>Best regards,<br>E-commerce Team</p>
+        </body>
+        </html>
+        """
+
+_PASSWORD_RESET_URL = "https://yourapp.com/reset-password?token={reset_token}"
+
+_PASSWORD_RESET_TEXT = """
+        Password Reset Request
+        
+        You requested a password reset for your account.
+        
+        Click the link below to reset your password:
+        {reset_url}
+        
+        This link will expire in 1 hour.
+        
+        If you didn't request this, please ignore this email.
+        
+        Best regards,
+        E-commerce Team
+        """
+
+_PASSWORD_RESET_HTML = """
+        <html>
+        <body>
+            <h2>Password Reset Request</h2>
+            <p>You requested a password reset for your account.</p>
+            <p><a href="{reset_url}">Click here to reset your password</a></p>
+            <p>This link will expire in 1 hour.</p>
+            <p>If you didn't request this, please ignore this email.</p>
+            <p>Best regards,<br>E-commerce Team</p>
+        </body>
+        </html>
+        """
+
 
 class EmailService:
     """Email service for sending notifications"""
@@ -17,6 +78,76 @@ class EmailService:
         self.smtp_port = settings.SMTP_PORT
         self.smtp_user = settings.SMTP_USER
         self.smtp_password = settings.SMTP_PASSWORD
+        # One logged-in connection is reused across messages instead of a TCP/TLS/AUTH handshake per email
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._smtp_last_used = 0.0
+        self._lock = threading.Lock()
+    
+    def _connection(self) -> smtplib.SMTP:
+        """Return the open SMTP connection, connecting and logging in if needed (caller holds the lock)"""
+        if self._smtp is not None and time.monotonic() - self._smtp_last_used > SMTP_IDLE_CHECK_SECONDS:
+            # Servers drop idle sessions, so make sure this one is still alive
+            try:
+                if self._smtp.noop()[0] != 250:
+                    self._disconnect()
+            except (smtplib.SMTPException, OSError):
+                self._disconnect()
+        
+        if self._smtp is None:
+            server = smtplib.SMTP(self.smtp_host, self.smtp_port)
+            try:
+                server.starttls()
+                server.login(self.smtp_user, self.smtp_password)
+            except Exception:
+                server.close()
+                raise
+            self._smtp = server
+        return self._smtp
+    
+    def _disconnect(self) -> None:
+        """Close the SMTP connection, ignoring errors from one that is already dead (caller holds the lock)"""
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            self._smtp.close()
+        self._smtp = None
+    
+    def _send(self, msg: Union[MIMEText, MIMEMultipart]) -> None:
+        """Send a message over the shared connection, reconnecting once if the server dropped it"""
+        with self._lock:
+            try:
+                self._connection().send_message(msg)
+            except smtplib.SMTPServerDisconnected:
+                self._disconnect()
+                self._connection().send_message(msg)
+            self._smtp_last_used = time.monotonic()
+    
+    def close(self) -> None:
+        """Close the shared SMTP connection"""
+        with self._lock:
+            self._disconnect()
+    
+    def _build_message(
+        self,
+        to_email: str,
+        subject: str,
+        body: str,
+        html_body: Optional[str] = None
+    ) -> Union[MIMEText, MIMEMultipart]:
+        """Build the message, multipart only when there is an HTML alternative"""
+        if html_body:
+            msg = MIMEMultipart('alternative')
+            msg.attach(MIMEText(body, 'plain'))
+            msg.attach(MIMEText(html_body, 'html'))
+        else:
+            msg = MIMEText(body, 'plain')
+        
+        msg['From'] = self.smtp_user
+        msg['To'] = to_email
+        msg['Subject'] = subject
+        return msg
     
     def send_email(
         self,
@@ -31,26 +162,8 @@ class EmailService:
             return False
         
         try:
-            msg = MIMEMultipart('alternative')
-            msg['From'] = self.smtp_user
-            msg['To'] = to_email
-            msg['Subject'] = subject
-            
-            # Add text part
-            text_part = MIMEText(body, 'plain')
-            msg.attach(text_part)
-            
-            # Add HTML part if provided
-            if html_body:
-                html_part = MIMEText(html_body, 'html')
-                msg.attach(html_part)
-            
-            # Send email
-            with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.smtp_user, self.smtp_password)
-                server.send_message(msg)
-            
+            msg = self._build_message(to_email, subject, body, html_body)
+            self._send(msg)
             return True
             
         except Exception as e:
@@ -65,75 +178,42 @@ class EmailService:
         html_body: Optional[str] = None
     ) -> int:
         """Send email to multiple recipients"""
+        if not to_emails:
+            return 0
+        if not all([self.smtp_host, self.smtp_user, self.smtp_password]):
+            print("SMTP configuration not available")
+            return 0
+        
+        # The message is built once; only its To header changes per recipient
+        msg = self._build_message(to_emails[0], subject, body, html_body)
         success_count = 0
         for email in to_emails:
-            if self.send_email(email, subject, body, html_body):
+            msg.replace_header('To', email)
+            try:
+                self._send(msg)
                 success_count += 1
+            except Exception as e:
+                print(f"Failed to send email: {e}")
         return success_count
     
     def send_order_confirmation(self, user_email: str, order_number: str) -> bool:
         """Send order confirmation email"""
-        subject = f"Order Confirmation - {order_number}"
-        body = f"""
-        Thank you for your order!
-        
-        Order Number: {order_number}
-        
-        We have received your order and will process it shortly.
-        
-        Best regards,
-        E-commerce Team
-        """
-        
-        html_body = f"""
-        <html>
-        <body>
-            <h2>Order Confirmation</h2>
-            <p>Thank you for your order!</p>
-            <p><strong>Order Number:</strong> {order_number}</p>
-            <p>We have received your order and will process it shortly.</p>
-            <p>Best regards,<br>E-commerce Team</p>
-        </body>
-        </html>
-        """
-        
-        return self.send_email(user_email, subject, body, html_body)
+        return self.send_email(
+            user_email,
+            f"Order Confirmation - {order_number}",
+            _ORDER_CONFIRMATION_TEXT.format(order_number=order_number),
+            _ORDER_CONFIRMATION_HTML.format(order_number=order_number)
+        )
     
     def send_password_reset(self, user_email: str, reset_token: str) -> bool:
         """Send password reset email"""
-        subject = "Password Reset Request"
-        reset_url = f"https://yourapp.com/reset-password?token={reset_token}"
-        
-        body = f"""
-        Password Reset Request
-        
-        You requested a password reset for your account.
-        
-        Click the link below to reset your password:
-        {reset_url}
-        
-        This link will expire in 1 hour.
-        
-        If you didn't request this, please ignore this email.
-        
-        Best regards,
-        E-commerce Team
-        """
-        
-        html_body = f"""
-        <html>
-        <body>
-            <h2>Password Reset Request</h2>
-            <p>You requested a password reset for your account.</p>
-            <p><a href="{reset_url}">Click here to reset your password</a></p>
-            <p>This link will expire in 1 hour.</p>
-            <p>If you didn't request this, please ignore this email.</p>
-            <p>Best regards,<br>E-commerce Team</p>
-        </body>
-        </html>
-        """
-        
-        return self.send_email(user_email, subject, body, html_body)
+        reset_url = _PASSWORD_RESET_URL.format(reset_token=reset_token)
+        return self.send_email(
+            user_email,
+            "Password Reset Request",
+            _PASSWORD_RESET_TEXT.format(reset_url=reset_url),
+            _PASSWORD_RESET_HTML.format(reset_url=reset_url)
+        )
 
 
 # Global email service instance
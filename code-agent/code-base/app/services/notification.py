@@ -2,17 +2,25 @@
 Notification service for real-time updates
 """
 
+import orjson
 import redis
-import json
-from typing import Dict, Any, Optional
+from datetime import datetime, timezone
+from typing import Dict, Any, Iterable, Optional, Tuple
 from app.core.config import settings
 
+# Upper bound on open Redis connections shared by all publishers in the process
+REDIS_MAX_CONNECTIONS = 32
+
+# Datetimes are encoded by orjson as ISO 8601 UTC with a "Z" suffix; naive ones are taken as UTC
+_ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NAIVE_UTC
+
 
 class NotificationService:
     """Notification service for real-time updates"""
     
     def __init__(self):
-        self.redis_client = redis.from_url(settings.REDIS_URL)
+        self.redis_pool = redis.ConnectionPool.from_url(settings.REDIS_URL, max_connections=REDIS_MAX_CONNECTIONS)
+        self.redis_client = redis.Redis(connection_pool=self.redis_pool)
     
     def publish_notification(
         self,
@@ -21,12 +29,24 @@ class NotificationService:
     ) -> bool:
         """Publish notification to Redis channel"""
         try:
-            self.redis_client.publish(channel, json.dumps(message))
+            self.redis_client.publish(channel, orjson.dumps(message, option=_ORJSON_OPTIONS))
             return True
         except Exception as e:
             print(f"Failed to publish notification: {e}")
             return False
     
+    def publish_many(self, notifications: Iterable[Tuple[str, Dict[str, Any]]]) -> bool:
+        """Publish (channel, message) pairs in a single round trip to Redis"""
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for channel, message in notifications:
+                pipe.publish(channel, orjson.dumps(message, option=_ORJSON_OPTIONS))
+            pipe.execute()
+            return True
+        except Exception as e:
+            print(f"Failed to publish notifications: {e}")
+            return False
+    
     def notify_order_update(self, user_id: int, order_id: int, status: str) -> bool:
         """Notify user about order status update"""
         message = {
@@ -34,7 +54,7 @@ class NotificationService:
             "user_id": user_id,
             "order_id": order_id,
             "status": status,
-            "timestamp": str(datetime.utcnow())
+            "timestamp": datetime.now(timezone.utc)
         }
         return self.publish_notification(f"user:{user_id}:notifications", message)
     
@@ -44,7 +64,7 @@ class NotificationService:
             "type": "stock_update",
             "product_id": product_id,
             "new_stock": new_stock,
-            "timestamp": str(datetime.utcnow())
+            "timestamp": datetime.now(timezone.utc)
         }
         return self.publish_notification("product:stock_updates", message)
     
@@ -54,7 +74,7 @@ class NotificationService:
             "type": "system_alert",
             "alert_type": alert_type,
             "message": message,
-            "timestamp": str(datetime.utcnow())
+            "timestamp": datetime.now(timezone.utc)
         }
         return self.publish_notification("system:alerts", alert_message)
 
@@ -3,20 +3,35 @@ Validation utilities
 """
 
 import re
+import string
 from typing import Optional
 from decimal import Decimal
 
+# Patterns are compiled once at import instead of going through re's cache on every call;
+# re.ASCII only where the pattern has no \d/\s/\w class whose meaning it would change
+_EMAIL_RE = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', re.ASCII)
+_NON_DIGIT_RE = re.compile(r'\D')
+_SKU_RE = re.compile(r'[A-Z0-9-_]+', re.ASCII)
+_DIMENSIONS_RE = re.compile(r'\d+(\.\d+)?x\d+(\.\d+)?x\d+(\.\d+)?')
+_WHITESPACE_RE = re.compile(r'\s+')
+_SLUG_RE = re.compile(r'[a-z0-9]+(?:-[a-z0-9]+)*', re.ASCII)
+_NON_SLUG_CHARS_RE = re.compile(r'[^a-z0-9]+')
+
+_UPPERCASE = frozenset(string.ascii_uppercase)
+_LOWERCASE = frozenset(string.ascii_lowercase)
+_DIGITS = frozenset(string.digits)
+_SPECIAL_CHARS = frozenset('!@#$%^&*(),.?":{}|<>')
+
 
 def validate_email(email: str) -> bool:
     """Validate email format"""
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return re.match(pattern, email) is not None
+    return _EMAIL_RE.fullmatch(email) is not None
 
 
 def validate_phone(phone: str) -> bool:
     """Validate phone number format"""
     # Remove all non-digit characters
-    digits_only = re.sub(r'\D', '', phone)
+    digits_only = _NON_DIGIT_RE.sub('', phone)
     # Check if it's a valid length (7-15 digits)
     return 7 <= len(digits_only) <= 15
 
@@ -26,16 +41,20 @@ def validate_password_strength(password: str) -> tuple[bool, str]:
     if len(password) < 8:
         return False, "Password must be at least 8 characters long"
     
-    if not re.search(r'[A-Z]', password):
+    # One pass over the password builds its character set; each check is then a set test
+    chars = set(password)
+    
+    if chars.isdisjoint(_UPPERCASE):
         return False, "Password must contain at least one uppercase letter"
     
-    if not re.search(r'[a-z]', password):
+    if chars.isdisjoint(_LOWERCASE):
         return False, "Password must contain at least one lowercase letter"
     
-    if not re.search(r'\d', password):
+    # The old \d check accepted any Unicode decimal digit, so those are checked before rejecting
+    if chars.isdisjoint(_DIGITS) and not any(c.isdecimal() for c in chars):
         return False, "Password must contain at least one digit"
     
-    if not re.search(r'[!@#$%^&*(),.?":{}|<>]', password):
+    if chars.isdisjoint(_SPECIAL_CHARS):
         return False, "Password must contain at least one special character"
     
     return True, "Password is strong"
@@ -44,8 +63,7 @@ def validate_password_strength(password: str) -> tuple[bool, str]:
 def validate_sku(sku: str) -> bool:
     """Validate product SKU format"""
     # SKU should be alphanumeric with optional hyphens/underscores
-    pattern = r'^[A-Z0-9-_]+$'
-    return re.match(pattern, sku) is not None
+    return _SKU_RE.fullmatch(sku) is not None
 
 
 def validate_price(price: Decimal) -> bool:
@@ -60,8 +78,7 @@ def validate_stock_quantity(quantity: int) -> bool:
 
 def validate_dimensions(dimensions: str) -> bool:
     """Validate product dimensions format (LxWxH)"""
-    pattern = r'^\d+(\.\d+)?x\d+(\.\d+)?x\d+(\.\d+)?$'
-    return re.match(pattern, dimensions) is not None
+    return _DIMENSIONS_RE.fullmatch(dimensions) is not None
 
 
 def sanitize_string(value: str) -> str:
@@ -69,24 +86,20 @@ def sanitize_string(value: str) -> str:
     # Remove leading/trailing whitespace
     value = value.strip()
     # Replace multiple spaces with single space
-    value = re.sub(r'\s+', ' ', value)
+    value = _WHITESPACE_RE.sub(' ', value)
     return value
 
 
 def validate_slug(slug: str) -> bool:
     """Validate URL slug format"""
-    pattern = r'^[a-z0-9]+(?:-[a-z0-9]+)*$'
-    return re.match(pattern, slug) is not None
+    return _SLUG_RE.fullmatch(slug) is not None
 
 
 def generate_slug(text: str) -> str:
     """Generate URL slug from text"""
     # Convert to lowercase
     slug = text.lower()
-    # Replace spaces and special characters with hyphens
-    slug = re.sub(r'[^a-z0-9]+', '-', slug)
+    # Replace runs of spaces and special characters (hyphens included) with a single hyphen
+    slug = _NON_SLUG_CHARS_RE.sub('-', slug)
     # Remove leading/trailing hyphens
-    slug = slug.strip('-')
-    # Remove multiple consecutive hyphens
-    slug = re.sub(r'-+', '-', slug)
-    return slug
+    return slug.strip('-')
@@ -4,9 +4,11 @@ Main entry point for the application
 """
 
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
+from app.core.cache import init_cache
 from app.core.config import settings
 from app.core.database import init_db
 from app.api.v1.router import api_router
@@ -17,6 +19,7 @@ async def lifespan(app: FastAPI):
     """Application lifespan manager"""
     # Startup
     await init_db()
+    init_cache()
     yield
     # Shutdown
     pass
@@ -28,7 +31,9 @@ def create_app() -> FastAPI:
         title="E-commerce API",
         description="A modern e-commerce platform built with FastAPI",
         version="1.0.0",
-        lifespan=lifespan
+        lifespan=lifespan,
+        # orjson encodes responses several times faster than the stdlib json module
+        default_response_class=ORJSONResponse
     )
     
     # CORS middleware
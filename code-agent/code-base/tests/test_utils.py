@@ -0,0 +1,151 @@
+"""
+Helper and validator tests
+"""
+
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from app.utils.helpers import (
+    calculate_tax,
+    chunk_list,
+    chunk_list_iter,
+    deep_merge_dicts,
+    filter_dict,
+    format_datetime,
+    generate_cache_key,
+    generate_hash,
+    generate_short_id,
+    merge_dicts,
+    merge_dicts_view,
+    paginate_results,
+    remove_duplicates,
+)
+from app.utils.validators import (
+    generate_slug,
+    validate_dimensions,
+    validate_email,
+    validate_password_strength,
+    validate_sku,
+    validate_slug,
+)
+
+
+def test_generate_short_id():
+    """Test short IDs have the requested length and are uppercase hex"""
+    for length in (1, 7, 8, 13):
+        short_id = generate_short_id(length)
+        assert len(short_id) == length
+        int(short_id, 16)
+        assert short_id == short_id.upper()
+
+
+def test_generate_hash_accepts_str_and_bytes():
+    """Test str and its UTF-8 bytes hash the same"""
+    assert generate_hash("order-1") == generate_hash(b"order-1")
+    assert len(generate_hash("order-1")) == 64
+
+
+def test_generate_cache_key():
+    """Test cache keys are 128-bit and deterministic"""
+    assert generate_cache_key(b"order-1") == generate_cache_key(b"order-1")
+    assert len(generate_cache_key(b"order-1")) == 32
+
+
+def test_format_datetime():
+    """Test the fast default path matches strftime"""
+    dt = datetime(2024, 3, 5, 7, 8, 9, 123456)
+    assert format_datetime(dt) == "2024-03-05 07:08:09"
+    aware = dt.replace(tzinfo=timezone.utc)
+    assert format_datetime(aware) == aware.strftime("%Y-%m-%d %H:%M:%S")
+    assert format_datetime(datetime(999, 1, 1)) == datetime(999, 1, 1).strftime("%Y-%m-%d %H:%M:%S")
+    assert format_datetime(dt, "%d/%m/%Y") == "05/03/2024"
+
+
+def test_calculate_tax():
+    """Test float and Decimal rates give exact Decimal results"""
+    assert calculate_tax(Decimal("100.00")) == Decimal("8.0000")
+    assert calculate_tax(Decimal("100"), 0.1) == Decimal("10.0")
+    assert calculate_tax(Decimal("100"), Decimal("0.05")) == Decimal("5.00")
+
+
+def test_paginate_results():
+    """Test list pagination and lazy pagination with a known total agree"""
+    items = list(range(45))
+    page = paginate_results(items, page=3, page_size=20)
+    assert page["items"] == list(range(40, 45))
+    assert page["total_pages"] == 3
+    assert not page["has_next"] and page["has_prev"]
+
+    lazy = paginate_results(iter(items), page=3, page_size=20, total=45)
+    assert lazy == page
+
+    assert paginate_results([], page=1)["total_pages"] == 0
+
+
+def test_filter_dict_keeps_order():
+    """Test allowed keys are kept in the original order"""
+    data = {"b": 1, "a": 2, "c": 3}
+    assert list(filter_dict(data, ["c", "b"])) == ["b", "c"]
+    assert filter_dict(data, frozenset({"a"})) == {"a": 2}
+
+
+def test_merge_dicts():
+    """Test later dictionaries take precedence"""
+    assert merge_dicts({"a": 1}, {"a": 2, "b": 3}) == {"a": 2, "b": 3}
+    assert merge_dicts({"a": 1}, {"b": 2}, {"a": 3}) == {"a": 3, "b": 2}
+    view = merge_dicts_view({"a": 1}, {"a": 2, "b": 3})
+    assert view["a"] == 2 and dict(view) == {"a": 2, "b": 3}
+
+
+def test_deep_merge_dicts():
+    """Test nested dictionaries are merged without mutating the inputs"""
+    base = {"db": {"host": "localhost", "pool": {"size": 5}}, "debug": False}
+    override = {"db": {"pool": {"size": 10}}, "debug": True}
+    merged = deep_merge_dicts(base, override)
+
+    assert merged == {"db": {"host": "localhost", "pool": {"size": 10}}, "debug": True}
+    assert base["db"]["pool"]["size"] == 5
+
+
+def test_chunk_list():
+    """Test chunks are lists of the requested size"""
+    assert chunk_list([1, 2, 3, 4, 5], 2) == [[1, 2], [3, 4], [5]]
+    assert list(chunk_list_iter([], 3)) == []
+
+
+def test_remove_duplicates():
+    """Test the first occurrence order is preserved"""
+    assert remove_duplicates([3, 1, 3, 2, 1]) == [3, 1, 2]
+
+
+def test_validate_email():
+    """Test the whole address must match"""
+    assert validate_email("user@example.com")
+    assert not validate_email("user@example")
+    assert not validate_email("user@example.com trailing")
+
+
+def test_validate_password_strength():
+    """Test each rule is reported"""
+    assert validate_password_strength("Str0ng!pass") == (True, "Password is strong")
+    assert not validate_password_strength("Sh0rt!")[0]
+    assert "uppercase" in validate_password_strength("weak0!pass")[1]
+    assert "lowercase" in validate_password_strength("WEAK0!PASS")[1]
+    assert "digit" in validate_password_strength("Weak!pass")[1]
+    assert validate_password_strength("Weak\u0663!pass")[0]
+    assert "special" in validate_password_strength("Weak0pass")[1]
+
+
+def test_validate_sku_and_dimensions():
+    """Test SKU and dimension formats"""
+    assert validate_sku("ABC-123_X")
+    assert not validate_sku("abc-123")
+    assert validate_dimensions("10x5.5x2")
+    assert not validate_dimensions("10x5")
+
+
+def test_slugs():
+    """Test slug generation collapses separators"""
+    assert generate_slug("  Hello,  World -- Again! ") == "hello-world-again"
+    assert validate_slug("hello-world")
+    assert not validate_slug("hello--world")
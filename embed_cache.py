@@ -0,0 +1,153 @@
+"""
+embed_cache.py
+
+In-process LRU + TTL cache in front of embedder.get_embedding, so repeated or
+near-duplicate chatbot turns skip the embeddings API round-trip.
+
+- Exact hits are keyed by the query text with whitespace collapsed and case folded.
+- On a miss the real embedding is fetched, stored as a unit-length float32 vector,
+  and snapped to an already cached vector when their cosine similarity exceeds tau,
+  so near-duplicate queries share one key for downstream vector caches.
+- With RAG_CACHE_DIR set, entries are also appended to an on-disk store and
+  reloaded at startup (see cache_store.py).
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Sequence
+
+try:
+    import numpy as np
+except Exception as exc:  # pragma: no cover
+    raise ImportError("The 'numpy' package is required. Install with: pip install numpy") from exc
+
+from cache_store import VectorStore, cache_path
+from embedder import EMBEDDING_MODEL, get_embedding
+
+
+def as_unit_vector(vec: Sequence[float]) -> np.ndarray:
+    """Return vec as a float32 ndarray scaled to unit L2 norm."""
+    arr = np.asarray(vec, dtype=np.float32)
+    return arr / (np.linalg.norm(arr) + 1e-12)
+
+
+def _cache_key(text: str) -> str:
+    return " ".join(text.split()).casefold()
+
+
+class EmbeddingCache:
+    """
+    Fixed-capacity embedding cache.
+
+    Vectors live in one preallocated (capacity, dim) matrix so the fuzzy lookup is a
+    single BLAS mat-vec product; the OrderedDict maps keys to matrix rows in LRU order.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 1024,
+        ttl: float = 3600.0,
+        tau: float = 0.97,
+        persist_path: Optional[str] = None,
+    ) -> None:
+        self.capacity = capacity
+        self.ttl = ttl
+        self.tau = tau
+        self._slots: "OrderedDict[str, int]" = OrderedDict()
+        self._free: List[int] = list(range(capacity - 1, -1, -1))
+        self._expires = np.zeros(capacity, dtype=np.float64)
+        self._mat: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+        self._store = VectorStore(persist_path) if persist_path else None
+        if self._store is not None:
+            self._restore()
+
+    def get(self, text: str) -> np.ndarray:
+        key = _cache_key(text)
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is not None:
+                if self._expires[slot] > time.monotonic():
+                    self._slots.move_to_end(key)
+                    return self._mat[slot].copy()
+                self._release(key)
+
+        vec = as_unit_vector(get_embedding(text, model=EMBEDDING_MODEL))
+
+        with self._lock:
+            vec = self._nearest(vec)
+            self._insert(key, vec)
+        if self._store is not None:
+            # Wall-clock expiry, since monotonic time does not survive a restart
+            self._store.append(vec, {"key": key, "dim": int(vec.shape[0]), "expires_at": time.time() + self.ttl})
+        return vec.copy()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._slots.clear()
+            self._free = list(range(self.capacity - 1, -1, -1))
+            self._expires[:] = 0.0
+            if self._store is not None:
+                self._store.rewrite([])
+
+    def _nearest(self, vec: np.ndarray) -> np.ndarray:
+        # Snap to the most similar live cached vector if it is within tau
+        if self._mat is None:
+            return vec
+        live = np.flatnonzero(self._expires > time.monotonic())
+        if live.size == 0:
+            return vec
+        scores = self._mat[live] @ vec
+        i = int(scores.argmax())
+        if scores[i] > self.tau:
+            return self._mat[live[i]].copy()
+        return vec
+
+    def _restore(self) -> None:
+        # Replay the on-disk log oldest first, skipping expired rows, then compact it
+        now_wall, now_mono = time.time(), time.monotonic()
+        with self._lock:
+            for vec, meta in list(self._store.load()):
+                remaining = meta["expires_at"] - now_wall
+                if remaining > 0:
+                    self._insert(meta["key"], vec, now_mono + remaining)
+            live = [
+                (self._mat[slot], {"key": key, "dim": int(self._mat.shape[1]), "expires_at": now_wall + self._expires[slot] - now_mono})
+                for key, slot in self._slots.items()
+            ]
+            self._store.rewrite(live)
+
+    def _insert(self, key: str, vec: np.ndarray, expires: Optional[float] = None) -> None:
+        if self._mat is None:
+            self._mat = np.zeros((self.capacity, vec.shape[0]), dtype=np.float32)
+        if key in self._slots:
+            self._release(key)
+        if not self._free:
+            self._release(next(iter(self._slots)))
+        slot = self._free.pop()
+        self._mat[slot] = vec
+        self._expires[slot] = time.monotonic() + self.ttl if expires is None else expires
+        self._slots[key] = slot
+
+    def _release(self, key: str) -> None:
+        slot = self._slots.pop(key)
+        self._expires[slot] = 0.0
+        self._free.append(slot)
+
+
+_cache = None  # lazily initialized, shared by every chatbot in the process
+
+
+def _cache_singleton() -> EmbeddingCache:
+    global _cache
+    if _cache is None:
+        _cache = EmbeddingCache(persist_path=cache_path("embed_cache", EMBEDDING_MODEL))
+    return _cache
+
+
+def get_embedding_cached(text: str) -> np.ndarray:
+    """Return the unit-length float32 embedding for text, served from the cache when possible."""
+    return _cache_singleton().get(text)
@@ -7,45 +7,20 @@ and returns embeddings for given text using OpenAI's Embeddings API.
 
 from __future__ import annotations
 
-import os
 from typing import List, Sequence
 
-# Load .env if available (no-op if python-dotenv is not installed)
-try:
-    from dotenv import load_dotenv  # type: ignore
+from openai_client import OpenAI, get_client
 
-    load_dotenv()
-except Exception:
-    pass
-
-try:
-    from openai import OpenAI
-except Exception as exc:  # pragma: no cover
-    raise ImportError(
-        "The 'openai' package is required. Install with: pip install openai"
-    ) from exc
-
-
-def _get_client() -> OpenAI:
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        raise RuntimeError(
-            "OPENAI_API_KEY not found in environment. Ensure it is set in your .env or shell."
-        )
-    return OpenAI(api_key=api_key)
-
-
-_client = None  # lazily initialized
+# Default embedding model; the on-disk vector caches are keyed by it (see cache_store.cache_path)
+EMBEDDING_MODEL = "text-embedding-3-small"
 
 
 def _client_singleton() -> OpenAI:
-    global _client
-    if _client is None:
-        _client = _get_client()
-    return _client
+    # Shares the process-wide pooled client with the chatbots and rewriter
+    return get_client()
 
 
-def get_embedding(text: str, model: str = "text-embedding-3-small") -> List[float]:
+def get_embedding(text: str, model: str = EMBEDDING_MODEL) -> List[float]:
     """Return embedding vector for a single text.
 
     - Normalizes newlines per OpenAI guidance.
@@ -61,7 +36,7 @@ def get_embedding(text: str, model: str = "text-embedding-3-small") -> List[floa
     return resp.data[0].embedding  # type: ignore[return-value]
 
 
-def get_embeddings(texts: Sequence[str], model: str = "text-embedding-3-small") -> List[List[float]]:
+def get_embeddings(texts: Sequence[str], model: str = EMBEDDING_MODEL) -> List[List[float]]:
     """Return embeddings for a sequence of texts."""
     if not isinstance(texts, (list, tuple)):
         raise ValueError("texts must be a list or tuple of strings")
@@ -2,8 +2,14 @@
 # Robust parser for "Question ... / Answer ..." FAQ text files.
 
 import re
+import sys
 from typing import List, Dict, Optional
 
+try:
+    import orjson  # optional, much faster _print_json
+except ImportError:
+    orjson = None
+
 # Matches a question header line, e.g.:
 # "Ques. 1: What is ...", "Question 2 - ...", "Q: What is ..."
 Q_HEADER_RE = re.compile(
@@ -31,13 +37,8 @@ A_HEADER_RE = re.compile(
 def _normalize(text: str) -> str:
     """Trim outer whitespace and collapse internal runs of spaces on each line."""
     # Keep line breaks (answers often span lines); normalize spaces per line.
-    lines = [re.sub(r"[ \t]+", " ", ln.strip()) for ln in text.strip().splitlines()]
-    # Drop leading/trailing blank lines after normalization
-    while lines and lines[0] == "":
-        lines.pop(0)
-    while lines and lines[-1] == "":
-        lines.pop()
-    return "\n".join(lines)
+    # text.strip() already leaves no blank first or last line to drop
+    return "\n".join(" ".join(ln.split()) for ln in text.strip().splitlines())
 
 def parse_qa_pairs_from_text(text: str) -> List[Dict]:
     """
@@ -81,9 +82,13 @@ def parse_qa_pairs_from_text(text: str) -> List[Dict]:
 
     for raw in lines:
         line = raw.rstrip("\n")
+        # Header regexes only run on lines that can start a header; body lines skip both
+        lead = line.lstrip()[:1].lower()
+        is_q = lead == "q"
+        is_a = lead == "a"
 
         if state == "SEEK_Q":
-            m_q = Q_HEADER_RE.match(line)
+            m_q = Q_HEADER_RE.match(line) if is_q else None
             if m_q:
                 q_num = m_q.group("num")
                 q_first = m_q.group("q").strip()
@@ -94,7 +99,7 @@ def parse_qa_pairs_from_text(text: str) -> List[Dict]:
                 continue
 
         elif state == "IN_Q":
-            m_a = A_HEADER_RE.match(line)
+            m_a = A_HEADER_RE.match(line) if is_a else None
             if m_a:
                 a_first = m_a.group("a").strip()
                 a_lines = [a_first] if a_first else []
@@ -102,7 +107,7 @@ def parse_qa_pairs_from_text(text: str) -> List[Dict]:
             else:
                 # allow multi-line questions until an Answer header appears
                 # but if another Q header appears (malformed doc), start a new Q
-                m_q = Q_HEADER_RE.match(line)
+                m_q = Q_HEADER_RE.match(line) if is_q else None
                 if m_q:
                     # orphan question with no answer -> skip/replace with new question
                     q_num = m_q.group("num")
@@ -113,7 +118,7 @@ def parse_qa_pairs_from_text(text: str) -> List[Dict]:
                     q_lines.append(line.strip())
 
         elif state == "IN_A":
-            m_q = Q_HEADER_RE.match(line)
+            m_q = Q_HEADER_RE.match(line) if is_q else None
             if m_q:
                 # finalize previous Q/A and start new question
                 flush_chunk()
@@ -122,7 +127,7 @@ def parse_qa_pairs_from_text(text: str) -> List[Dict]:
                 q_lines = [q_first] if q_first else []
                 state = "IN_Q"
             else:
-                m_a = A_HEADER_RE.match(line)
+                m_a = A_HEADER_RE.match(line) if is_a else None
                 if m_a and not a_lines:
                     # rare case: answer header split across lines—treat as continuation
                     a_first = m_a.group("a").strip()
@@ -153,6 +158,12 @@ def _print_pretty(chunks: List[Dict]) -> None:
 
 
 def _print_json(chunks: List[Dict]) -> None:
+    if orjson is not None:
+        # orjson emits UTF-8 bytes directly, so they skip the text layer
+        sys.stdout.flush()
+        sys.stdout.buffer.write(orjson.dumps(chunks, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE))
+        sys.stdout.flush()
+        return
     import json
 
     print(json.dumps(chunks, ensure_ascii=False, indent=2))
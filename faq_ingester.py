@@ -1,9 +1,11 @@
 from __future__ import annotations
 
-from typing import Optional
+import asyncio
+from typing import List, Optional
 
 from faq_chunker import parse_qa_file
-from embedder import get_embedding
+from embedder import get_embeddings
+from embed_cache import get_embedding_cached
 from weaviate_helper import insert_chunk, search_near_vector, search_bm25
 
 
@@ -11,23 +13,34 @@ class FAQIngester:
     def __init__(self, faq_path: str = "data/FAQ.txt") -> None:
         self.faq_path = faq_path
 
-    def ingest(self, limit: Optional[int] = None) -> int:
+    def ingest(self, limit: Optional[int] = None, batch_size: int = 128) -> int:
         """
         Read FAQ file, chunk into Q/A pairs, embed concatenated text,
         and insert into Weaviate via helper. Returns number of processed pairs.
+
+        Pairs are embedded batch_size at a time, one Embeddings API request per batch.
         """
         chunks = parse_qa_file(self.faq_path)
+        if limit:
+            chunks = chunks[:limit]
         count = 0
-        for ch in (chunks[:limit] if limit else chunks):
-            question = ch["question"]
-            answer = ch["answer"]
-            combined = f"Q: {question}\nA: {answer}"
-            vector = get_embedding(combined)
-            insert_chunk(question, answer, vector)
-            count += 1
+        for start in range(0, len(chunks), batch_size):
+            batch = chunks[start : start + batch_size]
+            # The chunker already built the same "Q: ...\nA: ..." text for each pair
+            combined = [ch["chunk_text"] for ch in batch]
+            vectors = get_embeddings(combined)
+            for ch, vector in zip(batch, vectors):
+                insert_chunk(ch["question"], ch["answer"], vector)
+                count += 1
         return count
 
 
+async def _embed_queries(queries: List[str]) -> list:
+    # The shared client and the embedding cache are thread-safe, so the lookups run
+    # concurrently and their API round-trips overlap instead of adding up
+    return await asyncio.gather(*(asyncio.to_thread(get_embedding_cached, q) for q in queries))
+
+
 if __name__ == "__main__":
     #ingester = FAQIngester("/Users/vivekanandvivek/RAG/data/FAQ.txt")
     #n = ingester.ingest()
@@ -43,8 +56,7 @@ if __name__ == "__main__":
         "What happens in case of a dispute?"
     ]
     print("\nSearch demos (user-style queries):")
-    for q in demo_queries:
-        q_vec = get_embedding(q)
+    for q, q_vec in zip(demo_queries, asyncio.run(_embed_queries(demo_queries))):
         hits = search_near_vector(q_vec, limit=3)
         print(f"\nQuery: {q}")
         for r in hits:
@@ -0,0 +1,68 @@
+"""
+fast_index.py
+
+Tiny in-process nearest-neighbour index over the hits of frequent ("warmup")
+queries. A lookup is one mat-vec product over a small (N, d) float32 matrix, so
+common intents are answered without a Weaviate round-trip.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+try:
+    import numpy as np
+except Exception as exc:  # pragma: no cover
+    raise ImportError("The 'numpy' package is required. Install with: pip install numpy") from exc
+
+from embed_cache import as_unit_vector, get_embedding_cached
+
+
+def load_warmup_queries(path: Optional[str] = None) -> List[str]:
+    """Read one query per line from path (default: $FAQ_WARMUP_FILE); missing file -> []."""
+    path = path or os.getenv("FAQ_WARMUP_FILE")
+    if not path or not os.path.isfile(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+class FastMemoryIndex:
+    """
+    Read-mostly index of precomputed query embeddings and their search hits.
+
+    Rows of vecs are unit length, so the dot product equals cosine similarity.
+    """
+
+    def __init__(self, tau: float = 0.92) -> None:
+        self.tau = tau
+        self.vecs: np.ndarray = np.zeros((0, 0), dtype=np.float32)
+        self.hits: List[List[Dict]] = []
+
+    def __len__(self) -> int:
+        return len(self.hits)
+
+    def warmup(self, queries: Iterable[str], fetch: Callable[[np.ndarray], List[Dict]]) -> None:
+        """Embed each query and fetch its hits once; queries with no hits are skipped."""
+        rows: List[np.ndarray] = []
+        hits: List[List[Dict]] = []
+        for query in queries:
+            vec = get_embedding_cached(query)
+            found = fetch(vec)
+            if found:
+                rows.append(vec)
+                hits.append(found)
+        if rows:
+            self.vecs = np.vstack(rows).astype(np.float32, copy=False)
+            self.hits = hits
+
+    def lookup(self, vector: Sequence[float]) -> Optional[List[Dict]]:
+        """Return the hits of the nearest warmup query, or None if none is within tau."""
+        if not self.hits:
+            return None
+        scores = self.vecs @ as_unit_vector(vector)
+        i = int(scores.argmax())
+        if scores[i] <= self.tau:
+            return None
+        return self.hits[i]
@@ -0,0 +1,56 @@
+"""
+openai_client.py
+
+Process-wide OpenAI client shared by the chatbots, query rewriter, rerankers and
+embedder, so every call reuses one pool of keep-alive connections (HTTP/2 when the
+optional 'h2' package is installed) instead of paying a TLS handshake per client. Importing it also loads .env, so its
+importers do not need to.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+
+try:
+    from dotenv import load_dotenv  # type: ignore
+    load_dotenv()
+except Exception:
+    pass
+
+try:
+    import httpx
+    from openai import DefaultHttpxClient, OpenAI
+except Exception as exc:  # pragma: no cover
+    raise ImportError("The 'openai' package is required. Install with: pip install openai") from exc
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # type: ignore  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+_client = None  # lazily initialized
+_lock = threading.Lock()
+
+
+def get_client() -> OpenAI:
+    """Return the shared OpenAI client, creating it on first use."""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                api_key = os.getenv("OPENAI_API_KEY")
+                if not api_key:
+                    raise RuntimeError("OPENAI_API_KEY not set in environment")
+                _client = OpenAI(
+                    api_key=api_key,
+                    http_client=DefaultHttpxClient(
+                        http2=_http2_available(),
+                        limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+                    ),
+                )
+    return _client
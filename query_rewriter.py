@@ -1,19 +1,25 @@
 from __future__ import annotations
 
-from typing import List, Dict, Optional
-
-import os
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Sequence
 
 try:
-    from dotenv import load_dotenv  # type: ignore
-    load_dotenv()
-except Exception:
-    pass
+    import tiktoken  # optional, exact token counts for the window budget
+except ImportError:
+    tiktoken = None
 
-try:
-    from openai import OpenAI
-except Exception as exc:  # pragma: no cover
-    raise ImportError("The 'openai' package is required. Install with: pip install openai") from exc
+from openai_client import get_client
+
+# Coreference markers that make a follow-up depend on earlier turns
+_COREF_RE = re.compile(r"\b(it|its|that|this|these|those|they|them|he|she|above|previous|earlier|last one)\b", re.I)
+
+# Transcript prefix per role; any other role is shown as System
+_ROLE_PREFIX = {"user": "User", "assistant": "Assistant"}
+_REWRITE_INSTRUCTION = "\nRewrite the latest user intent above as a standalone search query only."
 
 
 class QueryRewriter:
@@ -26,13 +32,27 @@ class QueryRewriter:
     Where messages is a list of {"role": "system"|"user"|"assistant", "content": str}.
     """
 
-    def __init__(self, model: str = "gpt-4o-mini", max_chars: int = 500) -> None:
+    def __init__(
+        self,
+        model: str = "gpt-4o-mini",
+        max_chars: int = 500,
+        cache_size: int = 1024,
+        max_window_tokens: int = 800,
+    ) -> None:
         self.model = model
         self.max_chars = max_chars
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise RuntimeError("OPENAI_API_KEY not set in environment")
-        self._client = OpenAI(api_key=api_key)
+        self.max_window_tokens = max_window_tokens
+        self._client = get_client()
+        self._encoding = None
+        if tiktoken is not None:
+            try:
+                self._encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                self._encoding = tiktoken.get_encoding("o200k_base")
+        # LRU of rewrites keyed by a digest of the exact prompt sent to the model
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[bytes, str]" = OrderedDict()
+        self._cache_lock = threading.Lock()
 
         self._system_prompt = (
             "You are a query rewriting assistant for agreement-related FAQs. "
@@ -42,19 +62,37 @@ class QueryRewriter:
             f"Cap the output to <= {self.max_chars} characters. Return ONLY the rewritten query."
         )
 
-    def rewrite(self, messages: List[Dict[str, str]]) -> str:
+    def needs_rewrite(self, messages: Sequence[Dict[str, str]]) -> bool:
+        """Cheap pre-check: only a follow-up turn that refers back to earlier context needs the LLM."""
+        user_turns = [m for m in messages if m.get("role") == "user"]
+        if len(user_turns) <= 1:
+            return False
+        return bool(_COREF_RE.search(user_turns[-1].get("content") or ""))
+
+    def rewrite(self, messages: Sequence[Dict[str, str]]) -> str:
         if not messages:
             return ""
 
-        # Truncate window to last ~10 turns for efficiency
-        window = messages[-10:]
+        # Unambiguous messages are already standalone queries; skip the LLM round-trip
+        if not self.needs_rewrite(messages):
+            return self._fallback(messages)
+
+        window = self._window(messages)
+        prompt = self._format_for_rewrite(window)
+        # temperature=0, so an identical window gets the same rewrite without another call
+        key = hashlib.blake2b(prompt.encode("utf-8"), digest_size=16).digest()
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
 
         try:
             completion = self._client.chat.completions.create(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": self._system_prompt},
-                    {"role": "user", "content": self._format_for_rewrite(window)},
+                    {"role": "user", "content": prompt},
                 ],
                 temperature=0.0,
                 max_tokens=256,
@@ -64,11 +102,43 @@ class QueryRewriter:
                 return self._fallback(messages)
             if len(text) > self.max_chars:
                 text = text[: self.max_chars].rstrip()
+            with self._cache_lock:
+                self._cache[key] = text
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
             return text
         except Exception:
             return self._fallback(messages)
 
-    def _fallback(self, messages: List[Dict[str, str]]) -> str:
+    def rewrite_many(self, conversations: Sequence[Sequence[Dict[str, str]]], max_concurrency: int = 32) -> List[str]:
+        """Rewrite several conversation windows concurrently; results are in input order."""
+        # The shared client is thread-safe, so the threads overlap their API round-trips
+        # and the pool size bounds how many requests are in flight at once
+        with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+            return list(pool.map(self.rewrite, conversations))
+
+    def _count_tokens(self, text: str) -> int:
+        # ~4 characters per token when tiktoken is not installed
+        if self._encoding is None:
+            return len(text) // 4 + 1
+        return len(self._encoding.encode(text, disallowed_special=()))
+
+    def _window(self, messages: Sequence[Dict[str, str]]) -> List[Dict[str, str]]:
+        """Most recent turns whose content fits max_window_tokens; the latest turn is always kept."""
+        # Prompt cost tracks tokens, not turns, so a few long turns or many short ones
+        # are trimmed to the same budget (messages may be a deque, hence reversed())
+        window: List[Dict[str, str]] = []
+        budget = self.max_window_tokens
+        for m in reversed(messages):
+            cost = self._count_tokens(m.get("content") or "")
+            if window and cost > budget:
+                break
+            window.append(m)
+            budget -= cost
+        window.reverse()
+        return window
+
+    def _fallback(self, messages: Sequence[Dict[str, str]]) -> str:
         # Use the last user message as a minimal fallback
         for msg in reversed(messages):
             if msg.get("role") == "user":
@@ -77,15 +147,12 @@ class QueryRewriter:
 
     def _format_for_rewrite(self, messages: List[Dict[str, str]]) -> str:
         # Compact plain-text transcript
-        lines: List[str] = []
-        for m in messages:
-            role = m.get("role", "user")
-            content = (m.get("content") or "").strip()
-            if not content:
-                continue
-            prefix = "User" if role == "user" else ("Assistant" if role == "assistant" else "System")
-            lines.append(f"{prefix}: {content}")
-        lines.append("\nRewrite the latest user intent above as a standalone search query only.")
+        lines = [
+            f"{_ROLE_PREFIX.get(m.get('role', 'user'), 'System')}: {content}"
+            for m in messages
+            if (content := (m.get("content") or "").strip())
+        ]
+        lines.append(_REWRITE_INSTRUCTION)
         return "\n".join(lines)
 
 
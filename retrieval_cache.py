@@ -0,0 +1,125 @@
+"""
+retrieval_cache.py
+
+Client-side proximity cache for vector search results: if a new query embedding is
+within cosine similarity tau of a previously searched one, its cached hits are
+returned and the Weaviate round-trip is skipped. With a persist_path, entries are
+also kept in an on-disk store (see cache_store.py) and reloaded at startup. Entries
+expire after ttl seconds so re-ingested collections are eventually picked up.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Sequence
+
+try:
+    import numpy as np
+except Exception as exc:  # pragma: no cover
+    raise ImportError("The 'numpy' package is required. Install with: pip install numpy") from exc
+
+from cache_store import VectorStore
+from embed_cache import as_unit_vector
+
+
+class ProximityCache:
+    """
+    Fixed-capacity cache mapping query embeddings to search hits.
+
+    Keys are unit-length rows of one (capacity, dim) matrix, so the dot product equals
+    cosine similarity, matching the distance metric of the Weaviate collections.
+    Eviction is least-recently-used; expired rows are skipped by lookups.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 256,
+        tau: float = 0.95,
+        ttl: float = 3600.0,
+        persist_path: Optional[str] = None,
+    ) -> None:
+        self.capacity = capacity
+        self.tau = tau
+        self.ttl = ttl
+        self.keys: Optional[np.ndarray] = None
+        self._expires = np.zeros(capacity, dtype=np.float64)
+        self.vals: List[Optional[List[Dict]]] = [None] * capacity
+        self._size = 0
+        self._lru: Deque[int] = deque()
+        self._lock = threading.Lock()
+        self._store = VectorStore(persist_path) if persist_path else None
+        if self._store is not None:
+            self._restore()
+
+    def get(self, vector: Sequence[float]) -> Optional[List[Dict]]:
+        """Return cached hits for the nearest stored query, or None if none is within tau."""
+        q = as_unit_vector(vector)
+        with self._lock:
+            if not self._size:
+                return None
+            scores = self.keys[: self._size] @ q
+            scores[self._expires[: self._size] <= time.monotonic()] = -np.inf
+            i = int(scores.argmax())
+            if scores[i] <= self.tau:
+                return None
+            self._lru.remove(i)
+            self._lru.append(i)
+            return self.vals[i]
+
+    def put(self, vector: Sequence[float], hits: List[Dict]) -> None:
+        q = as_unit_vector(vector)
+        with self._lock:
+            self._put(q, hits)
+        if self._store is not None:
+            # Wall-clock expiry, since monotonic time does not survive a restart
+            self._store.append(q, {"dim": int(q.shape[0]), "hits": hits, "expires_at": time.time() + self.ttl})
+
+    def _put(self, q: np.ndarray, hits: List[Dict], expires: Optional[float] = None) -> None:
+        # Caller holds the lock
+        if self.keys is None:
+            self.keys = np.zeros((self.capacity, q.shape[0]), dtype=np.float32)
+        if self._size < self.capacity:
+            i = self._size
+            self._size += 1
+        else:
+            i = self._lru.popleft()
+        self.keys[i] = q
+        self.vals[i] = hits
+        self._expires[i] = time.monotonic() + self.ttl if expires is None else expires
+        self._lru.append(i)
+
+    def _restore(self) -> None:
+        # Replay the on-disk log oldest first, skipping expired rows, then compact it
+        now_wall, now_mono = time.time(), time.monotonic()
+        with self._lock:
+            for q, meta in list(self._store.load()):
+                # Rows written before expiry was tracked are treated as expired
+                remaining = meta.get("expires_at", 0.0) - now_wall
+                if remaining > 0:
+                    self._put(q, meta["hits"], now_mono + remaining)
+            live = [
+                (self.keys[i], {"dim": int(self.keys.shape[1]), "hits": self.vals[i], "expires_at": now_wall + self._expires[i] - now_mono})
+                for i in self._lru
+            ]
+            self._store.rewrite(live)
+
+    def get_or_fetch(self, vector: Sequence[float], fetch: Callable[[], List[Dict]]) -> List[Dict]:
+        """Return cached hits for vector, calling fetch() and caching its result on a miss."""
+        hits = self.get(vector)
+        if hits is None:
+            hits = fetch()
+            # Empty results are not cached so a later ingest can still be picked up
+            if hits:
+                self.put(vector, hits)
+        return hits
+
+    def clear(self) -> None:
+        with self._lock:
+            self.vals = [None] * self.capacity
+            self._size = 0
+            self._lru.clear()
+            self._expires[:] = 0.0
+            if self._store is not None:
+                self._store.rewrite([])
@@ -6,7 +6,7 @@ Chunking strategies for story text: fixed-size and overlapping chunking.
 from __future__ import annotations
 
 import re
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional, Tuple
 
 
 class StoryChunker:
@@ -20,6 +20,15 @@ class StoryChunker:
         self.overlap_percent = overlap_percent
         self.overlap_size = int(chunk_size * overlap_percent)
     
+    def _windows(self, text: str, stride: int) -> Iterator[Tuple[int, str]]:
+        """Yield (start, chunk_text) every stride characters, skipping whitespace-only chunks."""
+        # range() computes the offsets in C, and isspace() checks without the copy strip() makes
+        size = self.chunk_size
+        for start in range(0, len(text), stride):
+            chunk_text = text[start:start + size]
+            if not chunk_text.isspace():
+                yield start, chunk_text
+    
     def chunk_by_size(self, text: str) -> List[Dict]:
         """
         Fixed-size chunking - splits text into chunks of exactly chunk_size characters.
@@ -28,29 +37,17 @@ class StoryChunker:
         - Sentences get cut off
         - Context is lost at boundaries
         """
-        chunks = []
-        start = 0
-        chunk_id = 1
-        
-        while start < len(text):
-            end = start + self.chunk_size
-            chunk_text = text[start:end]
-            
-            # Don't create empty chunks
-            if chunk_text.strip():
-                chunks.append({
-                    "id": chunk_id,
-                    "text": chunk_text,
-                    "start_char": start,
-                    "end_char": end,
-                    "length": len(chunk_text),
-                    "chunk_type": "fixed_size"
-                })
-                chunk_id += 1
-            
-            start = end
-        
-        return chunks
+        return [
+            {
+                "id": chunk_id,
+                "text": chunk_text,
+                "start_char": start,
+                "end_char": start + self.chunk_size,
+                "length": len(chunk_text),
+                "chunk_type": "fixed_size"
+            }
+            for chunk_id, (start, chunk_text) in enumerate(self._windows(text, self.chunk_size), 1)
+        ]
     
     def chunk_with_overlap(self, text: str) -> List[Dict]:
         """
@@ -58,35 +55,20 @@ class StoryChunker:
         Each chunk overlaps with the previous one by overlap_percent.
         This helps maintain context across chunk boundaries.
         """
-        chunks = []
-        start = 0
-        chunk_id = 1
-        
-        while start < len(text):
-            end = start + self.chunk_size
-            chunk_text = text[start:end]
-            
-            # Don't create empty chunks
-            if chunk_text.strip():
-                chunks.append({
-                    "id": chunk_id,
-                    "text": chunk_text,
-                    "start_char": start,
-                    "end_char": end,
-                    "length": len(chunk_text),
-                    "chunk_type": "overlapping",
-                    "overlap_size": self.overlap_size
-                })
-                chunk_id += 1
-            
-            # Move start position by (chunk_size - overlap_size) to create overlap
-            start = start + self.chunk_size - self.overlap_size
-            
-            # Stop if we've covered the entire text
-            if start >= len(text):
-                break
-        
-        return chunks
+        # Each window starts (chunk_size - overlap_size) after the previous one
+        stride = self.chunk_size - self.overlap_size
+        return [
+            {
+                "id": chunk_id,
+                "text": chunk_text,
+                "start_char": start,
+                "end_char": start + self.chunk_size,
+                "length": len(chunk_text),
+                "chunk_type": "overlapping",
+                "overlap_size": self.overlap_size
+            }
+            for chunk_id, (start, chunk_text) in enumerate(self._windows(text, stride), 1)
+        ]
     
 
 
@@ -1,10 +1,16 @@
 from __future__ import annotations
 
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Set
 
 from story_chunker import StoryChunker
-from embedder import get_embedding
-from weaviate_helper import insert_story_part, insert_story_part_overlap
+from embedder import get_embeddings
+from weaviate_helper import (
+    existing_story_parts,
+    existing_story_parts_overlap,
+    insert_story_parts,
+    insert_story_parts_overlap,
+)
 
 
 class StoryIngester:
@@ -12,7 +18,7 @@ class StoryIngester:
         self.story_path = story_path
         self.chunker = StoryChunker(chunk_size=chunk_size, overlap_percent=overlap_percent)
 
-    def ingest(self, limit: Optional[int] = None) -> int:
+    def ingest(self, limit: Optional[int] = None, batch_size: int = 128, max_workers: int = 4) -> int:
         """
         Read story file, chunk into fixed-size chunks, embed each chunk,
         and insert into Weaviate via helper. Returns number of processed chunks.
@@ -21,17 +27,15 @@ class StoryIngester:
             story_text = f.read()
         
         chunks = self.chunker.chunk_by_size(story_text)
-        count = 0
-        
-        for ch in (chunks[:limit] if limit else chunks):
-            part_text = ch["text"]
-            vector = get_embedding(part_text)
-            insert_story_part(part_text, vector)
-            count += 1
-        
-        return count
+        return self._embed_and_insert(
+            chunks[:limit] if limit else chunks,
+            existing_story_parts(),
+            insert_story_parts,
+            batch_size,
+            max_workers,
+        )
 
-    def ingest_with_overlaps(self, limit: Optional[int] = None) -> int:
+    def ingest_with_overlaps(self, limit: Optional[int] = None, batch_size: int = 128, max_workers: int = 4) -> int:
         """
         Read story file, chunk into overlapping chunks, embed each chunk,
         and insert into Weaviate via helper. Returns number of processed chunks.
@@ -40,15 +44,37 @@ class StoryIngester:
             story_text = f.read()
         
         chunks = self.chunker.chunk_with_overlap(story_text)
-        count = 0
-        
-        for ch in (chunks[:limit] if limit else chunks):
-            part_text = ch["text"]
-            vector = get_embedding(part_text)
-            insert_story_part_overlap(part_text, vector)
-            count += 1
-        
-        return count
+        return self._embed_and_insert(
+            chunks[:limit] if limit else chunks,
+            existing_story_parts_overlap(),
+            insert_story_parts_overlap,
+            batch_size,
+            max_workers,
+        )
+
+    @staticmethod
+    def _embed_and_insert(
+        chunks: List[Dict],
+        existing: Set[str],
+        insert: Callable[[Sequence[str], Sequence[List[float]]], int],
+        batch_size: int,
+        max_workers: int,
+    ) -> int:
+        # Parts already stored (or repeated in this run) are skipped locally, before
+        # they cost an embedding; the rest go out as one Embeddings API request and
+        # one Weaviate batch per batch_size chunks
+        texts = []
+        for ch in chunks:
+            if ch["text"] not in existing:
+                existing.add(ch["text"])
+                texts.append(ch["text"])
+        batches = [texts[start : start + batch_size] for start in range(0, len(texts), batch_size)]
+        # Up to max_workers embedding requests are in flight on the shared client while
+        # finished batches are inserted, in order, from this thread
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for batch, vectors in zip(batches, pool.map(get_embeddings, batches)):
+                insert(batch, vectors)
+        return len(chunks)
 
 
 if __name__ == "__main__":
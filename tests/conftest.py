@@ -0,0 +1,17 @@
+"""
+Shared fixtures for the chatbot cache tests
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    """Enable on-disk persistence under a temporary RAG_CACHE_DIR"""
+    monkeypatch.setenv("RAG_CACHE_DIR", str(tmp_path))
+    return tmp_path
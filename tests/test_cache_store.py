@@ -0,0 +1,60 @@
+"""
+On-disk vector store tests
+"""
+
+import numpy as np
+
+from cache_store import VectorStore, cache_path
+
+
+def test_cache_path_disabled(monkeypatch):
+    """Test persistence is off without RAG_CACHE_DIR"""
+    monkeypatch.delenv("RAG_CACHE_DIR", raising=False)
+    assert cache_path("hits", "model-a") is None
+
+
+def test_cache_path_keyed_by_model(cache_dir):
+    """Test store names differ per embedding model"""
+    a = cache_path("hits", "model-a")
+    b = cache_path("hits", "model-b")
+    assert a != b
+    assert a.startswith(str(cache_dir))
+
+
+def test_append_and_load(cache_dir):
+    """Test rows are read back oldest first with their metadata"""
+    store = VectorStore(cache_path("hits", "m"))
+    store.append(np.array([1.0, 0.0], dtype=np.float32), {"dim": 2, "n": 1})
+    store.append(np.array([0.0, 1.0], dtype=np.float32), {"dim": 2, "n": 2})
+
+    rows = list(store.load())
+    assert [meta["n"] for _, meta in rows] == [1, 2]
+    np.testing.assert_array_equal(rows[1][0], [0.0, 1.0])
+
+
+def test_load_missing_store(cache_dir):
+    """Test loading a store that was never written yields nothing"""
+    assert list(VectorStore(cache_path("hits", "m")).load()) == []
+
+
+def test_load_ignores_torn_write(cache_dir):
+    """Test a truncated trailing row is dropped"""
+    store = VectorStore(cache_path("hits", "m"))
+    store.append(np.array([1.0, 0.0], dtype=np.float32), {"dim": 2})
+    store.append(np.array([0.0, 1.0], dtype=np.float32), {"dim": 2})
+    with open(store.dat_path, "r+b") as f:
+        f.truncate(12)
+
+    assert len(list(store.load())) == 1
+
+
+def test_rewrite_replaces_contents(cache_dir):
+    """Test rewrite keeps only the given entries"""
+    store = VectorStore(cache_path("hits", "m"))
+    for i in range(3):
+        store.append(np.array([i, 1.0], dtype=np.float32), {"dim": 2, "n": i})
+
+    store.rewrite([(np.array([9.0, 9.0], dtype=np.float32), {"dim": 2, "n": 9})])
+
+    rows = list(store.load())
+    assert [meta["n"] for _, meta in rows] == [9]
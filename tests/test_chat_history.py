@@ -0,0 +1,27 @@
+"""
+Chat history tests
+"""
+
+from collections import deque
+
+from chat_history import remember
+
+
+SYSTEM_MESSAGE = {"role": "system", "content": "You are a helpful assistant."}
+
+
+def test_remember_appends_until_full():
+    """Test messages are appended while there is room"""
+    history = deque([SYSTEM_MESSAGE], maxlen=4)
+    remember(history, {"role": "user", "content": "hi"})
+
+    assert list(history) == [SYSTEM_MESSAGE, {"role": "user", "content": "hi"}]
+
+
+def test_remember_keeps_system_prompt():
+    """Test the oldest turn, not the system prompt, is dropped when full"""
+    history = deque([SYSTEM_MESSAGE], maxlen=3)
+    for i in range(5):
+        remember(history, {"role": "user", "content": str(i)})
+
+    assert [m["content"] for m in history] == [SYSTEM_MESSAGE["content"], "3", "4"]
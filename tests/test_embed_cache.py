@@ -0,0 +1,107 @@
+"""
+Embedding cache tests
+"""
+
+import time
+
+import numpy as np
+import pytest
+
+import embed_cache
+from cache_store import cache_path
+from embed_cache import EmbeddingCache
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Replace the embeddings API with a deterministic fake and record its calls"""
+    vectors = {
+        "refund policy": [1.0, 0.0, 0.0],
+        "refund  policies": [0.999, 0.01, 0.0],
+        "shipping": [0.0, 1.0, 0.0],
+    }
+    seen = []
+
+    def fake_get_embedding(text, model):
+        seen.append((text, model))
+        return vectors[text]
+
+    monkeypatch.setattr(embed_cache, "get_embedding", fake_get_embedding)
+    return seen
+
+
+def test_exact_hit_skips_api(calls):
+    """Test repeated text is served from the cache"""
+    cache = EmbeddingCache()
+    first = cache.get("refund policy")
+    second = cache.get("  Refund   POLICY ")
+
+    assert len(calls) == 1
+    np.testing.assert_array_equal(first, second)
+    assert np.isclose(np.linalg.norm(first), 1.0)
+
+
+def test_model_passed_to_api(calls):
+    """Test the cache asks for the model its store is keyed by"""
+    EmbeddingCache().get("shipping")
+    assert calls[0][1] == embed_cache.EMBEDDING_MODEL
+
+
+def test_near_duplicate_snaps_to_cached_vector(calls):
+    """Test a vector within tau reuses the cached one"""
+    cache = EmbeddingCache(tau=0.99)
+    base = cache.get("refund policy")
+    near = cache.get("refund  policies")
+
+    assert len(calls) == 2
+    np.testing.assert_array_equal(base, near)
+
+
+def test_expired_entry_is_refetched(calls):
+    """Test entries past their ttl are fetched again"""
+    cache = EmbeddingCache(ttl=0.05)
+    cache.get("shipping")
+    time.sleep(0.1)
+    cache.get("shipping")
+
+    assert len(calls) == 2
+
+
+def test_lru_eviction(calls):
+    """Test the least recently used key is evicted at capacity"""
+    cache = EmbeddingCache(capacity=2, tau=1.0)
+    cache.get("refund policy")
+    cache.get("shipping")
+    cache.get("refund policy")
+    cache.get("refund  policies")
+    cache.get("refund policy")
+    cache.get("shipping")
+
+    assert [text for text, _ in calls] == ["refund policy", "shipping", "refund  policies", "shipping"]
+
+
+def test_persisted_entries_restored(calls, cache_dir):
+    """Test a new cache on the same store starts warm"""
+    path = cache_path("embed_cache", "m")
+    EmbeddingCache(persist_path=path).get("shipping")
+    EmbeddingCache(persist_path=path).get("shipping")
+
+    assert len(calls) == 1
+
+
+def test_expired_persisted_entries_dropped(calls, cache_dir):
+    """Test rows past their expiry are not restored"""
+    path = cache_path("embed_cache", "m")
+    EmbeddingCache(ttl=0.05, persist_path=path).get("shipping")
+    time.sleep(0.1)
+    EmbeddingCache(persist_path=path).get("shipping")
+
+    assert len(calls) == 2
+
+
+def test_stores_are_separate_per_model(calls, cache_dir):
+    """Test a store written for one model is not replayed for another"""
+    EmbeddingCache(persist_path=cache_path("embed_cache", "model-a")).get("shipping")
+    EmbeddingCache(persist_path=cache_path("embed_cache", "model-b")).get("shipping")
+
+    assert len(calls) == 2
@@ -0,0 +1,73 @@
+"""
+Warmup index tests
+"""
+
+import numpy as np
+import pytest
+
+import fast_index
+from embed_cache import as_unit_vector
+from fast_index import FastMemoryIndex, load_warmup_queries
+
+
+VECTORS = {
+    "refunds": [1.0, 0.0],
+    "shipping": [0.0, 1.0],
+    "gift cards": [0.7, 0.7],
+}
+
+
+@pytest.fixture(autouse=True)
+def fake_embeddings(monkeypatch):
+    """Serve warmup embeddings without the API"""
+    monkeypatch.setattr(fast_index, "get_embedding_cached", lambda text: as_unit_vector(VECTORS[text]))
+
+
+def fetch(vec):
+    if vec[0] > 0.9:
+        return [{"topic": "refunds"}]
+    if vec[1] > 0.9:
+        return [{"topic": "shipping"}]
+    return []
+
+
+def test_lookup_nearest_warmup_query():
+    """Test a lookup returns the hits of the closest warmup query"""
+    index = FastMemoryIndex(tau=0.9)
+    index.warmup(["refunds", "shipping"], fetch)
+
+    assert len(index) == 2
+    assert index.lookup([0.98, 0.1]) == [{"topic": "refunds"}]
+    assert index.lookup([0.1, 0.99]) == [{"topic": "shipping"}]
+
+
+def test_lookup_below_tau_misses():
+    """Test a query far from every warmup query misses"""
+    index = FastMemoryIndex(tau=0.9)
+    index.warmup(["refunds", "shipping"], fetch)
+
+    assert index.lookup([0.7, 0.7]) is None
+
+
+def test_queries_without_hits_skipped():
+    """Test warmup drops queries whose fetch returns nothing"""
+    index = FastMemoryIndex()
+    index.warmup(["refunds", "gift cards"], fetch)
+
+    assert len(index) == 1
+    assert index.vecs.dtype == np.float32
+
+
+def test_empty_index_misses():
+    """Test an index without warmup answers nothing"""
+    assert FastMemoryIndex().lookup([1.0, 0.0]) is None
+
+
+def test_load_warmup_queries(tmp_path, monkeypatch):
+    """Test warmup queries are read one per line, skipping blanks"""
+    path = tmp_path / "warmup.txt"
+    path.write_text("refunds\n\n  shipping  \n", encoding="utf-8")
+    monkeypatch.setenv("FAQ_WARMUP_FILE", str(path))
+
+    assert load_warmup_queries() == ["refunds", "shipping"]
+    assert load_warmup_queries(str(tmp_path / "missing.txt")) == []
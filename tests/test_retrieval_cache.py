@@ -0,0 +1,82 @@
+"""
+Retrieval proximity cache tests
+"""
+
+import time
+
+from cache_store import cache_path
+from retrieval_cache import ProximityCache
+
+
+HITS = [{"question": "How do refunds work?", "answer": "Within 30 days."}]
+
+
+def test_hit_within_tau():
+    """Test a nearby query returns the cached hits"""
+    cache = ProximityCache(tau=0.95)
+    cache.put([1.0, 0.0], HITS)
+
+    assert cache.get([1.0, 0.05]) == HITS
+    assert cache.get([0.0, 1.0]) is None
+
+
+def test_get_or_fetch_skips_empty_results():
+    """Test empty results are fetched but not cached"""
+    cache = ProximityCache()
+    fetched = []
+
+    def fetch():
+        fetched.append(1)
+        return []
+
+    cache.get_or_fetch([1.0, 0.0], fetch)
+    cache.get_or_fetch([1.0, 0.0], fetch)
+
+    assert len(fetched) == 2
+
+
+def test_lru_eviction():
+    """Test the least recently used entry is evicted at capacity"""
+    cache = ProximityCache(capacity=2)
+    cache.put([1.0, 0.0, 0.0], [{"n": 1}])
+    cache.put([0.0, 1.0, 0.0], [{"n": 2}])
+    cache.get([1.0, 0.0, 0.0])
+    cache.put([0.0, 0.0, 1.0], [{"n": 3}])
+
+    assert cache.get([1.0, 0.0, 0.0]) == [{"n": 1}]
+    assert cache.get([0.0, 1.0, 0.0]) is None
+
+
+def test_expired_entry_misses():
+    """Test entries past their ttl are not returned"""
+    cache = ProximityCache(ttl=0.05)
+    cache.put([1.0, 0.0], HITS)
+    time.sleep(0.1)
+
+    assert cache.get([1.0, 0.0]) is None
+
+
+def test_clear():
+    """Test clear drops every entry"""
+    cache = ProximityCache()
+    cache.put([1.0, 0.0], HITS)
+    cache.clear()
+
+    assert cache.get([1.0, 0.0]) is None
+
+
+def test_persisted_entries_restored(cache_dir):
+    """Test a new cache on the same store starts warm"""
+    path = cache_path("faq_hits", "m")
+    ProximityCache(persist_path=path).put([1.0, 0.0], HITS)
+
+    assert ProximityCache(persist_path=path).get([1.0, 0.0]) == HITS
+
+
+def test_expired_persisted_entries_dropped(cache_dir):
+    """Test rows past their expiry are not restored"""
+    path = cache_path("faq_hits", "m")
+    ProximityCache(ttl=0.05, persist_path=path).put([1.0, 0.0], HITS)
+    time.sleep(0.1)
+
+    assert ProximityCache(persist_path=path).get([1.0, 0.0]) is None
@@ -1,9 +1,13 @@
+import atexit
 import os
+import threading
+from typing import TYPE_CHECKING, Sequence, Union
 
 import weaviate
 from weaviate.classes.init import Auth
-from weaviate.classes.config import Property, DataType
+from weaviate.classes.config import Configure, Property, DataType
 from weaviate.classes.query import MetadataQuery, Filter
+from weaviate.util import generate_uuid5
 
 try:
     from dotenv import load_dotenv  # type: ignore
@@ -11,6 +15,13 @@ try:
 except Exception:
     pass
 
+if TYPE_CHECKING:
+    import numpy as np
+
+# Query vectors may be plain lists or 1-D float32 ndarrays (e.g. from embed_cache);
+# the Weaviate client packs either straight into the gRPC request.
+Vector = Union[Sequence[float], "np.ndarray"]
+
 
 def _require_env(name: str) -> str:
     val = os.getenv(name)
@@ -19,48 +30,111 @@ def _require_env(name: str) -> str:
     return val
 
 
-_url = _require_env("WEAVIATE_URL")
-_api_key = _require_env("WEAVIATE_API_KEY")
-
-# Connect to Weaviate Cloud using environment-provided URL and API key
-client = weaviate.connect_to_weaviate_cloud(
-    cluster_url=_url,
-    auth_credentials=Auth.api_key(_api_key),
-)
-
-# Ensure collection 'FAQ' exists with desired schema
-if not client.collections.exists("FAQ"):
-    client.collections.create(
-        "FAQ",
-        properties=[
-            Property(name="question", data_type=DataType.TEXT),
-            Property(name="answer", data_type=DataType.TEXT),
-        ],
-    )
-
-faq = client.collections.get("FAQ")
-
-# Ensure collection 'story_parts' exists with desired schema
-if not client.collections.exists("story_parts"):
-    client.collections.create(
-        "story_parts",
-        properties=[
-            Property(name="part", data_type=DataType.TEXT),
-        ],
-    )
-
-story_parts = client.collections.get("story_parts")
-
-# Ensure collection 'story_parts_overlap' exists with desired schema
-if not client.collections.exists("story_parts_overlap"):
-    client.collections.create(
-        "story_parts_overlap",
-        properties=[
-            Property(name="part", data_type=DataType.TEXT),
-        ],
-    )
-
-story_parts_overlap = client.collections.get("story_parts_overlap")
+def _vector_index_config():
+    """HNSW config for new collections, compressed per $WEAVIATE_QUANTIZER (sq, bq or pq)."""
+    # Quantized vectors are what HNSW traversal reads, so 8-bit SQ cuts that memory
+    # traffic ~4x versus float32; Weaviate rescores candidates with the full vectors
+    quantizers = {
+        "sq": Configure.VectorIndex.Quantizer.sq,
+        "bq": Configure.VectorIndex.Quantizer.bq,
+        "pq": Configure.VectorIndex.Quantizer.pq,
+    }
+    name = os.getenv("WEAVIATE_QUANTIZER", "").lower()
+    if not name:
+        return None
+    if name not in quantizers:
+        raise RuntimeError(f"WEAVIATE_QUANTIZER must be one of {', '.join(quantizers)}, got {name!r}")
+    return Configure.VectorIndex.hnsw(quantizer=quantizers[name]())
+
+
+# Text properties of each collection, which is created on first use if missing
+_SCHEMAS = {
+    "FAQ": ("question", "answer"),
+    "story_parts": ("part",),
+    "story_parts_overlap": ("part",),
+}
+
+# Connected lazily, so importing this module costs no handshake or schema round-trips
+_client = None
+_collections: dict = {}
+_lock = threading.Lock()
+
+
+def get_client() -> weaviate.WeaviateClient:
+    """Return the shared Weaviate Cloud client, connecting on first use."""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = weaviate.connect_to_weaviate_cloud(
+                    cluster_url=_require_env("WEAVIATE_URL"),
+                    auth_credentials=Auth.api_key(_require_env("WEAVIATE_API_KEY")),
+                )
+    return _client
+
+
+def _collection(name: str):
+    """Return the named collection, ensuring it exists with its schema the first time."""
+    collection = _collections.get(name)
+    if collection is None:
+        client = get_client()
+        with _lock:
+            collection = _collections.get(name)
+            if collection is None:
+                if not client.collections.exists(name):
+                    client.collections.create(
+                        name,
+                        properties=[Property(name=prop, data_type=DataType.TEXT) for prop in _SCHEMAS[name]],
+                        vector_index_config=_vector_index_config(),
+                    )
+                collection = _collections[name] = client.collections.get(name)
+    return collection
+
+
+# Result properties returned for each collection
+_FAQ_PROPS = ("question", "answer")
+_PART_PROPS = ("part",)
+
+
+def _search(collection, props: tuple[str, ...], mode: str, *, query: str | None = None,
+            vector: Vector | None = None, alpha: float = 0.5, limit: int = 10) -> list[dict]:
+    """
+    Run a near_vector, bm25 or hybrid query and flatten each hit into a dict of the
+    given properties, the distance (near_vector) or score (bm25, hybrid), and the UUID.
+    """
+    if mode == "near_vector":
+        metric = "distance"
+        response = collection.query.near_vector(
+            near_vector=vector,
+            limit=limit,
+            return_metadata=MetadataQuery(distance=True),
+        )
+    elif mode == "bm25":
+        metric = "score"
+        response = collection.query.bm25(
+            query=query,
+            limit=limit,
+            return_metadata=MetadataQuery(score=True),
+        )
+    elif mode == "hybrid":
+        metric = "score"
+        response = collection.query.hybrid(
+            query=query,
+            alpha=alpha,
+            vector=vector,
+            limit=limit,
+            return_metadata=MetadataQuery(score=True),
+        )
+    else:
+        raise ValueError(f"unknown search mode {mode!r}")
+    return [
+        {
+            **{prop: obj.properties.get(prop) for prop in props},
+            metric: getattr(obj.metadata, metric, None),
+            "uuid": obj.uuid,
+        }
+        for obj in response.objects
+    ]
 
 
 def insert_chunk(question: str, answer: str, vector: list[float]) -> str | None:
@@ -74,12 +148,12 @@ def insert_chunk(question: str, answer: str, vector: list[float]) -> str | None:
         Filter.by_property("question").equal(question)
         & Filter.by_property("answer").equal(answer)
     )
-    existing = faq.query.fetch_objects(filters=existing_filter, limit=1)
+    existing = _collection("FAQ").query.fetch_objects(filters=existing_filter, limit=1)
     if existing.objects:
         # Already present; do nothing
         return None
 
-    uuid = faq.data.insert(
+    uuid = _collection("FAQ").data.insert(
         properties={
             "question": question,
             "answer": answer,
@@ -89,114 +163,103 @@ def insert_chunk(question: str, answer: str, vector: list[float]) -> str | None:
     return uuid
 
 
-def search_near_vector(vector: list[float], limit: int = 3):
+def search_near_vector(vector: Vector, limit: int = 3):
     """Search top-N nearest FAQ items by vector."""
-    response = faq.query.near_vector(
-        near_vector=vector,
-        limit=limit,
-        return_metadata=MetadataQuery(distance=True),
-    )
-    results = []
-    for obj in response.objects:
-        results.append(
-            {
-                "question": obj.properties.get("question"),
-                "answer": obj.properties.get("answer"),
-                "distance": obj.metadata.distance,
-                "uuid": obj.uuid,
-            }
-        )
-    return results
+    return _search(_collection("FAQ"), _FAQ_PROPS, "near_vector", vector=vector, limit=limit)
 
 
 def close_client() -> None:
-    client.close()
+    global _client
+    with _lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+        _collections.clear()
+
+
+atexit.register(close_client)
 
 
 # Story Parts Collection Functions
 
-def insert_story_part(part: str, vector: list[float]) -> str | None:
-    """
-    Insert a story part if it does not already exist (exact text match).
-    Returns the UUID of the inserted object, or None if it already existed.
-    """
-    # Deduplicate by exact match on part text
-    existing_filter = Filter.by_property("part").equal(part)
-    existing = story_parts.query.fetch_objects(filters=existing_filter, limit=1)
-    if existing.objects:
+def _insert_part(collection, part: str, vector: Vector) -> str | None:
+    # The UUID is derived from the text (as in _insert_parts_batch), so the existence
+    # check is usually a primary-key lookup rather than an equality filter over every part
+    uuid = generate_uuid5(part)
+    if collection.data.exists(uuid):
         # Already present; do nothing
         return None
+    # Parts inserted before content-derived UUIDs have random ones, so a miss is confirmed
+    # against the text until those objects are re-keyed
+    existing = collection.query.fetch_objects(filters=Filter.by_property("part").equal(part), limit=1)
+    if existing.objects:
+        return None
 
-    uuid = story_parts.data.insert(
+    return collection.data.insert(
         properties={
             "part": part,
         },
         vector=vector,
+        uuid=uuid,
     )
-    return uuid
 
 
-def search_near_vector_story(vector: list[float], limit: int = 3):
+def insert_story_part(part: str, vector: list[float]) -> str | None:
+    """
+    Insert a story part if it does not already exist (exact text match).
+    Returns the UUID of the inserted object, or None if it already existed.
+    """
+    return _insert_part(_collection("story_parts"), part, vector)
+
+
+def _insert_parts_batch(collection, parts: Sequence[str], vectors: Sequence[Vector]) -> int:
+    """
+    Insert story parts through one dynamic batch instead of a request per object.
+    Returns the number of objects written.
+    """
+    # UUIDs derived from the text make a re-inserted part overwrite itself rather
+    # than duplicate, so no per-object existence check is needed
+    with collection.batch.dynamic() as batch:
+        for part, vector in zip(parts, vectors):
+            batch.add_object(properties={"part": part}, vector=vector, uuid=generate_uuid5(part))
+    failed = collection.batch.failed_objects
+    if failed:
+        raise RuntimeError(f"{len(failed)} story parts failed to insert: {failed[0].message}")
+    return len(parts)
+
+
+def _existing_parts(collection) -> set[str]:
+    # One paginated scan of the collection, instead of an equality query per insert
+    return {obj.properties["part"] for obj in collection.iterator(return_properties=["part"])}
+
+
+def existing_story_parts() -> set[str]:
+    """Return the text of every stored story part, for deduplicating bulk inserts locally."""
+    return _existing_parts(_collection("story_parts"))
+
+
+def insert_story_parts(parts: Sequence[str], vectors: Sequence[Vector]) -> int:
+    """Batch-insert story parts with their vectors. Returns the number written."""
+    return _insert_parts_batch(_collection("story_parts"), parts, vectors)
+
+
+def search_near_vector_story(vector: Vector, limit: int = 3):
     """Search top-N nearest story parts by vector."""
-    response = story_parts.query.near_vector(
-        near_vector=vector,
-        limit=limit,
-        return_metadata=MetadataQuery(distance=True),
-    )
-    results = []
-    for obj in response.objects:
-        results.append(
-            {
-                "part": obj.properties.get("part"),
-                "distance": obj.metadata.distance,
-                "uuid": obj.uuid,
-            }
-        )
-    return results
+    return _search(_collection("story_parts"), _PART_PROPS, "near_vector", vector=vector, limit=limit)
 
 
 def search_bm25_story(query: str, limit: int = 10):
     """Keyword/BM25 search on story parts."""
-    response = story_parts.query.bm25(
-        query=query,
-        limit=limit,
-        return_metadata=MetadataQuery(score=True),
-    )
-    results = []
-    for obj in response.objects:
-        results.append(
-            {
-                "part": obj.properties.get("part"),
-                "score": getattr(obj.metadata, "score", None),
-                "uuid": obj.uuid,
-            }
-        )
-    return results
+    return _search(_collection("story_parts"), _PART_PROPS, "bm25", query=query, limit=limit)
 
 
-def search_hybrid_story(query: str, vector: list[float] | None = None, alpha: float = 0.5, limit: int = 10):
+def search_hybrid_story(query: str, vector: Vector | None = None, alpha: float = 0.5, limit: int = 10):
     """
     Hybrid search on story parts: combines keyword (BM25) and vector signals.
     alpha in [0,1]: 0 => pure keyword, 1 => pure vector.
     If vector is None, Weaviate will use keyword-only weighting per alpha.
     """
-    response = story_parts.query.hybrid(
-        query=query,
-        alpha=alpha,
-        vector=vector,
-        limit=limit,
-        return_metadata=MetadataQuery(score=True),
-    )
-    results = []
-    for obj in response.objects:
-        results.append(
-            {
-                "part": obj.properties.get("part"),
-                "score": getattr(obj.metadata, "score", None),
-                "uuid": obj.uuid,
-            }
-        )
-    return results
+    return _search(_collection("story_parts"), _PART_PROPS, "hybrid", query=query, vector=vector, alpha=alpha, limit=limit)
 
 
 # Story Parts Overlap Collection Functions
@@ -206,106 +269,44 @@ def insert_story_part_overlap(part: str, vector: list[float]) -> str | None:
     Insert a story part overlap if it does not already exist (exact text match).
     Returns the UUID of the inserted object, or None if it already existed.
     """
-    # Deduplicate by exact match on part text
-    existing_filter = Filter.by_property("part").equal(part)
-    existing = story_parts_overlap.query.fetch_objects(filters=existing_filter, limit=1)
-    if existing.objects:
-        # Already present; do nothing
-        return None
+    return _insert_part(_collection("story_parts_overlap"), part, vector)
 
-    uuid = story_parts_overlap.data.insert(
-        properties={
-            "part": part,
-        },
-        vector=vector,
-    )
-    return uuid
+
+def existing_story_parts_overlap() -> set[str]:
+    """Return the text of every stored story part overlap, for deduplicating bulk inserts locally."""
+    return _existing_parts(_collection("story_parts_overlap"))
 
 
-def search_near_vector_story_overlap(vector: list[float], limit: int = 3):
+def insert_story_parts_overlap(parts: Sequence[str], vectors: Sequence[Vector]) -> int:
+    """Batch-insert story part overlaps with their vectors. Returns the number written."""
+    return _insert_parts_batch(_collection("story_parts_overlap"), parts, vectors)
+
+
+def search_near_vector_story_overlap(vector: Vector, limit: int = 3):
     """Search top-N nearest story parts overlap by vector."""
-    response = story_parts_overlap.query.near_vector(
-        near_vector=vector,
-        limit=limit,
-        return_metadata=MetadataQuery(distance=True),
-    )
-    results = []
-    for obj in response.objects:
-        results.append(
-            {
-                "part": obj.properties.get("part"),
-                "distance": obj.metadata.distance,
-                "uuid": obj.uuid,
-            }
-        )
-    return results
+    return _search(_collection("story_parts_overlap"), _PART_PROPS, "near_vector", vector=vector, limit=limit)
 
 
 def search_bm25_story_overlap(query: str, limit: int = 10):
     """Keyword/BM25 search on story parts overlap."""
-    response = story_parts_overlap.query.bm25(
-        query=query,
-        limit=limit,
-        return_metadata=MetadataQuery(score=True),
-    )
-    results = []
-    for obj in response.objects:
-        results.append(
-            {
-                "part": obj.properties.get("part"),
-                "score": getattr(obj.metadata, "score", None),
-                "uuid": obj.uuid,
-            }
-        )
-    return results
+    return _search(_collection("story_parts_overlap"), _PART_PROPS, "bm25", query=query, limit=limit)
 
 
-def search_hybrid_story_overlap(query: str, vector: list[float] | None = None, alpha: float = 0.5, limit: int = 10):
+def search_hybrid_story_overlap(query: str, vector: Vector | None = None, alpha: float = 0.5, limit: int = 10):
     """
     Hybrid search on story parts overlap: combines keyword (BM25) and vector signals.
     alpha in [0,1]: 0 => pure keyword, 1 => pure vector.
     If vector is None, Weaviate will use keyword-only weighting per alpha.
     """
-    response = story_parts_overlap.query.hybrid(
-        query=query,
-        alpha=alpha,
-        vector=vector,
-        limit=limit,
-        return_metadata=MetadataQuery(score=True),
-    )
-    results = []
-    for obj in response.objects:
-        results.append(
-            {
-                "part": obj.properties.get("part"),
-                "score": getattr(obj.metadata, "score", None),
-                "uuid": obj.uuid,
-            }
-        )
-    return results
+    return _search(_collection("story_parts_overlap"), _PART_PROPS, "hybrid", query=query, vector=vector, alpha=alpha, limit=limit)
 
 
 def search_bm25(query: str, limit: int = 10):
     """Keyword/BM25 search (TF-IDF-style scoring)."""
-    response = faq.query.bm25(
-        query=query,
-        limit=limit,
-        return_metadata=MetadataQuery(score=True),
-    )
-    results = []
-    for obj in response.objects:
-        results.append(
-            {
-                "question": obj.properties.get("question"),
-                "answer": obj.properties.get("answer"),
-                "score": getattr(obj.metadata, "score", None),
-                "uuid": obj.uuid,
-            }
-        )
-    return results
+    return _search(_collection("FAQ"), _FAQ_PROPS, "bm25", query=query, limit=limit)
 
 
-def search_hybrid(query: str, vector: list[float] | None = None, alpha: float = 0.5, limit: int = 10):
+def search_hybrid(query: str, vector: Vector | None = None, alpha: float = 0.5, limit: int = 10):
     """
     Hybrid search: combines keyword (BM25) and vector signals.
     alpha in [0,1]: 0 => pure keyword, 1 => pure vector.
@@ -317,23 +318,6 @@ def search_hybrid(query: str, vector: list[float] | None = None, alpha: float =
         50% weight to vector (semantic) score
     Final score = alpha × BM25_score + (1-alpha) × vector_score
     """
-    response = faq.query.hybrid(
-        query=query,
-        alpha=alpha,
-        vector=vector,
-        limit=limit,
-        return_metadata=MetadataQuery(score=True),
-    )
-    results = []
-    for obj in response.objects:
-        results.append(
-            {
-                "question": obj.properties.get("question"),
-                "answer": obj.properties.get("answer"),
-                "score": getattr(obj.metadata, "score", None),
-                "uuid": obj.uuid,
-            }
-        )
-    return results
+    return _search(_collection("FAQ"), _FAQ_PROPS, "hybrid", query=query, vector=vector, alpha=alpha, limit=limit)
 
 